@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+
+# --- 설정 ---
+# 계정 목록 파일 (JSON 배열). 없으면 아래 기본 계정을 사용합니다.
+ACCOUNTS_FILE = os.getenv("ACCOUNTS_FILE", "accounts.json")
+# 파일이 바뀌었는지 확인하는 최소 간격(초). 바뀌면 재시작 없이 다음 조회부터 새 목록을 씁니다.
+ACCOUNTS_RELOAD_SECONDS = float(os.getenv("ACCOUNTS_RELOAD_SECONDS", "5"))
+
+REQUIRED_FIELDS = ("name", "username", "password", "slack_channel")
+
+# 계정 파일이 없을 때 쓰는 기본 계정
+DEFAULT_ACCOUNTS = [
+    {
+        "name": "kjg",
+        "username": "E20250124156285",
+        "password": "1234",
+        "slack_channel": "#kjg_cpcbalance"
+    },
+    {
+        "name": "htag",
+        "username": "E20240626154518",
+        "password": "1234",
+        "slack_channel": "#htag_cpcbalance"
+    },
+    {
+        "name": "gpr",
+        "username": "E20250124156283",
+        "password": "1234",
+        "slack_channel": "#gpr_cpcbalance"
+    },
+    {
+        "name": "smd",
+        "username": "E20220210100006",
+        "password": "1234",
+        "slack_channel": "#smd_cpcbalance"
+    },
+    {
+        "name": "zen",
+        "username": "E20250124156292",
+        "password": "1234",
+        "slack_channel": "#zen_cpcbalance"
+    }
+]
+
+
+def normalize_accounts(entries):
+    """계정 항목을 검사하고 빠진 파일 경로를 채운 새 목록을 반환합니다. 잘못되면 ValueError."""
+    if not isinstance(entries, list):
+        raise ValueError("계정 설정은 JSON 배열이어야 합니다.")
+    accounts, names = [], set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{index}번째 계정이 객체가 아닙니다.")
+        missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+        if missing:
+            raise ValueError(f"{index}번째 계정에 {', '.join(missing)} 항목이 없습니다.")
+        if entry["name"] in names:
+            raise ValueError(f"계정 이름이 중복됩니다: {entry['name']}")
+        names.add(entry["name"])
+        if entry.get("enabled", True) is False:
+            continue
+        acc = dict(entry)
+        acc.setdefault("excel_file", f"merchant_cpc_data_{acc['name']}.xlsx")
+        acc.setdefault("csv_file", f"merchant_cpc_data_{acc['name']}.csv")
+        accounts.append(acc)
+    return accounts
+
+
+class AccountRegistry:
+    """계정 파일을 읽고, 파일이 바뀌면 다시 읽는 계정 목록
+
+    파일을 잘못 고치면 오류를 출력하고 마지막으로 읽은 목록을 계속 씁니다.
+    """
+
+    def __init__(self, path=None, reload_seconds=None):
+        self.path = path or ACCOUNTS_FILE
+        self.reload_seconds = ACCOUNTS_RELOAD_SECONDS if reload_seconds is None else reload_seconds
+        self.lock = threading.Lock()
+        self._accounts = normalize_accounts(DEFAULT_ACCOUNTS)
+        self._mtime = None
+        self._checked = 0
+        self._reload()
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                accounts = normalize_accounts(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"❌ 계정 설정 읽기 실패({self.path}), 이전 목록을 유지합니다: {e}")
+            self._mtime = mtime
+            return
+        before = {acc["name"] for acc in self._accounts}
+        after = {acc["name"] for acc in accounts}
+        self._accounts = accounts
+        self._mtime = mtime
+        print(
+            f"계정 설정을 읽었습니다({self.path}): {len(accounts)}개"
+            + (f", 추가 {sorted(after - before)}" if after - before else "")
+            + (f", 제거 {sorted(before - after)}" if before - after else "")
+        )
+
+    def accounts(self):
+        """현재 계정 목록 (호출할 때 파일 변경을 확인합니다)"""
+        with self.lock:
+            now = time.time()
+            if now - self._checked >= self.reload_seconds:
+                self._checked = now
+                self._reload()
+            return list(self._accounts)
+
+    def get(self, name):
+        return next((acc for acc in self.accounts() if acc["name"] == name), None)
+
+    def names(self):
+        return [acc["name"] for acc in self.accounts()]
+
+
+# 웹 엔드포인트, 스케줄러, 크롤러 작업이 함께 쓰는 계정 목록
+account_registry = AccountRegistry()
@@ -0,0 +1,198 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from history_store import history_store
+
+# --- 설정 ---
+# 이 일수 안에 잔액이 바닥날 것으로 보이는 가맹점을 보고서에 따로 표시합니다 (0 이면 표시하지 않음).
+BALANCE_ALERT_DAYS = float(os.getenv("BALANCE_ALERT_DAYS", "7"))
+# 가맹점별로 보관하는 일별 소진액 수 (최대 30일 소진율까지 계산)
+WINDOW = 30
+
+# --- 가맹점별 누적 통계 ---
+# merchant_stats 에는 가맹점마다 최근 WINDOW 일의 일별 소진액(float64 배열)과 마지막 잔액을 둡니다.
+# 매 실행은 오늘 잔액과 이 값만으로 전일 대비 변화, 7/30일 소진율, 남은 일수를 갱신하며
+# 전체 이력을 다시 읽지 않습니다. 같은 날 다시 실행해도 결과가 같도록 직전 날짜의 상태(base)를 함께 둡니다.
+
+EMPTY_RING = np.zeros(WINDOW, dtype="float64").tobytes()
+
+
+def _rings(blobs):
+    """BLOB 목록을 (n, WINDOW) 행렬로 바꿉니다. 값이 없으면 0 으로 채웁니다."""
+    if not len(blobs):
+        return np.zeros((0, WINDOW), dtype="float64")
+    return np.frombuffer(b"".join(blob if isinstance(blob, bytes) else EMPTY_RING for blob in blobs), dtype="float64").reshape(len(blobs), WINDOW)
+
+
+def _nullable(values):
+    """NaN 을 None(NULL) 로 바꾼 파이썬 float 목록"""
+    values = pd.Series(values, dtype="float64")
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _window_burn(ring, days, span):
+    """최근 span 일의 하루 평균 소진액. 기록이 없는 가맹점은 NaN."""
+    counted = np.minimum(span, days)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counted > 0, ring[:, -span:].sum(axis=1) / counted, np.nan)
+
+
+def compute_stats(date, merchants, balances, base_dates, base_balances, base_rings, base_days):
+    """오늘 잔액과 직전 상태(base)로 가맹점별 통계를 한 번에 계산합니다 (모두 길이 n 의 배열).
+
+    직전 날짜와 g 일 떨어져 있으면 그 사이 소진액(잔액 감소분, 충전은 0)을 g 일에 고르게 나눠
+    일별 소진액 배열을 g 칸 밀어 넣습니다.
+    """
+    balances = np.asarray(balances, dtype="float64")
+    base_balances = np.asarray(base_balances, dtype="float64")
+    base_days = np.asarray(base_days, dtype="int64")
+    gap = (pd.Timestamp(date) - pd.to_datetime(pd.Series(base_dates, dtype="object"))).dt.days.to_numpy()
+    has_base = ~np.isnan(gap) & (gap >= 1)
+    gap = np.where(has_base, gap, 0).astype("int64")
+    shift = np.minimum(gap, WINDOW)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_day = np.where(has_base, np.maximum(base_balances - balances, 0) / np.maximum(gap, 1), 0.0)
+    index = np.arange(WINDOW)[None, :] + shift[:, None]
+    shifted = np.take_along_axis(base_rings, np.minimum(index, WINDOW - 1), axis=1)
+    rings = np.where(index >= WINDOW, per_day[:, None], shifted)
+    rings = np.where(has_base[:, None], rings, 0.0)
+    days = np.where(has_base, np.minimum(WINDOW, base_days + gap), 0)
+    burn_7 = _window_burn(rings, days, 7)
+    burn_30 = _window_burn(rings, days, 30)
+    burn = np.where(burn_7 > 0, burn_7, burn_30)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_left = np.where(balances <= 0, 0.0, np.where(burn > 0, balances / burn, np.nan))
+    stats = pd.DataFrame({
+        "merchant": merchants,
+        "balance": balances,
+        "delta": np.where(has_base, balances - base_balances, np.nan),
+        "burn_7": burn_7,
+        "burn_30": burn_30,
+        "days_left": days_left
+    })
+    return stats, rings, days
+
+
+def update_stats(account, date, merchant_rows, store=None):
+    """오늘 수집한 가맹점 잔액으로 통계를 갱신하고 가맹점별 통계 DataFrame(index: 가맹점명)을 반환합니다."""
+    store = store or history_store
+    _ensure_backfill(account, store)
+    return _apply(account, date, merchant_rows, store)
+
+
+def _apply(account, date, merchant_rows, store):
+    today = pd.DataFrame(
+        [(row["가맹점명"], row["CPC잔액"]) for row in merchant_rows], columns=["merchant", "balance"]
+    ).drop_duplicates("merchant", keep="last")
+    with store.connect() as conn:
+        existing = pd.DataFrame(
+            conn.execute(
+                """
+                SELECT merchant, last_date, last_balance, last_ring, last_days,
+                       base_date, base_balance, base_ring, base_days
+                FROM merchant_stats WHERE account = ?
+                """,
+                (account,)
+            ).fetchall(),
+            columns=["merchant", "last_date", "last_balance", "last_ring", "last_days",
+                     "base_date", "base_balance", "base_ring", "base_days"]
+        ).set_index("merchant").reindex(today["merchant"])
+        # 같은 날 다시 실행하면 직전 날짜 상태(base)에서 다시 계산하고, 새 날짜면 마지막 상태가 base 가 됩니다.
+        same_day = (existing["last_date"] == date).to_numpy()
+        base_dates = np.where(same_day, existing["base_date"], existing["last_date"])
+        base_balances = np.where(same_day, existing["base_balance"], existing["last_balance"]).astype("float64")
+        base_days = np.nan_to_num(np.where(same_day, existing["base_days"], existing["last_days"]).astype("float64"))
+        base_blobs = np.where(same_day, existing["base_ring"], existing["last_ring"])
+        stats, rings, days = compute_stats(
+            date, today["merchant"].to_numpy(), today["balance"].to_numpy(),
+            base_dates, base_balances, _rings(base_blobs), base_days
+        )
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO merchant_stats (
+                account, merchant, last_date, last_balance, last_ring, last_days,
+                base_date, base_balance, base_ring, base_days, delta, burn_7, burn_30, days_left
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            zip(
+                [account] * len(stats), stats["merchant"].tolist(), [date] * len(stats),
+                stats["balance"].tolist(), [ring.tobytes() for ring in rings], days.tolist(),
+                [value if isinstance(value, str) else None for value in base_dates],
+                _nullable(base_balances),
+                [value if isinstance(value, bytes) else None for value in base_blobs],
+                base_days.astype("int64").tolist(),
+                _nullable(stats["delta"]), _nullable(stats["burn_7"]),
+                _nullable(stats["burn_30"]), _nullable(stats["days_left"])
+            )
+        )
+    return stats.set_index("merchant")
+
+
+def _ensure_backfill(account, store):
+    """통계가 없던 시절의 이력으로 한 번만 날짜 순서대로 통계를 채웁니다."""
+    key = f"stats_index:{account}"
+    with store.connect() as conn:
+        if store._get_meta(conn, key):
+            return
+    history = store.read(account)
+    if not history.empty:
+        history["가맹점명"] = history["가맹점명"].astype(str)
+        for date, day in history.sort_values("추출날짜").groupby("추출날짜", sort=True):
+            _apply(account, date, day.to_dict("records"), store)
+        print(f"[{account}] 가맹점 잔액 통계를 {history['추출날짜'].nunique()}일치 이력으로 채웠습니다.")
+    with store.connect() as conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, "1"))
+
+
+def rebuild_stats(account, store=None):
+    """계정의 통계를 지우고 전체 이력으로 처음부터 다시 계산합니다 (과거 이력을 고친 뒤)."""
+    store = store or history_store
+    with store.connect() as conn:
+        conn.execute("DELETE FROM merchant_stats WHERE account = ?", (account,))
+        conn.execute("DELETE FROM meta WHERE key = ?", (f"stats_index:{account}",))
+    _ensure_backfill(account, store)
+
+
+def load_stats(accounts=None, store=None):
+    """계정들의 최신 가맹점 통계 (계정, 가맹점, 날짜, 잔액, 변화, 7/30일 소진율, 남은 일수)"""
+    store = store or history_store
+    query = (
+        "SELECT account, merchant, last_date, last_balance, delta, burn_7, burn_30, days_left FROM merchant_stats"
+    )
+    params = []
+    if accounts:
+        query += f" WHERE account IN ({','.join('?' * len(accounts))})"
+        params = list(accounts)
+    with store.connect() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return pd.DataFrame(
+        rows, columns=["account", "merchant", "date", "balance", "delta", "burn_7", "burn_30", "days_left"]
+    ).astype({"balance": "float64", "delta": "float64", "burn_7": "float64", "burn_30": "float64", "days_left": "float64"})
+
+
+def depleting(stats, days=None):
+    """잔액이 남아 있지만 days 일 안에 바닥날 것으로 보이는 가맹점 (남은 일수 오름차순)"""
+    days = BALANCE_ALERT_DAYS if days is None else days
+    if not days or stats.empty:
+        return stats.iloc[0:0]
+    mask = (stats["balance"] > 0) & (stats["days_left"] <= days)
+    return stats[mask].sort_values("days_left", kind="stable")
+
+
+# --- 명령줄 실행 ---
+# python analytics.py alert [일수] [계정 ...]   모든(또는 지정한) 계정에서 곧 소진될 가맹점
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "alert":
+        print("사용법: python analytics.py alert [일수] [계정 ...]")
+        sys.exit(1)
+    alert_days = float(sys.argv[2]) if len(sys.argv) > 2 else BALANCE_ALERT_DAYS
+    alerts = depleting(load_stats(sys.argv[3:] or None), alert_days)
+    if alerts.empty:
+        print(f"{alert_days:g}일 안에 소진될 것으로 보이는 가맹점이 없습니다.")
+    for row in alerts.itertuples(index=False):
+        # days_left 와 같은 기준: 7일 소진율이 없으면(이력 7일 미만 등) 30일 소진율
+        burn, window = (row.burn_7, 7) if row.burn_7 > 0 else (row.burn_30, 30)
+        print(f"[{row.account}] {row.merchant}: {row.balance:,.0f} RMB, 하루 {burn:,.0f} 소진({window}일 평균), 약 {row.days_left:.1f}일 남음")
@@ -0,0 +1,263 @@
+import base64
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+from metrics import inc, observe
+
+# --- 설정 ---
+# 오류 스크린샷/DOM 을 저장할 디렉터리 (<실행 ID>/<계정>/ 아래에 저장)
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+# 전체 크기 상한(MB). 넘으면 오래된 것부터 지웁니다.
+ARTIFACT_MAX_MB = float(os.getenv("ARTIFACT_MAX_MB", "200"))
+# 이 일수보다 오래된 것은 지웁니다.
+ARTIFACT_MAX_AGE_DAYS = float(os.getenv("ARTIFACT_MAX_AGE_DAYS", "7"))
+# 저장을 기다리는 캡처 수 상한. 가득 차면 크롤링을 막지 않고 이번 캡처를 버립니다.
+ARTIFACT_QUEUE_SIZE = int(os.getenv("ARTIFACT_QUEUE_SIZE", "32"))
+# 스크린샷 JPEG 품질 (PNG 보다 빠르고 작음)
+ARTIFACT_JPEG_QUALITY = int(os.getenv("ARTIFACT_JPEG_QUALITY", "60"))
+# 0 이면 DOM(page_source) 은 저장하지 않습니다.
+ARTIFACT_CAPTURE_DOM = os.getenv("ARTIFACT_CAPTURE_DOM", "1") == "1"
+# 보관 정책을 적용하는 최소 간격(초)
+RETENTION_INTERVAL_SECONDS = 60
+
+# 한 캡처의 파일 확장자 (메타데이터, 스크린샷, DOM)
+SUFFIXES = (".json", ".jpg", ".png", ".html.gz")
+
+# 크롤러 스레드별 현재 (실행 ID, 계정, 이번 계정 실행에서 남긴 캡처 이름)
+_scope = threading.local()
+
+
+def _safe(part):
+    """경로에 쓸 수 없는 문자를 _ 로 바꿉니다."""
+    return re.sub(r"[^\w.-]", "_", str(part))[:80] or "_"
+
+
+def _base_name(filename):
+    return next((filename[:-len(suffix)] for suffix in SUFFIXES if filename.endswith(suffix)), None)
+
+
+class ArtifactStore:
+    """오류 화면의 스크린샷과 DOM 을 빠르게 잡아 두고, 압축/저장은 백그라운드 스레드에서 합니다.
+
+    캡처는 실행 ID 와 계정별 디렉터리에 저장되며, 크기/기간 상한을 넘은 오래된 캡처는 지웁니다.
+    """
+
+    def __init__(self, root=None, max_mb=None, max_age_days=None, queue_size=None):
+        self.root = root or ARTIFACT_DIR
+        self.max_bytes = (ARTIFACT_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+        self.max_age = (ARTIFACT_MAX_AGE_DAYS if max_age_days is None else max_age_days) * 86400
+        self.queue = queue.Queue(maxsize=queue_size or ARTIFACT_QUEUE_SIZE)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.written = 0
+        self.dropped = 0
+        self.pruned = 0
+        self._last_prune = 0
+
+    # --- 실행 범위 ---
+    def begin(self, run_id, account):
+        """현재 스레드의 캡처를 실행 ID/계정에 연결하고, 캡처 이름이 쌓일 목록을 반환합니다."""
+        names = []
+        _scope.current = {"run_id": run_id, "account": account, "names": names}
+        return names
+
+    def end(self):
+        _scope.current = None
+
+    # --- 캡처 ---
+    def _grab_screenshot(self, driver):
+        """(base64 데이터, 확장자). CDP JPEG 캡처가 안 되면 PNG 로 대신합니다."""
+        try:
+            shot = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                "format": "jpeg", "quality": ARTIFACT_JPEG_QUALITY, "optimizeForSpeed": True
+            })
+            return shot["data"], ".jpg"
+        except Exception:
+            return driver.get_screenshot_as_base64(), ".png"
+
+    def capture(self, driver, kind, page=None, error=None):
+        """스크린샷과 DOM 을 잡아 저장 큐에 넣고 캡처 이름을 반환합니다. 실패해도 예외를 내지 않습니다.
+
+        브라우저에서 데이터를 가져오는 것까지만 호출한 스레드에서 하고, 디코딩/압축/쓰기는 백그라운드에서 합니다.
+        """
+        started = time.time()
+        scope = getattr(_scope, "current", None) or {}
+        run_id = scope.get("run_id") or f"adhoc-{datetime.now().strftime('%Y%m%d')}"
+        account = scope.get("account") or "unknown"
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+        name = f"{_safe(run_id)}/{_safe(account)}/{stamp}_{_safe(kind)}" + (f"_{page}" if page is not None else "")
+        item = {
+            "name": name,
+            "meta": {
+                "run_id": run_id, "account": account, "kind": kind, "page": page,
+                "error": str(error)[:500] if error else None,
+                "captured_at": datetime.now().isoformat(timespec="seconds"), "url": None
+            },
+            "screenshot": None, "extension": None, "dom": None
+        }
+        try:
+            item["meta"]["url"] = driver.current_url
+        except Exception:
+            pass
+        try:
+            item["screenshot"], item["extension"] = self._grab_screenshot(driver)
+        except Exception as e:
+            print(f"[{account}] 스크린샷 캡처 실패({kind}): {e}")
+        if ARTIFACT_CAPTURE_DOM:
+            try:
+                item["dom"] = driver.page_source
+            except Exception as e:
+                print(f"[{account}] DOM 캡처 실패({kind}): {e}")
+        if item["screenshot"] is None and item["dom"] is None:
+            return None
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            inc("crawler_artifacts_dropped_total", account=account)
+            print(f"[{account}] 저장 대기 중인 캡처가 많아 {kind} 캡처를 버립니다.")
+            return None
+        observe("artifact_capture", account, time.time() - started, kind=kind)
+        if "names" in scope:
+            scope["names"].append(name)
+        return name
+
+    # --- 백그라운드 저장 ---
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._work, name="artifact-writer", daemon=True)
+                self.thread.start()
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            try:
+                self._write(item)
+                if time.time() - self._last_prune >= RETENTION_INTERVAL_SECONDS:
+                    self.prune()
+            except Exception as e:
+                print(f"캡처 저장 실패({item['name']}): {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, item):
+        base = os.path.join(self.root, item["name"])
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        files = []
+        if item["screenshot"] is not None:
+            with open(base + item["extension"], "wb") as f:
+                f.write(base64.b64decode(item["screenshot"]))
+            files.append(item["name"] + item["extension"])
+        if item["dom"] is not None:
+            with open(base + ".html.gz", "wb") as f:
+                f.write(gzip.compress(item["dom"].encode("utf-8"), compresslevel=6))
+            files.append(item["name"] + ".html.gz")
+        meta = dict(item["meta"], name=item["name"], files=files)
+        # 메타데이터를 마지막에 써서, 목록에 보이는 캡처는 파일이 모두 있도록 합니다.
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        with self.lock:
+            self.written += 1
+
+    def flush(self):
+        """대기 중인 캡처를 모두 저장할 때까지 기다립니다."""
+        self.queue.join()
+
+    # --- 보관 정책 ---
+    def _groups(self):
+        """캡처 이름 -> (가장 늦은 수정 시각, 전체 크기, 파일 경로 목록)"""
+        groups = {}
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                base = _base_name(filename)
+                if base is None:
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = os.path.join(directory, base)
+                mtime, size, paths = groups.get(key, (0, 0, []))
+                groups[key] = (max(mtime, stat.st_mtime), size + stat.st_size, paths + [path])
+        return groups
+
+    def prune(self, now=None):
+        """기간을 넘은 캡처를 지우고, 전체 크기가 상한 아래가 될 때까지 오래된 것부터 지웁니다. 지운 수를 반환합니다."""
+        now = now or time.time()
+        self._last_prune = now
+        groups = sorted(self._groups().values())
+        total = sum(size for _, size, _ in groups)
+        removed = 0
+        for mtime, size, paths in groups:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        if removed:
+            for directory, _, _ in sorted(os.walk(self.root), key=lambda entry: -len(entry[0])):
+                if directory != self.root and not os.listdir(directory):
+                    os.rmdir(directory)
+            with self.lock:
+                self.pruned += removed
+            print(f"오래되었거나 용량을 넘은 캡처 {removed}개를 지웠습니다.")
+        return removed
+
+    # --- 조회 ---
+    def list(self, run_id=None, account=None, limit=None):
+        """저장된 캡처의 메타데이터 목록 (최신순)"""
+        root = self.root
+        if run_id:
+            root = os.path.join(root, _safe(run_id))
+            if account:
+                root = os.path.join(root, _safe(account))
+        items = []
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if account and meta.get("account") != account:
+                    continue
+                items.append(meta)
+        items.sort(key=lambda meta: meta["name"].rsplit("/", 1)[-1], reverse=True)
+        return items[:limit] if limit else items
+
+    def path_for(self, relative):
+        """저장 디렉터리 안의 파일 경로. 디렉터리 밖을 가리키거나 없으면 None."""
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, relative))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def stats(self):
+        with self.lock:
+            return {
+                "queued": self.queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "pruned": self.pruned
+            }
+
+
+# 크롤러 오류 경로와 웹 엔드포인트가 함께 쓰는 캡처 저장소
+artifact_store = ArtifactStore()
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import threading
+import time
+
+# --- 최신 잔액 캐시 ---
+# 실행이 끝날 때마다 계정별 최신 수집일의 가맹점 잔액을 이력 저장소에서 한 번 읽어 새 스냅샷을 만들고,
+# 완성된 스냅샷으로 참조를 한 번에 바꿉니다. /balances 요청은 저장소나 엑셀 파일을 읽지 않고
+# 이 스냅샷만 보며, 스냅샷 내용의 해시를 ETag 로 돌려줘 바뀌지 않았으면 304 로 응답할 수 있습니다.
+
+
+def _etag(*parts):
+    return hashlib.sha1("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:16]
+
+
+class AccountBalances:
+    """계정 하나의 최신 수집일 잔액 (만든 뒤에는 바꾸지 않음)"""
+
+    __slots__ = ("account", "date", "merchants", "total_balance", "etag")
+
+    def __init__(self, account, date, merchants):
+        self.account = account
+        self.date = date
+        self.merchants = merchants
+        self.total_balance = round(sum(m["balance"] for m in merchants), 2)
+        self.etag = _etag(account, date, json.dumps(merchants, ensure_ascii=False, sort_keys=True))
+
+    @classmethod
+    def from_store(cls, store, account):
+        date, rows = store.latest(account)
+        merchants = [
+            {
+                "merchant": merchant,
+                "balance": balance,
+                "page": page,
+                "new": first_seen == date,
+                "first_seen": first_seen,
+                "delta": delta,
+                "burn_7": burn_7,
+                "days_left": days_left
+            }
+            for merchant, balance, page, first_seen, delta, burn_7, days_left in rows
+        ]
+        return cls(account, date, merchants)
+
+    def to_dict(self, merchants=None):
+        merchants = self.merchants if merchants is None else merchants
+        return {
+            "account": self.account,
+            "date": self.date,
+            "count": len(merchants),
+            "total_balance": round(sum(m["balance"] for m in merchants), 2),
+            "merchants": merchants
+        }
+
+
+class BalanceSnapshot:
+    """모든 계정의 최신 잔액과 만든 시각"""
+
+    __slots__ = ("accounts", "created", "etag")
+
+    def __init__(self, accounts):
+        self.accounts = {balances.account: balances for balances in accounts}
+        self.created = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.etag = _etag(*(f"{name}:{balances.etag}" for name, balances in sorted(self.accounts.items())))
+
+
+def filter_merchants(merchants, min_balance=None, max_balance=None, new=None):
+    """잔액 범위(이상/이하)와 신규 가맹점 여부로 거릅니다. None 인 조건은 적용하지 않습니다."""
+    return [
+        m for m in merchants
+        if (min_balance is None or m["balance"] >= min_balance)
+        and (max_balance is None or m["balance"] <= max_balance)
+        and (new is None or m["new"] == new)
+    ]
+
+
+def response_etag(base_etag, filters):
+    """스냅샷 ETag 와 필터 조건을 합친 응답 ETag"""
+    active = sorted((name, value) for name, value in filters.items() if value is not None)
+    return _etag(base_etag, active) if active else base_etag
+
+
+class BalanceCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+
+    def refresh(self, account_names, store=None):
+        """저장소에서 새 스냅샷을 만든 뒤 한 번에 바꿉니다. 만드는 동안의 요청은 이전 스냅샷을 봅니다."""
+        if store is None:
+            from history_store import history_store as store
+        snapshot = BalanceSnapshot([AccountBalances.from_store(store, name) for name in account_names])
+        with self.lock:
+            self.snapshot = snapshot
+        return snapshot
+
+    def get(self, account_names):
+        """현재 스냅샷. 아직 없으면(재시작 직후) 저장소에서 한 번 만듭니다."""
+        snapshot = self.snapshot
+        if snapshot is None:
+            snapshot = self.refresh(account_names)
+        return snapshot
+
+
+# 웹 엔드포인트와 크롤러 작업이 함께 쓰는 캐시
+balance_cache = BalanceCache()
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from mock_site import MockSite
+
+# --- 크롤러 벤치마크 ---
+# 가짜 FuiouPay 사이트(mock_site.py)를 띄우고 슬랙 전송을 막은 채 실제 크롤러를 실행해
+# 단계별/전체 소요 시간과 초당 페이지/행 수를 측정하고, 저장된 기준값과 비교합니다.
+#
+#   python bench.py                               # 기본 규모로 측정
+#   python bench.py --merchants 10,1000 --accounts 1,5
+#   python bench.py --save-baseline               # 결과를 기준값으로 저장
+#   python bench.py --quick                       # 작은 규모만 빠르게
+
+DEFAULT_MERCHANTS = "10,100,1000,5000"
+DEFAULT_ACCOUNTS = "1,5,20"
+QUICK_MERCHANTS = "10,100"
+QUICK_ACCOUNTS = "1,2"
+BASELINE_FILE = "bench_baseline.json"
+# 결과 표에 보여줄 단계 (metrics.span 이름)
+PHASES = [
+    "driver_start", "session_restore", "login", "contracts_navigation",
+    "http_fetch", "page_extraction", "history_write", "file_export"
+]
+
+
+def _int_list(text):
+    return [int(v) for v in text.split(",") if v]
+
+
+def run_point(site, merchants, account_count, workdir, stub_messages):
+    """가맹점 수 x 계정 수 한 구간을 실행하고 측정값을 반환합니다."""
+    import cpcCrawl
+    import metrics
+    from crawler_pool import CrawlerPool
+    from history_store import HistoryStore
+
+    site.configure(merchants=merchants)
+    label = f"m{merchants}-a{account_count}"
+    # 구간마다 빈 이력 저장소로 시작합니다 (이전 구간의 가맹점이 비교에 섞이지 않도록).
+    cpcCrawl.history_store = HistoryStore(os.path.join(workdir, f"history_{label}.db"))
+    accounts = [
+        {
+            "name": f"bench-{label}-{i}",
+            "username": f"BENCH{merchants:05d}{account_count:02d}{i:04d}",
+            "password": "bench",
+            "slack_channel": f"#bench-{i}",
+            "excel_file": os.path.join(workdir, f"{label}-{i}.xlsx"),
+            "csv_file": os.path.join(workdir, f"{label}-{i}.csv")
+        }
+        for i in range(account_count)
+    ]
+    metrics.reset()
+    del stub_messages[:]
+    start = time.time()
+    results = CrawlerPool().run(accounts, "bench-token")
+    wall = time.time() - start
+
+    failed = [name for name, res in results.items() if res.get("status") != "success"]
+    pages = sum(res.get("pages") or 0 for res in results.values())
+    rows = sum(res.get("merchants") or 0 for res in results.values())
+    phases = {
+        phase: round(seconds, 3)
+        for phase, (count, seconds) in metrics.phase_totals().items()
+        if phase in PHASES
+    }
+    return {
+        "label": label,
+        "merchants": merchants,
+        "accounts": account_count,
+        "wall_seconds": round(wall, 3),
+        "pages": pages,
+        "rows": rows,
+        "pages_per_second": round(pages / wall, 2) if wall else None,
+        "rows_per_second": round(rows / wall, 2) if wall else None,
+        "phase_seconds": phases,
+        "failed_accounts": failed,
+        "slack_messages": len(stub_messages)
+    }
+
+
+def compare(results, baseline, tolerance):
+    """기준값보다 tolerance 이상 느려진 구간 목록"""
+    regressions = []
+    previous = {point["label"]: point for point in baseline.get("points", [])}
+    for point in results:
+        base = previous.get(point["label"])
+        if not base or not base.get("rows_per_second"):
+            continue
+        if point["failed_accounts"]:
+            regressions.append(f"{point['label']}: 실패한 계정 {', '.join(point['failed_accounts'])}")
+            continue
+        ratio = point["rows_per_second"] / base["rows_per_second"]
+        if ratio < 1 - tolerance:
+            regressions.append(
+                f"{point['label']}: 초당 행 수 {point['rows_per_second']} (기준 {base['rows_per_second']}, {ratio:.0%})"
+            )
+    return regressions
+
+
+def print_table(results):
+    print(f"\n{'구간':<14}{'시간(초)':>10}{'페이지':>8}{'행':>8}{'페이지/초':>11}{'행/초':>10}  단계별(초)")
+    for point in results:
+        phases = ", ".join(f"{name}={seconds}" for name, seconds in sorted(point["phase_seconds"].items()))
+        failed = f"  ❌ 실패: {', '.join(point['failed_accounts'])}" if point["failed_accounts"] else ""
+        print(
+            f"{point['label']:<14}{point['wall_seconds']:>10}{point['pages']:>8}{point['rows']:>8}"
+            f"{point['pages_per_second']:>11}{point['rows_per_second']:>10}  {phases}{failed}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="가짜 사이트로 크롤러 성능을 측정합니다.")
+    parser.add_argument("--merchants", default=DEFAULT_MERCHANTS, help="계정당 가맹점 수 목록 (쉼표 구분)")
+    parser.add_argument("--accounts", default=DEFAULT_ACCOUNTS, help="계정 수 목록 (쉼표 구분)")
+    parser.add_argument("--quick", action="store_true", help=f"작은 규모만 측정 ({QUICK_MERCHANTS} x {QUICK_ACCOUNTS})")
+    parser.add_argument("--per-page", type=int, default=20, help="가짜 사이트의 한 페이지 행 수")
+    parser.add_argument("--response-delay", type=float, default=0.0, help="가짜 사이트 응답 지연(초)")
+    parser.add_argument("--render-delay", type=float, default=0.0, help="테이블 렌더링 지연(초)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="계약 페이지 실패 확률")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="비교할 기준값 파일")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용하는 처리량 감소 비율 (기본 0.2)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    merchants_list = _int_list(QUICK_MERCHANTS if args.quick else args.merchants)
+    accounts_list = _int_list(QUICK_ACCOUNTS if args.quick else args.accounts)
+
+    site = MockSite(
+        per_page=args.per_page,
+        response_delay=args.response_delay,
+        render_delay=args.render_delay,
+        fail_rate=args.fail_rate
+    )
+    base_url = site.start()
+    workdir = tempfile.mkdtemp(prefix="cpc-bench-")
+    # 크롤러 모듈은 import 시점에 설정을 읽으므로 먼저 환경 변수를 맞춥니다.
+    os.environ["FUIOUPAY_BASE_URL"] = base_url
+    os.environ["SESSION_CACHE_DIR"] = os.path.join(workdir, "session_cache")
+    os.environ["LOGIN_STATS_FILE"] = os.path.join(workdir, "login_stats.json")
+    os.environ["HISTORY_DB"] = os.path.join(workdir, "history.db")
+
+    import cpcCrawl
+    # 슬랙 전송 대신 메시지를 모아 둡니다.
+    stub_messages = []
+    cpcCrawl.send_slack_notification = lambda message, token, channel, account=None: stub_messages.append((channel, message))
+
+    print(f"가짜 사이트 {base_url}, 작업 디렉터리 {workdir}")
+    results = []
+    try:
+        for merchants in merchants_list:
+            for account_count in accounts_list:
+                print(f"\n==== 구간: 가맹점 {merchants}개 x 계정 {account_count}개 ====")
+                results.append(run_point(site, merchants, account_count, workdir, stub_messages))
+    finally:
+        from crawler_pool import close_idle_sessions
+        close_idle_sessions()
+        site.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+    report = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "points": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n기준값을 {args.baseline}에 저장했습니다.")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\n기준값 파일({args.baseline})이 없어 비교하지 않습니다. --save-baseline 으로 저장하세요.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ 성능 저하:")
+        for line in regressions:
+            print(f" - {line}")
+        return 1
+    print(f"\n✅ 기준값({baseline.get('created')}) 대비 성능 저하 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
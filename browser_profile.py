@@ -0,0 +1,152 @@
+import json
+import os
+import signal
+import threading
+
+# --- 설정 ---
+# 크롤링에 필요 없는 요청 (이미지, 글꼴, 미디어, 스타일시트, 분석/광고 스크립트). 쉼표로 구분, 빈 값이면 막지 않음.
+DEFAULT_BLOCKED_URL_PATTERNS = ",".join([
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*.css",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+    "*hotjar.com*", "*clarity.ms*", "*hm.baidu.com*", "*cnzz.com*"
+])
+BLOCKED_URL_PATTERNS = [
+    p.strip() for p in os.getenv("BLOCKED_URL_PATTERNS", DEFAULT_BLOCKED_URL_PATTERNS).split(",") if p.strip()
+]
+# eager: DOMContentLoaded 까지만 기다림 (normal 이면 모든 하위 리소스까지)
+PAGE_LOAD_STRATEGY = os.getenv("PAGE_LOAD_STRATEGY", "eager")
+# 브라우저 메모리 감시 주기(초). 0 이면 계정 처리가 끝날 때만 확인합니다.
+RSS_WATCHDOG_SECONDS = float(os.getenv("RSS_WATCHDOG_SECONDS", "5"))
+# 브라우저가 주고받은 바이트를 성능 로그로 집계할지
+NETWORK_ACCOUNTING = os.getenv("NETWORK_ACCOUNTING", "1") == "1"
+
+# page_ready 대기에서 준비된 것으로 보는 document.readyState
+READY_STATES = ("interactive", "complete") if PAGE_LOAD_STRATEGY == "eager" else ("complete",)
+
+
+def apply_profile(chrome_options):
+    """페이지 로드 전략과 네트워크 집계용 성능 로그를 Chrome 옵션에 설정합니다."""
+    chrome_options.page_load_strategy = PAGE_LOAD_STRATEGY
+    if NETWORK_ACCOUNTING:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    return chrome_options
+
+
+def install_request_blocking(driver):
+    """CDP 로 필요 없는 URL 패턴의 요청을 막습니다 (브라우저를 재사용해도 유지됨)."""
+    if not BLOCKED_URL_PATTERNS:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+
+class NetworkUsage:
+    """계정 실행 하나의 전송량 (브라우저 + HTTP 빠른 경로)과 막은 요청 수"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.browser_bytes = 0
+            self.http_bytes = 0
+            self.requests = 0
+            self.blocked_requests = 0
+
+    def add_http(self, size):
+        with self.lock:
+            self.http_bytes += size
+            self.requests += 1
+
+    def add_performance_log(self, entries):
+        """driver.get_log("performance") 항목에서 완료된 요청의 실제 전송 바이트와 막힌 요청을 셉니다."""
+        browser_bytes = requests = blocked = 0
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method")
+            if method == "Network.loadingFinished":
+                browser_bytes += int(message.get("params", {}).get("encodedDataLength") or 0)
+                requests += 1
+            elif method == "Network.loadingFailed" and message.get("params", {}).get("blockedReason"):
+                blocked += 1
+        with self.lock:
+            self.browser_bytes += browser_bytes
+            self.requests += requests
+            self.blocked_requests += blocked
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "bytes_transferred": self.browser_bytes + self.http_bytes,
+                "browser_bytes": self.browser_bytes,
+                "http_bytes": self.http_bytes,
+                "requests": self.requests,
+                "blocked_requests": self.blocked_requests
+            }
+
+
+def count_http_bytes(http_session, usage):
+    """requests 세션의 응답마다 실제로 받은 바이트(압축 상태)를 usage 에 더합니다."""
+    def hook(response, *args, **kwargs):
+        body = response.content
+        wire = response.raw.tell() if hasattr(response.raw, "tell") else 0
+        usage.add_http(wire or len(body))
+    http_session.hooks["response"].append(hook)
+
+
+def kill_process_tree(pids):
+    """프로세스들을 바로 종료합니다 (응답 없는 브라우저도 정리되도록 SIGKILL)."""
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+class RssWatchdog:
+    """계정을 처리하는 동안 브라우저 프로세스 트리의 RSS 를 주기적으로 재고 최대값을 기록합니다.
+
+    한도를 넘으면 브라우저를 강제로 종료합니다. 진행 중이던 작업은 오류로 끝나고,
+    계정 재시도(ACCOUNT_RETRIES)가 새 브라우저로 체크포인트부터 이어서 수집합니다.
+    """
+
+    def __init__(self, session, interval=None):
+        self.session = session
+        self.interval = RSS_WATCHDOG_SECONDS if interval is None else interval
+        self.lock = threading.Lock()
+        self.stop_event = None
+
+    def start(self):
+        if self.interval <= 0:
+            return
+        with self.lock:
+            if self.stop_event is not None:
+                return
+            # 시작할 때마다 새 이벤트를 써서, 막 멈춘 이전 스레드와 섞이지 않게 합니다.
+            self.stop_event = stop_event = threading.Event()
+        threading.Thread(
+            target=self._run, args=(stop_event,), name=f"rss-watchdog-{self.session.debug_port}", daemon=True
+        ).start()
+
+    def stop(self):
+        with self.lock:
+            stop_event, self.stop_event = self.stop_event, None
+        if stop_event is not None:
+            stop_event.set()
+
+    def _run(self, stop_event):
+        while not stop_event.wait(self.interval):
+            if self.session.driver is None:
+                continue
+            rss = self.session.sample_rss()
+            if rss > self.session.max_rss_mb:
+                print(f"Chrome 메모리 {rss:.0f}MB > {self.session.max_rss_mb}MB, 실행 중인 브라우저를 종료합니다.")
+                self.session.kill(reason="memory")
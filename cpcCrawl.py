@@ -1,18 +1,30 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import time
-import pandas as pd
 import os
 from datetime import datetime
-import schedule
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
 import sys
+from driver_pool import DriverSession
+from analytics import BALANCE_ALERT_DAYS, update_stats
+from artifacts import artifact_store
+from extraction import extract_rows_bulk, extract_rows_per_element, rows_to_merchants
+from http_fetch import HTTP_FAST_PATH, FastPathUnavailable, crawl_contracts_http
+from history_store import history_store
+from login_strategies import run_login_strategies
+from pagination import (
+    PAGE_RETRIES, PAGINATION_MAX_PAGES, PageFingerprints, go_to_page, has_next_page, page_url,
+    read_pagination, retry_delay
+)
+from metrics import observe, span
+from page_archive import RECORD_PAGES, PageRecorder
+from report import build_summary
+from slack_queue import slack_queue
+from session_cache import restore_session, save_session
+from waits import (
+    active_page, table_text, wait_for_login_form, wait_for_login_redirect, wait_for_page_change,
+    wait_for_page_ready, wait_for_table
+)
 
 # --- 설정 ---
 # 슬랙 설정
@@ -24,380 +36,395 @@ SLACK_CHANNEL = "#kjg_cpcbalance"
 EXCEL_FILE = "merchant_cpc_data.xlsx"
 CSV_FILE = "merchant_cpc_data.csv"
 
+# FuiouPay 주소
+BASE_URL = os.getenv("FUIOUPAY_BASE_URL", "https://web.fuioupay.co.kr")
+LOGIN_URL = f"{BASE_URL}/login?returnUrl=/index"
+CONTRACTS_URL = f"{BASE_URL}/agent/dianping/contracts"
+
+# 매 실행마다 이력 전체를 계정별 CSV/XLSX 파일로 다시 쓸지 (0 이면 쓰지 않고 /export 로 필요할 때 내려받음)
+EXPORT_ON_RUN = os.getenv("EXPORT_ON_RUN", "1") != "0"
+
+# 수집 중 오류가 나면 계정 단위로 다시 시도할 횟수 (끝낸 페이지는 체크포인트에서 이어받음)
+ACCOUNT_RETRIES = int(os.getenv("ACCOUNT_RETRIES", "1"))
+
 # FuiouPay 인증 정보 - 새로운 계정으로 변경
 USERNAME = "E20250124156285"
 PASSWORD = "1234"
 
 # --- 슬랙 메시지 전송 함수 (계정별) ---
-def send_slack_notification(message, slack_token, slack_channel):
-    """주어진 메시지를 슬랙 채널로 전송합니다."""
-    client = WebClient(token=slack_token)
+class CrawlCancelled(Exception):
+    """워커 풀이 시간 초과 등으로 이 계정 실행을 취소했을 때"""
+
+
+def check_cancelled(cancel):
+    """취소 이벤트가 설정됐으면 CrawlCancelled 를 발생시킵니다."""
+    if cancel is not None and cancel.is_set():
+        raise CrawlCancelled("워커 풀이 계정 실행을 취소했습니다.")
+
+
+def send_slack_notification(message, slack_token, slack_channel, account=None):
+    """주어진 메시지를 슬랙 전송 큐에 넣습니다. 전송은 백그라운드에서 이루어집니다."""
+    slack_queue.enqueue(message, slack_token, slack_channel, account=account)
+
+# --- 로그인 함수 ---
+def login(driver, username, password, account=None):
+    """로그인 페이지에서 여러 방식으로 로그인을 시도하고, 실패하면 예외를 발생시킵니다."""
+    print(f"[{username}] 로그인 페이지로 이동 중...")
+    driver.get(LOGIN_URL)
+    
+    # 페이지 완전 로딩 + 로그인 폼 렌더링 대기
+    wait_for_page_ready(driver)
+    wait_for_login_form(driver)
+    
+    print(f"[{username}] 페이지 로딩 완료, 로그인 시도...")
+    
+    # 과거에 빠르고 잘 성공한 방식부터 시도합니다.
+    # 방식마다 로그인 페이지를 벗어나는 것까지 확인한 뒤에만 성공으로 기록합니다.
+    login_success = run_login_strategies(driver, username, password, account=account, verify=verify_login) is not None
+            
+    if not login_success:
+        # 디버깅용 스크린샷/DOM 저장 (백그라운드)
+        artifact_store.capture(driver, "login_failed")
+        raise Exception("모든 로그인 방식이 실패했습니다. 아이디와 비밀번호를 확인해주세요.")
+    
+    print(f"[{username}] 로그인 성공 확인됨")
+
+
+def verify_login(driver):
+    """로그인 성공 확인 (URL 이 로그인 페이지를 벗어날 때까지 대기). 실패하면 예외를 발생시킵니다."""
+    wait_for_login_redirect(driver)
+    wait_for_page_ready(driver)
+    if "login" in driver.current_url:
+        raise Exception("로그인 페이지를 벗어나지 못했습니다.")
+
+# --- 계약 페이지 열기 (계정별) ---
+def open_contracts(driver, username, password, account_key):
+    """저장된 세션을 복원하거나 로그인한 뒤 계약 페이지 1페이지를 엽니다."""
+    # 1. 로그인 (저장된 세션이 유효하면 로그인 과정을 건너뜁니다)
+    with span("session_restore", account_key):
+        restored = restore_session(driver, username, LOGIN_URL, CONTRACTS_URL)
+    if restored:
+        print(f"[{username}] 저장된 세션으로 계약 페이지 접속")
+    else:
+        with span("login", account_key):
+            login(driver, username, password, account=account_key)
+        save_session(username, driver.get_cookies())
+
+        # 2. 계약 페이지로 이동
+        with span("contracts_navigation", account_key):
+            print(f"[{username}] 계약 페이지로 이동 중...")
+            driver.get(CONTRACTS_URL)
+
+            # 페이지 완전 로딩 + 테이블 렌더링 대기
+            wait_for_page_ready(driver)
+            wait_for_table(driver)
+
+    if "contracts" not in driver.current_url:
+        artifact_store.capture(driver, "contracts_failed")
+        raise Exception(f"계약 페이지로 이동하지 못했습니다. 현재 URL: {driver.current_url}")
+    print(f"[{username}] 계약 페이지 접속 완료, 데이터 추출 시작...")
+
+# --- 페이지 수집 ---
+def extract_current_page(driver, wait):
+    """현재 화면의 계약 테이블을 찾아 (테이블, 데이터 행) 을 반환합니다."""
+    # 테이블 찾기 (여러 방법 시도)
     try:
-        client.chat_postMessage(channel=slack_channel, text=message)
-        print(f"슬랙 메시지 전송 성공: {slack_channel}")
-    except SlackApiError as e:
-        print(f"슬랙 메시지 전송 실패({slack_channel}): {e.response['error']}")
+        table = wait.until(EC.presence_of_element_located((By.TAG_NAME, "table")))
+    except:
+        # 대안: 클래스명으로 찾기
+        table = driver.find_element(By.CSS_SELECTOR, "table.table, table.data-table, .table")
 
-# --- 메인 크롤링 함수 (계정별) ---
-def run_crawler(username, password, slack_token, slack_channel, excel_file, csv_file):
-    """웹사이트를 크롤링하여 CPC 데이터를 추출하고, 결과를 요약하여 슬랙으로 전송합니다."""
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    current_datetime = datetime.now().strftime("%Y%m%d_%H%M%S")
+    try:
+        # 한 번의 스크립트 호출로 페이지 전체 셀을 가져옵니다.
+        rows = extract_rows_bulk(driver, table)
+    except Exception as bulk_error:
+        print(f"  일괄 추출 실패, 셀 단위로 추출합니다: {bulk_error}")
+        rows = extract_rows_per_element(table)
+    return table, rows
+
+def reload_page(driver, page, info):
+    """실패한 페이지를 다시 엽니다. 이동은 됐고 추출만 실패했다면 그대로 둡니다."""
+    if page == 1 or info.url_navigation:
+        driver.get(CONTRACTS_URL if page == 1 else page_url(CONTRACTS_URL, page, info.page_links))
+        wait_for_page_ready(driver)
+        wait_for_table(driver)
+        return
+    if active_page(driver) == str(page):
+        return
+    old_text = table_text(driver)
+    go_to_page(driver, page, info, CONTRACTS_URL)
+    wait_for_page_change(driver, None, old_text, page)
 
-    # Chrome 옵션 설정 (Headless 모드 포함)
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("--disable-web-security")
-    chrome_options.add_argument("--allow-running-insecure-content")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-plugins")
-    chrome_options.add_argument("--disable-images")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--remote-debugging-port=9222")
-    chrome_options.add_argument("--window-size=1920,1080")
-    # chrome_options.add_argument("--disable-javascript")  # 로그인에 필요하므로 주석 처리
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option("useAutomationExtension", False)
-    chrome_options.add_experimental_option("prefs", {
-        "profile.default_content_setting_values.notifications": 2,
-        "profile.default_content_settings.popups": 0,
-        "profile.managed_default_content_settings.images": 2,
-        "profile.default_content_setting_values.media_stream": 2
-    })
-    # ChromeDriver 경로 설정 (Railway 환경 고려)
+def collect_pages(driver, username, account_key, current_date, result, cancel=None):
+    """계약 페이지 전체의 가맹점 데이터를 수집해 (가맹점 목록, 누락 페이지 목록) 을 반환합니다.
+
+    HTTP 빠른 경로를 먼저 쓰고, 안 되면 브라우저로 한 페이지씩 수집합니다. 브라우저 경로는
+    페이지마다 PAGE_RETRIES 번까지 다시 시도하고, 끝난 페이지를 체크포인트에 저장해
+    계정 단위 재시도 때 마지막으로 끝난 페이지 다음부터 이어서 수집합니다.
+    RECORD_PAGES 이면 받은 페이지의 테이블 HTML 을 보관합니다 (page_archive.py replay 로 재처리).
+    """
+    # 3. 전체 페이지 수 확인 (전체 건수, 마지막 링크, 보이는 링크 순)
+    wait = WebDriverWait(driver, 10)
     try:
-        # 먼저 webdriver-manager로 최신 버전 다운로드 시도
-        service = Service(executable_path=ChromeDriverManager().install())
-        print(f"[{username}] webdriver-manager로 ChromeDriver 설치됨")
+        wait.until(EC.presence_of_element_located((By.CLASS_NAME, "pagination")))
     except Exception as e:
-        print(f"[{username}] webdriver-manager 실패: {e}")
+        print(f"[{username}] 페이지네이션 찾기 실패, 1페이지로 가정: {e}")
+    info = read_pagination(driver)
+    print(f"[{username}] 페이지 구성: {info.describe()}")
+    result["pages"] = info.total_pages
+    # 4. 모든 페이지 데이터 추출
+    if HTTP_FAST_PATH:
+        # 빠른 경로: 로그인 쿠키로 계약 페이지를 HTTP 로 직접 병렬 수집
         try:
-            # fallback: 시스템에 설치된 ChromeDriver 사용
-            service = Service(executable_path="/usr/local/bin/chromedriver")
-            print(f"[{username}] 시스템 ChromeDriver 사용")
-        except Exception as e2:
-            print(f"[{username}] 시스템 ChromeDriver도 실패: {e2}")
-            raise Exception("ChromeDriver를 찾을 수 없습니다.")
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            with span("http_fetch", account_key, pages=info.total_pages):
+                recorder = PageRecorder(account_key, current_date, "http") if RECORD_PAGES else None
+                all_merchant_data, fetched_pages = crawl_contracts_http(
+                    driver, CONTRACTS_URL, info, current_date, username=username, recorder=recorder
+                )
+            result["pages"] = fetched_pages
+            print(f"[{username}] HTTP 경로로 {fetched_pages}페이지 수집 완료")
+            if recorder is not None:
+                recorder.save(fetched_pages)
+            return all_merchant_data, []
+        except FastPathUnavailable as e:
+            print(f"[{username}] HTTP 경로 사용 불가, 브라우저로 수집합니다: {e}")
+    # 이전 시도에서 끝낸 페이지
+    done = history_store.load_checkpoint(account_key, current_date, info.page_size)
+    if done:
+        print(f"[{username}] 체크포인트에서 {len(done)}개 페이지를 이어받습니다: {sorted(done)}")
+    all_merchant_data = []
+    missing_pages = []
+    table = None
+    fingerprints = PageFingerprints()
+    recorder = PageRecorder(account_key, current_date, "browser") if RECORD_PAGES else None
+    current_page = 0
+    while True:
+        check_cancelled(cancel)
+        current_page += 1
+        if current_page > info.total_pages and (info.exact or not has_next_page(driver)):
+            break
+        if current_page > PAGINATION_MAX_PAGES:
+            print(f"[{username}] 최대 {PAGINATION_MAX_PAGES}페이지에서 중단합니다.")
+            break
+        if current_page in done and current_page <= info.total_pages and (current_page == 1 or info.url_navigation):
+            # 주소로 바로 이동할 수 있으면 이미 끝낸 페이지는 다시 열지 않습니다.
+            all_merchant_data.extend(done[current_page])
+            print(f"  [{username}] {current_page}페이지는 체크포인트 사용 ({len(done[current_page])}개 가맹점)")
+            continue
+        print(f"\n==== [{username}] {current_page}번 페이지 데이터 추출 중 ====")
+        page_start = time.time()
+        page_merchants = None
+        for attempt in range(PAGE_RETRIES + 1):
+            try:
+                if attempt:
+                    delay = retry_delay(attempt - 1)
+                    print(f"  {current_page}페이지 다시 시도 ({attempt}/{PAGE_RETRIES}), {delay}초 대기")
+                    time.sleep(delay)
+                    reload_page(driver, current_page, info)
+                elif current_page > 1:
+                    old_text = table_text(driver)
+                    # 주소 이동, 정확히 일치하는 번호 링크, "다음" 링크 순으로 이동합니다.
+                    go_to_page(driver, current_page, info, CONTRACTS_URL)
+                    # 테이블이 다시 그려지고 활성 페이지가 바뀔 때까지만 대기
+                    wait_for_page_change(driver, table, old_text, current_page)
+                table, rows = extract_current_page(driver, wait)
+                # 이동이 실제로 되었는지 내용 지문으로 확인합니다.
+                fingerprints.check(current_page, rows)
+                page_merchants = rows_to_merchants(rows, current_page, current_date)
+                break
+            except Exception as e:
+                table = None
+                print(f"페이지 {current_page} 수집 실패: {e}")
+        if page_merchants is None:
+            missing_pages.append(current_page)
+            observe("page_extraction", account_key, time.time() - page_start, "error", page=current_page)
+            # 스크린샷/DOM 저장 (백그라운드)
+            artifact_store.capture(driver, "error_page", page=current_page)
+            continue
+        history_store.save_checkpoint(account_key, current_date, current_page, info.page_size, page_merchants)
+        if recorder is not None:
+            try:
+                recorder.add(current_page, driver.execute_script("return arguments[0].outerHTML;", table))
+            except Exception as e:
+                print(f"  {current_page}페이지 HTML 가져오기 실패: {e}")
+        all_merchant_data.extend(page_merchants)
+        for merchant_data in page_merchants:
+            print(f"  - {merchant_data['가맹점명']}: {merchant_data['CPC잔액']:,.2f} RMB")
+
+        print(f"  페이지 {current_page}에서 {len(page_merchants)}개 가맹점 추출")
+        result["pages"] = max(result["pages"], current_page)
+        observe("page_extraction", account_key, time.time() - page_start, page=current_page, rows=len(page_merchants))
+    if missing_pages:
+        print(f"[{username}] ⚠️ {len(missing_pages)}개 페이지를 수집하지 못했습니다: {missing_pages}")
+    if recorder is not None:
+        recorder.save(result["pages"])
+    return all_merchant_data, missing_pages
+
+# --- 메인 크롤링 함수 (계정별) ---
+def run_crawler(username, password, slack_token, slack_channel, excel_file, csv_file,
+                debug_port=9222, user_data_dir=None, account=None, session=None, run_id=None, cancel=None):
+    """웹사이트를 크롤링하여 CPC 데이터를 추출하고, 결과를 요약하여 슬랙으로 전송합니다.
+
+    병렬 실행 시 워커마다 다른 debug_port / user_data_dir 를 넘겨 브라우저를 격리합니다.
+    session(DriverSession)을 넘기면 이미 떠 있는 브라우저를 초기화해 재사용합니다.
+    수집 중 오류가 나면 ACCOUNT_RETRIES 번까지 브라우저를 초기화하고 체크포인트부터 다시 수집합니다.
+    오류 화면 캡처는 run_id 의 계정 디렉터리에 저장되며, 결과의 artifacts 에 캡처 이름이 담깁니다.
+    실행 결과(상태, 페이지 수, 가맹점 수, 누락 페이지, 오류, 전송 바이트, 최대 메모리)를 dict 로 반환합니다.
+    일부 페이지를 끝내 수집하지 못하면 상태는 "partial" 입니다.
+    cancel(threading.Event)이 설정되면 재시도/페이지/저장/슬랙 전송 전에 멈추고 상태는 "cancelled" 입니다.
+    """
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    current_datetime = datetime.now().strftime("%Y%m%d_%H%M%S")
+    result = {
+        "account": account or username,
+        "status": "running",
+        "pages": 0,
+        "merchants": 0,
+        "new_merchants": 0,
+        "missing_pages": [],
+        "error": None
+    }
+
+    account_key = result["account"]
+    # 이 스레드에서 남기는 오류 화면 캡처를 이번 실행/계정에 연결합니다.
+    result["artifacts"] = artifact_store.begin(run_id, account_key)
+
+    # 워커가 넘겨준 따뜻한 세션을 재사용하고, 없으면 이번 실행 전용 세션을 만듭니다.
+    own_session = session is None
+    if own_session:
+        session = DriverSession(debug_port=debug_port, user_data_dir=user_data_dir)
+    if cancel is not None and cancel.is_set():
+        artifact_store.end()
+        result["status"] = "cancelled"
+        return result
+    with span("driver_start", account_key):
+        driver = session.acquire()
+    session.begin_usage()
 
     try:
-        # 1. 로그인
-        print(f"[{username}] 로그인 페이지로 이동 중...")
-        driver.get("https://web.fuioupay.co.kr/login?returnUrl=/index")
-        
-        # 페이지 완전 로딩 대기
-        WebDriverWait(driver, 20).until(
-            lambda driver: driver.execute_script("return document.readyState") == "complete"
-        )
-        time.sleep(5)  # 추가 안정화 시간
-        
-        print(f"[{username}] 페이지 로딩 완료, 로그인 시도...")
-        
-        # 더 안전한 로그인 방식
-        login_success = False
-        
-        # 방법 1: ID 기반 로그인
-        try:
-            print(f"[{username}] 방법 1: ID 기반 로그인 시도...")
-            username_field = WebDriverWait(driver, 15).until(
-                EC.element_to_be_clickable((By.ID, "username"))
-            )
-            password_field = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "password"))
-            )
-            login_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "btn-login"))
-            )
-            
-            # 스크롤하여 요소가 보이도록 함
-            driver.execute_script("arguments[0].scrollIntoView(true);", username_field)
-            time.sleep(1)
-            
-            username_field.clear()
-            time.sleep(0.5)
-            username_field.send_keys(username)
-            time.sleep(0.5)
-            
-            password_field.clear()
-            time.sleep(0.5)
-            password_field.send_keys(password)
-            time.sleep(0.5)
-            
-            # JavaScript로 클릭 시도
-            driver.execute_script("arguments[0].click();", login_button)
-            login_success = True
-            print(f"[{username}] 방법 1 성공")
-            
-        except Exception as e:
-            print(f"[{username}] 방법 1 실패: {e}")
-            
-        # 방법 2: name 속성 기반 로그인
-        if not login_success:
+        for attempt in range(ACCOUNT_RETRIES + 1):
             try:
-                print(f"[{username}] 방법 2: name 속성 기반 로그인 시도...")
-                username_field = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[name='username']"))
-                )
-                password_field = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[name='password']"))
+                # 시간 초과로 브라우저가 닫힌 경우 새 브라우저를 띄우지 않고 멈춥니다.
+                check_cancelled(cancel)
+                if attempt:
+                    # 브라우저를 초기화(실패하면 재시작)하고, 저장된 세션으로 다시 접속합니다.
+                    with span("driver_start", account_key):
+                        driver = session.acquire()
+                open_contracts(driver, username, password, account_key)
+                all_merchant_data, missing_pages = collect_pages(
+                    driver, username, account_key, current_date, result, cancel
                 )
-                login_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']"))
-                )
-                
-                # 스크롤하여 요소가 보이도록 함
-                driver.execute_script("arguments[0].scrollIntoView(true);", username_field)
-                time.sleep(1)
-                
-                username_field.clear()
-                time.sleep(0.5)
-                username_field.send_keys(username)
-                time.sleep(0.5)
-                
-                password_field.clear()
-                time.sleep(0.5)
-                password_field.send_keys(password)
-                time.sleep(0.5)
-                
-                # JavaScript로 클릭 시도
-                driver.execute_script("arguments[0].click();", login_button)
-                login_success = True
-                print(f"[{username}] 방법 2 성공")
-                
-            except Exception as e2:
-                print(f"[{username}] 방법 2 실패: {e2}")
-                
-        # 방법 3: JavaScript 직접 실행 (더 안전한 방식)
-        if not login_success:
-            try:
-                print(f"[{username}] 방법 3: JavaScript 직접 실행 시도...")
-                
-                # 요소 존재 여부 먼저 확인
-                username_exists = driver.execute_script("""
-                    var usernameInput = document.querySelector("input[name='username']") || document.querySelector("#username");
-                    return usernameInput !== null;
-                """)
-                
-                password_exists = driver.execute_script("""
-                    var passwordInput = document.querySelector("input[name='password']") || document.querySelector("#password");
-                    return passwordInput !== null;
-                """)
-                
-                button_exists = driver.execute_script("""
-                    var loginBtn = document.querySelector("button[type='submit']") || document.querySelector("#btn-login");
-                    return loginBtn !== null;
-                """)
-                
-                if username_exists and password_exists and button_exists:
-                    # 안전한 JavaScript 실행
-                    driver.execute_script(f"""
-                        var usernameInput = document.querySelector("input[name='username']") || document.querySelector("#username");
-                        var passwordInput = document.querySelector("input[name='password']") || document.querySelector("#password");
-                        var loginBtn = document.querySelector("button[type='submit']") || document.querySelector("#btn-login");
-                        
-                        if (usernameInput && passwordInput && loginBtn) {{
-                            usernameInput.value = "{username}";
-                            passwordInput.value = "{password}";
-                            loginBtn.click();
-                        }}
-                    """)
-                    login_success = True
-                    print(f"[{username}] 방법 3 성공")
-                else:
-                    print(f"[{username}] 방법 3 실패: 필수 요소 없음 (username: {username_exists}, password: {password_exists}, button: {button_exists})")
-                    
-            except Exception as e3:
-                print(f"[{username}] 방법 3 실패: {e3}")
-                
-        if not login_success:
-            # 디버깅용 스크린샷 저장
-            driver.save_screenshot(f"login_debug_{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            raise Exception("모든 로그인 방식이 실패했습니다.")
-        
-        # 로그인 성공 확인
-        WebDriverWait(driver, 10).until(
-            lambda driver: "login" not in driver.current_url
-        )
-        time.sleep(3)
-        
-        if "login" in driver.current_url:
-            driver.save_screenshot(f"login_failed_{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            raise Exception("로그인에 실패했습니다. 아이디와 비밀번호를 확인해주세요.")
-        
-        print(f"[{username}] 로그인 성공 확인됨")
-        
-        # 2. 계약 페이지로 이동
-        print(f"[{username}] 계약 페이지로 이동 중...")
-        driver.get("https://web.fuioupay.co.kr/agent/dianping/contracts")
-        
-        # 페이지 완전 로딩 대기
-        WebDriverWait(driver, 20).until(
-            lambda driver: driver.execute_script("return document.readyState") == "complete"
-        )
-        time.sleep(5)  # 추가 안정화 시간
-        
-        if "contracts" not in driver.current_url:
-            driver.save_screenshot(f"contracts_failed_{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            raise Exception(f"계약 페이지로 이동하지 못했습니다. 현재 URL: {driver.current_url}")
-        print(f"[{username}] 계약 페이지 접속 완료, 데이터 추출 시작...")
-        # 3. 전체 페이지 수 확인
-        wait = WebDriverWait(driver, 10)
-        try:
-            pagination = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "pagination")))
-            page_links = pagination.find_elements(By.TAG_NAME, "a")
-            page_numbers = []
-            for link in page_links:
-                text = link.text.strip()
-                if text.isdigit():
-                    page_numbers.append(int(text))
-            total_pages = max(page_numbers) if page_numbers else 1
-            print(f"[{username}] 총 {total_pages}페이지 확인됨")
-        except Exception as e:
-            print(f"[{username}] 페이지네이션 찾기 실패, 1페이지로 가정: {e}")
-            total_pages = 1
-        # 4. 모든 페이지 데이터 추출
-        all_merchant_data = []
-        new_merchants = []
-        for current_page in range(1, total_pages + 1):
-            print(f"\n==== [{username}] {current_page}번 페이지 데이터 추출 중 ====")
-            if current_page > 1:
-                try:
-                    page_link = driver.find_element(By.XPATH, f"//a[contains(text(), '{current_page}')]")
-                    driver.execute_script("arguments[0].click();", page_link)
-                    time.sleep(3)
-                except Exception as e:
-                    print(f"페이지 {current_page}로 이동 실패: {e}")
-                    continue
-            try:
-                # 테이블 찾기 (여러 방법 시도)
-                table = None
-                try:
-                    table = wait.until(EC.presence_of_element_located((By.TAG_NAME, "table")))
-                except:
-                    # 대안: 클래스명으로 찾기
-                    table = driver.find_element(By.CSS_SELECTOR, "table.table, table.data-table, .table")
-                
-                rows = table.find_elements(By.TAG_NAME, "tr")
-                page_merchants = []
-                
-                for row in rows[1:]: # 헤더 제외
-                    try:
-                        cells = row.find_elements(By.TAG_NAME, "td")
-                        if len(cells) >= 6:
-                            merchant_name = cells[2].text.strip()
-                            cpc_balance = cells[5].text.replace(",", "").replace("RMB", "").strip()
-                            
-                            # 빈 값 체크
-                            if merchant_name and merchant_name != "":
-                                merchant_data = {
-                                    "가맹점명": merchant_name,
-                                    "CPC잔액": cpc_balance if cpc_balance else "0.00",
-                                    "페이지": current_page,
-                                    "추출날짜": current_date
-                                }
-                                all_merchant_data.append(merchant_data)
-                                page_merchants.append(merchant_name)
-                                print(f"  - {merchant_name}: {cpc_balance} RMB")
-                    except Exception as cell_error:
-                        print(f"  행 데이터 처리 실패: {cell_error}")
-                        continue
-                        
-                print(f"  페이지 {current_page}에서 {len(page_merchants)}개 가맹점 추출")
+                break
             except Exception as e:
-                print(f"페이지 {current_page} 데이터 추출 실패: {e}")
-                # 스크린샷 저장
-                driver.save_screenshot(f"error_page_{current_page}_{username}.png")
-                continue
+                if attempt == ACCOUNT_RETRIES or isinstance(e, CrawlCancelled):
+                    raise
+                check_cancelled(cancel)
+                delay = retry_delay(attempt + 1)
+                print(f"[{username}] 수집 중 오류, {delay}초 후 체크포인트부터 다시 시도합니다 ({attempt + 1}/{ACCOUNT_RETRIES}): {e}")
+                time.sleep(delay)
+        result["missing_pages"] = missing_pages
+        if missing_pages and not all_merchant_data:
+            raise Exception(f"모든 페이지 수집에 실패했습니다: {missing_pages}")
         print(f"\n[{username}] 총 {len(all_merchant_data)}개 가맹점 데이터 추출 완료")
         # 5. 기존 데이터와 비교하여 신규 가맹점 확인
-        existing_merchants = set()
-        if os.path.exists(excel_file):
-            try:
-                existing_df = pd.read_excel(excel_file)
-                existing_merchants = set(existing_df['가맹점명'].unique())
-                print(f"[{username}] 기존 데이터에서 {len(existing_merchants)}개 가맹점 확인")
-            except Exception as e:
-                print(f"[{username}] 기존 데이터 읽기 실패: {e}")
+        # 처음 한 번은 기존 엑셀/CSV 이력을 저장소로 가져옵니다.
+        history_store.import_legacy(account_key, excel_file, csv_file)
+        # 가맹점 인덱스(최초/최근 확인일)로 전체 이력을 읽지 않고 비교합니다.
+        known_merchants = {}
+        try:
+            known_merchants = history_store.known_merchants(account_key)
+            print(f"[{username}] 기존 데이터에서 {len(known_merchants)}개 가맹점 확인")
+        except Exception as e:
+            print(f"[{username}] 기존 데이터 읽기 실패: {e}")
         current_merchants = set([data['가맹점명'] for data in all_merchant_data])
-        new_merchants = current_merchants - existing_merchants
+        new_merchants = current_merchants - set(known_merchants)
+        # 직전 크롤링 날짜에는 있었지만 오늘 목록에 없는 가맹점
+        disappeared_merchants = {}
+        previous_dates = [last for _, last in known_merchants.values() if last < current_date]
+        # 일부 페이지가 빠졌으면 그 페이지의 가맹점이 사라진 것으로 보일 수 있어 비교하지 않습니다.
+        if current_merchants and previous_dates and not missing_pages:
+            previous_date = max(previous_dates)
+            disappeared_merchants = {
+                merchant: first_seen
+                for merchant, (first_seen, last_seen) in known_merchants.items()
+                if last_seen == previous_date and merchant not in current_merchants
+            }
+        result["merchants"] = len(current_merchants)
+        result["new_merchants"] = len(new_merchants)
+        result["disappeared_merchants"] = len(disappeared_merchants)
         if new_merchants:
             print(f"[{username}] 신규 가맹점 {len(new_merchants)}개 발견: {', '.join(new_merchants)}")
         else:
             print(f"[{username}] 신규 가맹점 없음")
+        if disappeared_merchants:
+            print(f"[{username}] 사라진 가맹점 {len(disappeared_merchants)}개: {', '.join(disappeared_merchants)}")
         # 6. 데이터 처리 및 저장
         if not all_merchant_data:
             summary_message = f"✅ ({current_date}) CPC 잔액 데이터 없음\n\n추출된 데이터가 없습니다."
             print(summary_message)
-            send_slack_notification(summary_message, slack_token, slack_channel)
-            return
-        current_df = pd.DataFrame(all_merchant_data)
-        df_to_save = current_df
-        if os.path.exists(excel_file):
-            try:
-                existing_df = pd.read_excel(excel_file)
-                combined_df = pd.concat([existing_df, current_df])
-                combined_df['중복키'] = combined_df['가맹점명'] + '_' + combined_df['추출날짜']
-                combined_df = combined_df.drop_duplicates(subset=['중복키'], keep='last').drop('중복키', axis=1)
-                df_to_save = combined_df.sort_values(by=['추출날짜', '가맹점명'], ascending=[False, True])
-            except Exception as e:
-                print(f"[{username}] 기존 엑셀 파일 처리 오류: {e}. 새 데이터로 덮어씁니다.")
-        # 파일 저장
-        df_to_save.to_csv(csv_file, index=False, encoding="utf-8-sig")
-        df_to_save.to_excel(excel_file, index=False, sheet_name="가맹점CPC잔액")
-        print(f"[{username}] 총 {len(df_to_save)}개의 데이터를 파일에 저장했습니다.")
+            check_cancelled(cancel)
+            send_slack_notification(summary_message, slack_token, slack_channel, account=account_key)
+            result["status"] = "success"
+            return result
+        check_cancelled(cancel)
+        with span("history_write", account_key, rows=len(all_merchant_data)):
+            # 저장소에 오늘 데이터만 upsert (같은 날 재실행 시 해당 행만 갱신, 가맹점 인덱스도 함께 갱신)
+            history_store.upsert(account_key, all_merchant_data)
+            # 가맹점별 잔액 변화/소진율 통계를 오늘 잔액만으로 갱신 (전체 이력을 다시 읽지 않음)
+            stats = update_stats(account_key, current_date, all_merchant_data, history_store)
+            # 오늘 수집이 완전했는지(누락 페이지) 기록하고, 완전하면 체크포인트를 지웁니다.
+            history_store.mark_crawl(account_key, current_date, result["pages"], missing_pages)
+            if not missing_pages:
+                history_store.clear_checkpoint(account_key)
+        if EXPORT_ON_RUN:
+            # 파일 저장 (저장소에서 묶음 단위로 내보낸 사본)
+            with span("file_export", account_key):
+                exported = history_store.export(account_key, csv_file, excel_file)
+            print(f"[{username}] 총 {exported}개의 데이터를 파일에 저장했습니다.")
         # 7. 슬랙 메시지 생성 및 전송
-        today_data = df_to_save[df_to_save['추출날짜'] == current_date]
-        with_balance = today_data[pd.to_numeric(today_data['CPC잔액']) > 0]
-        zero_balance = today_data[pd.to_numeric(today_data['CPC잔액']) == 0]
-        summary_message = (
-            f"✅ *({current_date}) CPC 잔액 현황*\n\n"
-            f"• 총 {len(today_data)}개 가맹점 데이터 추출\n"
-            f"• CPC 잔액 보유 가맹점: *{len(with_balance)}개*\n"
+        today_data = history_store.read_date(account_key, current_date)
+        summary_message = build_summary(
+            today_data, current_date, new_merchants, disappeared_merchants, missing_pages,
+            stats=stats, alert_days=BALANCE_ALERT_DAYS
         )
-        if new_merchants:
-            summary_message += f"• 신규 가맹점: *{len(new_merchants)}개*\n"
-        summary_message += "\n*CPC 잔액 보유 가맹점 목록:*\n"
-        if not with_balance.empty:
-            sorted_balance = with_balance.sort_values(by='CPC잔액', key=pd.to_numeric, ascending=False)
-            for _, row in sorted_balance.iterrows():
-                merchant_name = row['가맹점명']
-                balance = int(float(row['CPC잔액']))
-                new_mark = " 🆕" if merchant_name in new_merchants else ""
-                summary_message += f" - {merchant_name}: {balance:,} RMB{new_mark}\n"
-        else:
-            summary_message += " - 없음\n"
-        summary_message += "\n*CPC 잔액 소진완료 가맹점 목록:*\n"
-        if not zero_balance.empty:
-            for _, row in zero_balance.iterrows():
-                merchant_name = row['가맹점명']
-                new_mark = " 🆕" if merchant_name in new_merchants else ""
-                summary_message += f" - {merchant_name}{new_mark}\n"
-        else:
-            summary_message += " - 없음\n"
-        if new_merchants:
-            summary_message += f"\n*신규 가맹점 목록:*\n"
-            for merchant in sorted(new_merchants):
-                summary_message += f" - {merchant}\n"
-        send_slack_notification(summary_message, slack_token, slack_channel)
+        check_cancelled(cancel)
+        send_slack_notification(summary_message, slack_token, slack_channel, account=account_key)
+        result["status"] = "partial" if missing_pages else "success"
     except Exception as e:
+        if isinstance(e, CrawlCancelled) or (cancel is not None and cancel.is_set()):
+            # 풀이 이미 시간 초과로 보고했으므로 오류 알림/캡처 없이 끝냅니다.
+            result["status"] = "cancelled"
+            result["error"] = str(e)
+            print(f"[{username}] 실행이 취소되어 중단합니다: {e}")
+            return result
+        result["status"] = "error"
+        result["error"] = str(e)
         print(f"[{username}] 오류 발생: {e}")
         import traceback
         error_details = traceback.format_exc()
         print(f"[{username}] 상세 오류 정보:\n{error_details}")
         
         error_message = f"❌ *CPC 잔액 크롤링 중 오류 발생* ❌\n\n`{e}`\n\n상세 정보: `{error_details[:500]}...`"
-        send_slack_notification(error_message, slack_token, slack_channel)
-        driver.save_screenshot(f"error_screenshot_{username}.png")
-        print(f"에러 스크린샷을 'error_screenshot_{username}.png'에 저장했습니다.")
+        send_slack_notification(error_message, slack_token, slack_channel, account=account_key)
+        if session.driver is not None:
+            artifact = artifact_store.capture(session.driver, "error", error=e)
+            if artifact:
+                print(f"[{username}] 에러 화면을 '{artifact}' 로 저장합니다.")
     finally:
-        print(f"[{username}] 크롤러를 종료합니다.")
-        driver.quit()
+        artifact_store.end()
+        # 이번 계정의 전송량(브라우저 + HTTP), 막은 요청 수, 최대 메모리
+        result.update(session.usage_report())
+        print(
+            f"[{username}] 전송 {result['bytes_transferred'] / 1024:.0f}KB, "
+            f"막은 요청 {result['blocked_requests']}개, 최대 메모리 {result['peak_rss_mb']:.0f}MB"
+            + (f", 메모리 초과 재시작 {result['memory_restarts']}회" if result["memory_restarts"] else "")
+        )
+        if own_session:
+            print(f"[{username}] 크롤러를 종료합니다.")
+            session.close()
+        else:
+            session.release()
+    return result
 
 # --- 메인 실행 블록 (로컬 테스트용) ---
 if __name__ == "__main__":
@@ -418,3 +445,5 @@ if __name__ == "__main__":
     # 로컬 테스트용: 즉시 실행
     print(">> 로컬 테스트를 위해 크롤링을 즉시 실행합니다...")
     run_crawler(USERNAME, PASSWORD, SLACK_BOT_TOKEN, SLACK_CHANNEL, EXCEL_FILE, CSV_FILE)
+    # 종료 전에 대기 중인 슬랙 메시지를 모두 보냅니다.
+    slack_queue.flush(timeout=120)
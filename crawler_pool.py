@@ -0,0 +1,228 @@
+import os
+import queue
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# --- 설정 ---
+# 동시에 실행할 브라우저(워커) 수. 1이면 기존처럼 계정을 하나씩 처리합니다.
+CRAWLER_WORKERS = int(os.getenv("CRAWLER_WORKERS", "2"))
+# 계정 하나에 허용하는 최대 실행 시간(초)
+ACCOUNT_TIMEOUT = int(os.getenv("CRAWLER_ACCOUNT_TIMEOUT", "900"))
+# 워커별 원격 디버깅 포트는 이 값부터 1씩 증가합니다.
+BASE_DEBUG_PORT = int(os.getenv("CRAWLER_BASE_DEBUG_PORT", "9222"))
+# 실행이 끝난 뒤에도 브라우저를 띄워 둘지 (기본: 실행 사이에는 종료해 메모리 반환)
+DRIVER_KEEP_WARM = os.getenv("DRIVER_KEEP_WARM", "0") == "1"
+# 워커별 Chrome 프로필 디렉터리의 상위 경로
+PROFILE_ROOT = os.getenv("CRAWLER_PROFILE_ROOT", os.path.join(tempfile.gettempdir(), "cpc-crawler-profiles"))
+
+# 워커 슬롯(포트 + 프로필)은 프로세스 전체에서 공유합니다.
+# 시간 초과로 취소된 작업이 아직 슬롯을 쓰고 있으면, 다음 작업은 그 작업이 슬롯을 돌려줄 때까지 기다립니다.
+_slots = queue.Queue()
+_slots_lock = threading.Lock()
+_slots_created = 0
+
+
+class WorkerSlot:
+    """워커 하나가 독점하는 브라우저 격리 정보 (디버깅 포트, 프로필, 재사용 세션)"""
+
+    def __init__(self, index):
+        from driver_pool import DriverSession
+        self.index = index
+        self.debug_port = BASE_DEBUG_PORT + index
+        self.user_data_dir = os.path.join(PROFILE_ROOT, f"worker-{index}")
+        self.session = DriverSession(debug_port=self.debug_port, user_data_dir=self.user_data_dir)
+
+
+def close_idle_sessions():
+    """지금 쉬고 있는 워커의 브라우저를 모두 종료합니다."""
+    idle = []
+    while True:
+        try:
+            idle.append(_slots.get_nowait())
+        except queue.Empty:
+            break
+    for slot in idle:
+        slot.session.close()
+        _slots.put(slot)
+
+
+def _ensure_slots(count):
+    """필요한 수만큼 워커 슬롯을 만들어 둡니다."""
+    global _slots_created
+    with _slots_lock:
+        while _slots_created < count:
+            _slots.put(WorkerSlot(_slots_created))
+            _slots_created += 1
+
+
+class CrawlerPool:
+    """계정들을 제한된 수의 브라우저 워커로 동시에 크롤링합니다.
+
+    계정마다 상태/소요 시간/결과를 기록하며, 한 계정이 느리거나 실패해도
+    다른 계정의 진행을 막거나 취소하지 않습니다.
+    """
+
+    def __init__(self, workers=None, timeout=None, on_status=None, claim=None, release=None, run_id=None):
+        self.workers = max(1, workers or CRAWLER_WORKERS)
+        self.timeout = timeout or ACCOUNT_TIMEOUT
+        # 계정 상태가 바뀔 때마다 (계정명, 상태 dict 복사본) 으로 호출됩니다 (실행 기록 갱신용).
+        self.on_status = on_status
+        # 샤딩 모드: 워커가 비었을 때 claim(계정명) 이 False 면 다른 프로세스가 맡은 것으로 보고 건너뛰고,
+        # 실행을 마치면 release(계정명, 상태) 로 알립니다.
+        self.claim = claim
+        self.release = release
+        # 오류 화면 캡처를 묶을 실행 ID
+        self.run_id = run_id
+        self.lock = threading.Lock()
+        self.account_status = {}
+        self.running_slots = {}
+        # 계정 -> 취소 이벤트. 시간 초과 시 설정하면 run_crawler 가 재시도/다음 페이지/저장/슬랙 전송 전에 멈춥니다.
+        self.cancel_events = {}
+        _ensure_slots(self.workers)
+
+    def _set_status(self, name, **fields):
+        with self.lock:
+            self.account_status.setdefault(name, {}).update(fields)
+        self._notify(name)
+
+    def _notify(self, name):
+        if self.on_status is None:
+            return
+        with self.lock:
+            status = dict(self.account_status.get(name, {}))
+        try:
+            self.on_status(name, status)
+        except Exception as e:
+            print(f"[{name}] 상태 콜백 오류: {e}")
+
+    def snapshot(self):
+        """계정별 상태의 복사본을 반환합니다."""
+        with self.lock:
+            return {name: dict(status) for name, status in self.account_status.items()}
+
+    def _run_account(self, acc, slack_token):
+        name = acc["name"]
+        slot = _slots.get()
+        claimed = False
+        result = None
+        try:
+            with self.lock:
+                # 대기 중 시간 초과 처리된 계정은 실행하지 않습니다.
+                if self.account_status[name]["status"] != "queued":
+                    return None
+            # 워커가 빈 다음에 임대를 요청하므로, 여러 프로세스가 남는 워커만큼 계정을 나눠 가집니다.
+            if self.claim is not None:
+                if not self.claim(name):
+                    print(f"[{name}] 다른 프로세스가 맡았거나 이미 끝낸 계정이라 건너뜁니다.")
+                    self._set_status(name, status="skipped", end_time=time.time())
+                    return None
+                claimed = True
+            with self.lock:
+                self.running_slots[name] = slot
+            self._set_status(name, status="running", worker=slot.index, start_time=time.time())
+            print(f"\n==== [{name}] 계정 크롤링 시작 (워커 {slot.index}, 포트 {slot.debug_port}) ====")
+            from cpcCrawl import run_crawler
+            result = run_crawler(
+                acc["username"],
+                acc["password"],
+                slack_token,
+                acc["slack_channel"],
+                acc["excel_file"],
+                acc["csv_file"],
+                debug_port=slot.debug_port,
+                user_data_dir=slot.user_data_dir,
+                account=name,
+                session=slot.session,
+                run_id=self.run_id,
+                cancel=self.cancel_events[name]
+            )
+            return result
+        finally:
+            with self.lock:
+                self.running_slots.pop(name, None)
+            _slots.put(slot)
+            if claimed and self.release is not None:
+                try:
+                    self.release(name, (result or {}).get("status") or "error")
+                except Exception as e:
+                    print(f"[{name}] 임대 반환 오류: {e}")
+
+    def _finish(self, name, future):
+        """완료된 작업의 결과를 계정 상태에 반영합니다."""
+        end_time = time.time()
+        with self.lock:
+            status = self.account_status[name]
+            if status["status"] == "timeout":
+                print(f"[{name}] 시간 초과 이후 작업이 종료되었습니다. 결과는 무시합니다.")
+                return
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[{name}] 크롤링 작업 예외: {e}\n{traceback.format_exc()}")
+                result = {"status": "error", "error": str(e)}
+            if result is None:
+                return
+            status.update(result)
+            status["account"] = name
+            status["end_time"] = end_time
+            status["duration"] = round(end_time - status.get("start_time", end_time), 2)
+        self._notify(name)
+
+    def run(self, accounts, slack_token):
+        """모든 계정을 실행하고 계정명 -> 결과 dict 를 반환합니다."""
+        from driver_pool import resolve_chromedriver_path
+        # ChromeDriver 경로는 워커들이 시작하기 전에 한 번만 확인합니다.
+        resolve_chromedriver_path()
+        with self.lock:
+            for acc in accounts:
+                self.account_status[acc["name"]] = {"account": acc["name"], "status": "queued"}
+                self.cancel_events[acc["name"]] = threading.Event()
+        for acc in accounts:
+            self._notify(acc["name"])
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crawler")
+        pending = {}
+        for acc in accounts:
+            future = executor.submit(self._run_account, acc, slack_token)
+            future.add_done_callback(lambda f, name=acc["name"]: self._finish(name, f))
+            pending[acc["name"]] = future
+        # 대기 중인 계정이 워커를 기다리다 끝나지 않도록 전체 상한도 둡니다.
+        waves = -(-len(accounts) // self.workers)
+        overall_deadline = time.time() + self.timeout * (waves + 1)
+        try:
+            while pending:
+                now = time.time()
+                for name, future in list(pending.items()):
+                    if future.done():
+                        pending.pop(name)
+                        continue
+                    with self.lock:
+                        status = self.account_status[name]
+                        started = status.get("start_time")
+                        timed_out = (started and now - started > self.timeout) or now > overall_deadline
+                        if timed_out:
+                            status["status"] = "timeout"
+                            status["error"] = f"{self.timeout}초 안에 완료되지 않았습니다."
+                            status["end_time"] = now
+                            if started:
+                                status["duration"] = round(now - started, 2)
+                        slot = self.running_slots.get(name)
+                    if timed_out:
+                        print(f"[{name}] 계정 크롤링 시간 초과, 다른 계정은 계속 진행합니다.")
+                        self._notify(name)
+                        # 먼저 취소를 알려, 브라우저가 닫혀도 재시도로 새 브라우저를 띄우지 않게 합니다.
+                        self.cancel_events[name].set()
+                        if slot is not None:
+                            # 브라우저를 종료해 멈춘 작업이 오류로 빠져나오게 합니다.
+                            slot.session.close()
+                        pending.pop(name)
+                if pending:
+                    time.sleep(1)
+        finally:
+            # 시간 초과된 작업을 기다리지 않고 돌아갑니다. 해당 작업은 백그라운드에서 정리됩니다.
+            executor.shutdown(wait=False)
+            if not DRIVER_KEEP_WARM:
+                close_idle_sessions()
+        return self.snapshot()
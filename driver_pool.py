@@ -0,0 +1,269 @@
+import os
+import shutil
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from browser_profile import (
+    NETWORK_ACCOUNTING, NetworkUsage, RssWatchdog, apply_profile, install_request_blocking, kill_process_tree
+)
+
+# --- 설정 ---
+# 브라우저 하나를 몇 개 계정까지 재사용할지 (이후 새 브라우저로 교체)
+DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", "10"))
+# Chrome 프로세스 전체 RSS 가 이 값(MB)을 넘으면 브라우저를 교체합니다 (계정 처리 중에는 감시 스레드가 강제 종료).
+DRIVER_MAX_RSS_MB = int(os.getenv("DRIVER_MAX_RSS_MB", "1024"))
+# 시스템에 설치된 ChromeDriver 경로 (Dockerfile 참고)
+SYSTEM_CHROMEDRIVER = "/usr/local/bin/chromedriver"
+# 재사용 시 저장소를 비울 사이트 origin
+SITE_ORIGIN = os.getenv("FUIOUPAY_BASE_URL", "https://web.fuioupay.co.kr")
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def resolve_chromedriver_path():
+    """ChromeDriver 경로를 프로세스당 한 번만 확인하고 캐시합니다."""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path:
+            return _chromedriver_path
+        try:
+            # 먼저 webdriver-manager로 최신 버전 다운로드 시도
+            _chromedriver_path = ChromeDriverManager().install()
+            print("webdriver-manager로 ChromeDriver 설치됨")
+        except Exception as e:
+            print(f"webdriver-manager 실패: {e}")
+            if not os.path.exists(SYSTEM_CHROMEDRIVER):
+                raise Exception("ChromeDriver를 찾을 수 없습니다.")
+            # fallback: 시스템에 설치된 ChromeDriver 사용
+            _chromedriver_path = SYSTEM_CHROMEDRIVER
+            print("시스템 ChromeDriver 사용")
+        return _chromedriver_path
+
+
+def build_chrome_options(debug_port=9222, user_data_dir=None):
+    """크롤러용 Chrome 옵션을 생성합니다 (Headless 모드 포함)."""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--start-maximized")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("--disable-web-security")
+    chrome_options.add_argument("--allow-running-insecure-content")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-plugins")
+    chrome_options.add_argument("--disable-images")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument(f"--remote-debugging-port={debug_port}")
+    if user_data_dir:
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+    chrome_options.add_argument("--window-size=1920,1080")
+    # chrome_options.add_argument("--disable-javascript")  # 로그인에 필요하므로 주석 처리
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    chrome_options.add_experimental_option("prefs", {
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_settings.popups": 0,
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.media_stream": 2
+    })
+    return apply_profile(chrome_options)
+
+
+def create_driver(debug_port=9222, user_data_dir=None):
+    """캐시된 ChromeDriver 경로로 새 Chrome 드라이버를 시작합니다."""
+    service = Service(executable_path=resolve_chromedriver_path())
+    driver = webdriver.Chrome(service=service, options=build_chrome_options(debug_port, user_data_dir))
+    # 모든 새 문서에서 navigator.webdriver 를 숨깁니다 (재사용 시에도 유지됨)
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+    })
+    # 이미지/글꼴/스타일시트/분석 스크립트 요청은 네트워크에 나가기 전에 막습니다.
+    install_request_blocking(driver)
+    return driver
+
+
+def _children(pid):
+    """/proc 을 훑어 pid 의 모든 하위 프로세스 pid 를 찾습니다."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm 에 공백이 있을 수 있으므로 마지막 ')' 이후를 파싱
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def process_tree_rss_mb(pid):
+    """pid 와 모든 하위 프로세스의 RSS 합계(MB)를 반환합니다. /proc 이 없으면 0."""
+    if not pid or not os.path.isdir("/proc"):
+        return 0.0
+    total_kb = 0
+    for p in [pid] + _children(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+class DriverSession:
+    """워커 하나가 계정 간에 재사용하는 따뜻한 Chrome 세션.
+
+    계정이 바뀔 때마다 쿠키와 사이트 저장소를 비우고, 사용 횟수나 메모리가
+    한도를 넘으면 브라우저를 새로 띄웁니다. 계정을 처리하는 동안에는 감시 스레드가
+    메모리를 재고, 한도를 넘으면 바로 브라우저를 죽여 계정 재시도가 새 브라우저로 이어가게 합니다.
+    """
+
+    def __init__(self, debug_port=9222, user_data_dir=None, max_uses=None, max_rss_mb=None):
+        self.debug_port = debug_port
+        self.user_data_dir = user_data_dir
+        self.max_uses = max_uses or DRIVER_MAX_USES
+        self.max_rss_mb = max_rss_mb or DRIVER_MAX_RSS_MB
+        self.driver = None
+        self.uses = 0
+        # 계정 실행 하나의 전송량/최대 메모리/메모리 초과로 재시작한 횟수 (begin_usage 로 초기화)
+        self.usage = NetworkUsage()
+        self.peak_rss_mb = 0.0
+        self.memory_restarts = 0
+        self.watchdog = RssWatchdog(self)
+
+    def _start(self):
+        if self.user_data_dir:
+            # 새 브라우저는 항상 빈 프로필로 시작합니다.
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            os.makedirs(self.user_data_dir, exist_ok=True)
+        self.driver = create_driver(self.debug_port, self.user_data_dir)
+        # HTTP 빠른 경로(session_from_driver)가 같은 집계에 응답 바이트를 더합니다.
+        self.driver.network_usage = self.usage
+        self.uses = 0
+        print(f"Chrome 시작 (포트 {self.debug_port})")
+
+    def reset(self):
+        """이전 계정의 쿠키, 캐시, 사이트 저장소를 모두 지웁니다."""
+        driver = self.driver
+        driver.get("about:blank")
+        driver.delete_all_cookies()
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": SITE_ORIGIN, "storageTypes": "all"})
+
+    def rss_mb(self):
+        """현재 브라우저(ChromeDriver 포함) 프로세스 트리의 RSS(MB)"""
+        try:
+            return process_tree_rss_mb(self.driver.service.process.pid)
+        except Exception:
+            return 0.0
+
+    def sample_rss(self):
+        """현재 RSS 를 재고 이번 계정 실행의 최대값을 갱신합니다."""
+        rss = self.rss_mb()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        return rss
+
+    def _drain_performance_log(self):
+        """쌓인 성능 로그를 가져와 전송량에 더합니다 (가져오면 브라우저 쪽 버퍼는 비워짐)."""
+        if not NETWORK_ACCOUNTING or self.driver is None:
+            return
+        try:
+            self.usage.add_performance_log(self.driver.get_log("performance"))
+        except Exception as e:
+            print(f"성능 로그 읽기 실패: {e}")
+
+    def begin_usage(self):
+        """새 계정 실행의 전송량/메모리 집계를 시작합니다 (이전 계정의 로그는 버림)."""
+        self._drain_performance_log()
+        self.usage.reset()
+        self.memory_restarts = 0
+        self.peak_rss_mb = 0.0
+        self.sample_rss()
+
+    def usage_report(self):
+        """begin_usage 이후의 전송 바이트, 막은 요청 수, 최대 RSS, 메모리 초과 재시작 횟수
+
+        메모리 초과로 죽인 브라우저에서 아직 읽지 않은 로그는 집계되지 않습니다.
+        """
+        self._drain_performance_log()
+        self.sample_rss()
+        report = self.usage.to_dict()
+        report["peak_rss_mb"] = round(self.peak_rss_mb, 1)
+        report["memory_restarts"] = self.memory_restarts
+        return report
+
+    def acquire(self):
+        """계정 하나를 처리할 깨끗한 드라이버를 반환합니다."""
+        if self.driver is not None:
+            try:
+                self.reset()
+            except Exception as e:
+                print(f"Chrome 세션 초기화 실패, 재시작합니다: {e}")
+                self.close()
+        if self.driver is None:
+            self._start()
+        self.uses += 1
+        self.watchdog.start()
+        return self.driver
+
+    def release(self):
+        """계정 처리가 끝난 뒤 호출합니다. 한도를 넘었으면 브라우저를 종료합니다."""
+        self.watchdog.stop()
+        if self.driver is None:
+            return
+        if self.uses >= self.max_uses:
+            print(f"Chrome 사용 횟수 {self.uses}회 도달, 브라우저를 교체합니다.")
+            self.close()
+            return
+        rss = self.sample_rss()
+        if rss > self.max_rss_mb:
+            print(f"Chrome 메모리 {rss:.0f}MB > {self.max_rss_mb}MB, 브라우저를 교체합니다.")
+            self.close()
+
+    def kill(self, reason="memory"):
+        """응답을 기다리지 않고 ChromeDriver 와 모든 Chrome 프로세스를 바로 종료합니다.
+
+        감시 스레드가 부르며, 실행 중이던 드라이버 명령은 오류로 끝납니다.
+        """
+        driver, self.driver = self.driver, None
+        if driver is None:
+            return
+        if reason == "memory":
+            self.memory_restarts += 1
+        try:
+            pid = driver.service.process.pid
+            kill_process_tree([pid] + _children(pid))
+        except Exception as e:
+            print(f"Chrome 프로세스 종료 중 오류: {e}")
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """브라우저를 종료합니다. 다른 스레드에서 호출해 멈춘 작업을 끊을 때도 사용합니다."""
+        self.watchdog.stop()
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"Chrome 종료 중 오류: {e}")
@@ -0,0 +1,204 @@
+import re
+from html.parser import HTMLParser
+
+from selenium.webdriver.common.by import By
+
+# --- 계약 테이블 열 구성 ---
+# 가맹점명은 3번째 열, CPC 잔액은 6번째 열에 있습니다.
+MERCHANT_COLUMN = 2
+BALANCE_COLUMN = 5
+MIN_COLUMNS = 6
+
+
+def clean_balance(text):
+    """'1,234.00 RMB' 형태의 잔액 문자열에서 숫자 부분만 남깁니다."""
+    return text.replace(",", "").replace("RMB", "").strip()
+
+
+def parse_balance(text):
+    """잔액 문자열을 수집 시점에 한 번만 숫자(float)로 바꿉니다. 빈 값과 '-' 는 0 입니다."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    cleaned = clean_balance(str(text))
+    if cleaned in ("", "-"):
+        return 0.0
+    try:
+        return float(cleaned)
+    except ValueError:
+        print(f"  잔액 형식을 알 수 없어 0으로 처리합니다: {text!r}")
+        return 0.0
+
+
+def rows_to_merchants(rows, page, current_date):
+    """셀 텍스트 목록(헤더 제외)을 가맹점 데이터 dict 목록으로 변환합니다."""
+    merchants = []
+    for cells in rows:
+        if len(cells) < MIN_COLUMNS:
+            continue
+        merchant_name = cells[MERCHANT_COLUMN].strip()
+        # 빈 값 체크
+        if merchant_name:
+            merchants.append({
+                "가맹점명": merchant_name,
+                "CPC잔액": parse_balance(cells[BALANCE_COLUMN]),
+                "페이지": page,
+                "추출날짜": current_date
+            })
+    return merchants
+
+
+# 테이블의 모든 행/셀 텍스트를 한 번의 WebDriver 호출로 가져오는 스크립트
+BULK_TABLE_SCRIPT = """
+var rows = arguments[0].querySelectorAll('tr');
+var out = [];
+for (var i = 0; i < rows.length; i++) {
+    var cells = rows[i].querySelectorAll('td');
+    var texts = [];
+    for (var j = 0; j < cells.length; j++) {
+        texts.push(cells[j].innerText);
+    }
+    out.push(texts);
+}
+return out;
+"""
+
+
+class TableLayoutError(Exception):
+    """테이블 열 구성이 예상(가맹점명 3열, 잔액 6열)과 다를 때"""
+
+
+def validate_layout(rows):
+    """데이터 행의 열 구성이 예상과 맞는지 확인합니다.
+
+    최소 열 수를 갖춘 행이 하나 이상 있어야 하고, 그런 행들의 열 수는 모두 같아야 합니다.
+    (합계/안내 행처럼 열이 적은 행은 변환 단계에서 건너뜁니다.)
+    """
+    widths = {len(cells) for cells in rows if len(cells) >= MIN_COLUMNS}
+    if not widths:
+        raise TableLayoutError(f"{MIN_COLUMNS}열 이상인 데이터 행이 없습니다.")
+    if len(widths) > 1:
+        raise TableLayoutError(f"데이터 행의 열 수가 일정하지 않습니다: {sorted(widths)}")
+
+
+def extract_rows_bulk(driver, table):
+    """한 번의 execute_script 로 현재 테이블의 데이터 행(헤더 제외)을 가져옵니다."""
+    rows = driver.execute_script(BULK_TABLE_SCRIPT, table)
+    if not isinstance(rows, list):
+        raise TableLayoutError("스크립트가 테이블 데이터를 반환하지 않았습니다.")
+    # 브라우저의 .text 와 같이 공백을 하나로 정리합니다.
+    body = [[" ".join((text or "").split()) for text in cells] for cells in rows[1:]]
+    validate_layout(body)
+    return body
+
+
+def extract_rows_per_element(table):
+    """행/셀마다 WebDriver 를 호출하는 기존 방식 (일괄 추출 실패 시 사용)"""
+    body = []
+    for row in table.find_elements(By.TAG_NAME, "tr")[1:]:  # 헤더 제외
+        try:
+            # 일괄 추출/HTML 파서와 같은 공백 정규화 (셀 안 줄바꿈/연속 공백 -> 공백 하나)
+            body.append([" ".join((cell.text or "").split()) for cell in row.find_elements(By.TAG_NAME, "td")])
+        except Exception as cell_error:
+            print(f"  행 데이터 처리 실패: {cell_error}")
+    return body
+
+
+class _TableParser(HTMLParser):
+    """HTML 문서의 모든 <table> 을 행(tr) -> td 텍스트 목록으로 파싱합니다."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        # 테이블마다 [시작 태그 위치, 끝 태그 위치] ((줄, 열), 원본 HTML 을 잘라낼 때 사용)
+        self.positions = []
+        self._open = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            table = {"rows": [], "row": None, "cell": None, "position": [self.getpos(), None]}
+            self.tables.append(table["rows"])
+            self.positions.append(table["position"])
+            self._open.append(table)
+        elif not self._open:
+            return
+        elif tag == "tr":
+            table = self._open[-1]
+            table["row"] = []
+            table["rows"].append(table["row"])
+        elif tag == "td":
+            table = self._open[-1]
+            if table["row"] is None:
+                table["row"] = []
+                table["rows"].append(table["row"])
+            table["cell"] = []
+        elif tag == "br" and self._open[-1]["cell"] is not None:
+            self._open[-1]["cell"].append(" ")
+
+    def handle_endtag(self, tag):
+        if not self._open:
+            return
+        table = self._open[-1]
+        if tag == "table":
+            self._close_cell(table)
+            table["position"][1] = self.getpos()
+            self._open.pop()
+        elif tag == "td":
+            self._close_cell(table)
+        elif tag == "tr":
+            self._close_cell(table)
+            table["row"] = None
+
+    def handle_data(self, data):
+        if self._open and self._open[-1]["cell"] is not None:
+            self._open[-1]["cell"].append(data)
+
+    @staticmethod
+    def _close_cell(table):
+        if table["cell"] is not None:
+            # 브라우저의 .text 와 같이 공백을 하나로 정리합니다.
+            table["row"].append(" ".join("".join(table["cell"]).split()))
+            table["cell"] = None
+
+
+def parse_tables(html):
+    """HTML 에 있는 모든 테이블을 [테이블][행][셀 텍스트] 구조로 반환합니다."""
+    parser = _TableParser()
+    parser.feed(html)
+    parser.close()
+    return parser.tables
+
+
+def _contracts_index(tables):
+    for index, rows in enumerate(tables):
+        # 브라우저 경로와 동일하게 첫 행은 헤더로 간주합니다.
+        if any(len(cells) >= MIN_COLUMNS for cells in rows[1:]):
+            return index
+    return None
+
+
+def contracts_table_html(html):
+    """페이지 HTML 에서 계약 테이블(<table>...</table>) 부분만 잘라 반환합니다. 없으면 None.
+
+    토큰이나 시각이 들어간 나머지 부분을 버려, 내용이 같은 페이지는 같은 HTML 이 되게 합니다.
+    """
+    parser = _TableParser()
+    parser.feed(html)
+    parser.close()
+    index = _contracts_index(parser.tables)
+    if index is None:
+        return None
+    (start_line, start_col), end = parser.positions[index]
+    if end is None:
+        return None
+    # HTMLParser.getpos() 는 '\n' 만 줄바꿈으로 셉니다 (splitlines 는 '\r', '\u2028' 등도 나눠 위치가 어긋남).
+    line_starts = [0] + [match.end() for match in re.finditer("\n", html)]
+    start = line_starts[start_line - 1] + start_col
+    close = html.find(">", line_starts[end[0] - 1] + end[1])
+    return html[start:close + 1] if close >= 0 else None
+
+
+def find_contracts_rows(html):
+    """계약 테이블의 데이터 행(헤더 제외)을 반환합니다. 기대한 테이블이 없으면 None."""
+    tables = parse_tables(html)
+    index = _contracts_index(tables)
+    return None if index is None else tables[index][1:]
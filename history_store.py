@@ -0,0 +1,432 @@
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from extraction import parse_balance
+
+# --- 설정 ---
+# 가맹점 CPC 잔액 이력의 원본 저장소 (CSV/XLSX 는 여기서 내보낸 사본입니다)
+HISTORY_DB = os.getenv("HISTORY_DB", "merchant_cpc_history.db")
+
+# 내보내기 때 저장소에서 한 번에 읽는 행 수 (이력 길이와 관계없이 메모리 사용량이 이 크기로 고정)
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+
+# 기존 엑셀/CSV 파일과 같은 열 이름
+COLUMNS = ["가맹점명", "CPC잔액", "페이지", "추출날짜"]
+EXCEL_SHEET = "가맹점CPC잔액"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS merchant_cpc (
+    account TEXT NOT NULL,
+    merchant TEXT NOT NULL,
+    date TEXT NOT NULL,
+    balance REAL NOT NULL,
+    page INTEGER,
+    PRIMARY KEY (account, merchant, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_merchant_cpc_date ON merchant_cpc (account, date);
+CREATE TABLE IF NOT EXISTS known_merchants (
+    account TEXT NOT NULL,
+    merchant TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (account, merchant)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS crawl_pages (
+    account TEXT NOT NULL,
+    date TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    page_size INTEGER NOT NULL,
+    merchants TEXT NOT NULL,
+    PRIMARY KEY (account, date, page)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS crawl_status (
+    account TEXT NOT NULL,
+    date TEXT NOT NULL,
+    complete INTEGER NOT NULL,
+    pages INTEGER,
+    missing_pages TEXT,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+    PRIMARY KEY (account, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS merchant_stats (
+    account TEXT NOT NULL,
+    merchant TEXT NOT NULL,
+    last_date TEXT NOT NULL,
+    last_balance REAL NOT NULL,
+    last_ring BLOB NOT NULL,
+    last_days INTEGER NOT NULL,
+    base_date TEXT,
+    base_balance REAL,
+    base_ring BLOB,
+    base_days INTEGER NOT NULL DEFAULT 0,
+    delta REAL,
+    burn_7 REAL,
+    burn_30 REAL,
+    days_left REAL,
+    PRIMARY KEY (account, merchant)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS account_leases (
+    account TEXT PRIMARY KEY,
+    run_key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    acquired_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# 가맹점별 최초/최근 확인일을 갱신하는 upsert (순서와 관계없이 최소/최대를 유지)
+KNOWN_MERCHANT_UPSERT = """
+INSERT INTO known_merchants (account, merchant, first_seen, last_seen)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (account, merchant) DO UPDATE SET
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+
+def typed_frame(rows):
+    """(가맹점, 잔액, 페이지, 날짜) 행 목록을 고정된 dtype 의 DataFrame 으로 만듭니다."""
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df["가맹점명"] = df["가맹점명"].astype("category")
+    df["CPC잔액"] = df["CPC잔액"].astype("float64")
+    df["페이지"] = df["페이지"].astype("Int64")
+    return df
+
+
+class HistoryStore:
+    """(계정, 가맹점, 날짜) 를 키로 하는 SQLite 이력 저장소.
+
+    같은 날 다시 크롤링하면 해당 행만 덮어쓰며(upsert), 날짜/가맹점 조회는 인덱스를 사용합니다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or HISTORY_DB
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def connect(self):
+        """트랜잭션 단위로 쓰는 연결. 스레드마다 따로 연결하므로 워커에서 동시에 써도 됩니다."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_known_index(self, conn, account):
+        """가맹점 인덱스가 없던 시절의 이력으로 한 번만 인덱스를 채웁니다."""
+        key = f"known_index:{account}"
+        if self._get_meta(conn, key):
+            return
+        rows = conn.execute(
+            "SELECT merchant, MIN(date), MAX(date) FROM merchant_cpc WHERE account = ? GROUP BY merchant",
+            (account,)
+        ).fetchall()
+        conn.executemany(KNOWN_MERCHANT_UPSERT, [(account, m, first, last) for m, first, last in rows])
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, "1"))
+
+    def upsert(self, account, merchant_rows):
+        """크롤링 결과(가맹점명/CPC잔액/페이지/추출날짜 dict 목록)를 저장하고 가맹점 인덱스도 갱신합니다."""
+        with self.connect() as conn:
+            self._ensure_known_index(conn, account)
+            conn.executemany(KNOWN_MERCHANT_UPSERT, [
+                (account, row["가맹점명"], row["추출날짜"], row["추출날짜"]) for row in merchant_rows
+            ])
+            conn.executemany(
+                """
+                INSERT INTO merchant_cpc (account, merchant, date, balance, page)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (account, merchant, date)
+                DO UPDATE SET balance = excluded.balance, page = excluded.page
+                """,
+                [
+                    (account, row["가맹점명"], row["추출날짜"], parse_balance(row["CPC잔액"]), row.get("페이지"))
+                    for row in merchant_rows
+                ]
+            )
+        return len(merchant_rows)
+
+    def replace_dates(self, account, days):
+        """날짜 -> [(가맹점, 잔액, 페이지)] 로 그날들의 이력을 통째로 바꿉니다 (보관 페이지 재처리용).
+
+        가맹점 인덱스는 다음 조회 때 전체 이력으로 다시 만듭니다. 저장한 행 수를 반환합니다.
+        """
+        written = 0
+        with self.connect() as conn:
+            for date, merchants in days.items():
+                conn.execute("DELETE FROM merchant_cpc WHERE account = ? AND date = ?", (account, date))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO merchant_cpc (account, merchant, date, balance, page) VALUES (?, ?, ?, ?, ?)",
+                    [(account, merchant, date, balance, page) for merchant, balance, page in merchants]
+                )
+                written += len(merchants)
+            conn.execute("DELETE FROM known_merchants WHERE account = ?", (account,))
+            conn.execute("DELETE FROM meta WHERE key = ?", (f"known_index:{account}",))
+        return written
+
+    def known_merchants(self, account):
+        """계정에서 지금까지 본 가맹점명 -> (최초 확인일, 최근 확인일)"""
+        with self.connect() as conn:
+            self._ensure_known_index(conn, account)
+            rows = conn.execute(
+                "SELECT merchant, first_seen, last_seen FROM known_merchants WHERE account = ?", (account,)
+            )
+            return {merchant: (first_seen, last_seen) for merchant, first_seen, last_seen in rows}
+
+    def merchants(self, account):
+        """계정에서 지금까지 본 모든 가맹점명"""
+        return set(self.known_merchants(account))
+
+    def count(self, account=None):
+        with self.connect() as conn:
+            if account is None:
+                return conn.execute("SELECT COUNT(*) FROM merchant_cpc").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM merchant_cpc WHERE account = ?", (account,)).fetchone()[0]
+
+    def read(self, account, start_date=None, end_date=None):
+        """기간 내 이력을 기존 파일과 같은 열/정렬(날짜 내림차순, 가맹점명 오름차순)의 DataFrame 으로 반환합니다.
+
+        CPC잔액은 float64, 가맹점명은 category 입니다.
+        """
+        query = "SELECT merchant, balance, page, date FROM merchant_cpc WHERE account = ?"
+        params = [account]
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        query += " ORDER BY date DESC, merchant ASC"
+        with self.connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return typed_frame(rows)
+
+    def read_date(self, account, date):
+        """하루치 이력"""
+        return self.read(account, date, date)
+
+    def latest(self, account):
+        """가장 최근 수집일과 그날의 (가맹점, 잔액, 페이지, 최초 확인일, 전일 대비, 7일 소진율, 남은 일수) 목록"""
+        with self.connect() as conn:
+            date = conn.execute("SELECT MAX(date) FROM merchant_cpc WHERE account = ?", (account,)).fetchone()[0]
+            if date is None:
+                return None, []
+            rows = conn.execute(
+                """
+                SELECT m.merchant, m.balance, m.page, k.first_seen, s.delta, s.burn_7, s.days_left
+                FROM merchant_cpc m
+                LEFT JOIN known_merchants k ON k.account = m.account AND k.merchant = m.merchant
+                LEFT JOIN merchant_stats s ON s.account = m.account AND s.merchant = m.merchant AND s.last_date = m.date
+                WHERE m.account = ? AND m.date = ?
+                ORDER BY m.balance DESC, m.merchant ASC
+                """,
+                (account, date)
+            ).fetchall()
+        return date, rows
+
+    def iter_rows(self, account, start_date=None, end_date=None, chunk_rows=None):
+        """read() 와 같은 순서의 (가맹점, 잔액, 페이지, 날짜) 행 묶음을 chunk_rows 개씩 차례로 돌려줍니다."""
+        query = "SELECT merchant, balance, page, date FROM merchant_cpc WHERE account = ?"
+        params = [account]
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        query += " ORDER BY date DESC, merchant ASC"
+        with self.connect() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_rows or EXPORT_CHUNK_ROWS)
+                if not rows:
+                    break
+                yield rows
+
+    def csv_chunks(self, account, start_date=None, end_date=None, counter=None):
+        """기존 CSV 형식(UTF-8 BOM, 잔액 '1234.00')의 텍스트 조각을 차례로 돌려줍니다 (스트리밍 응답용).
+
+        counter(list) 를 주면 쓴 행 수를 counter[0] 에 더합니다.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        yield "\ufeff" + buffer.getvalue()
+        for rows in self.iter_rows(account, start_date, end_date):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                (merchant, f"{balance:.2f}", "" if page is None else page, date)
+                for merchant, balance, page, date in rows
+            )
+            if counter is not None:
+                counter[0] += len(rows)
+            yield buffer.getvalue()
+
+    def write_csv(self, account, target, start_date=None, end_date=None):
+        """CSV 파일(경로 또는 텍스트 파일 객체)에 묶음 단위로 쓰고 행 수를 반환합니다."""
+        if isinstance(target, str):
+            with open(target, "w", encoding="utf-8", newline="") as f:
+                return self.write_csv(account, f, start_date, end_date)
+        counter = [0]
+        for chunk in self.csv_chunks(account, start_date, end_date, counter):
+            target.write(chunk)
+        return counter[0]
+
+    def write_xlsx(self, account, target, start_date=None, end_date=None):
+        """엑셀 파일(경로 또는 바이너리 파일 객체)을 openpyxl write-only 모드로 묶음 단위로 씁니다."""
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(EXCEL_SHEET)
+        sheet.append(COLUMNS)
+        count = 0
+        for rows in self.iter_rows(account, start_date, end_date):
+            for row in rows:
+                sheet.append(row)
+            count += len(rows)
+        workbook.save(target)
+        return count
+
+    def export(self, account, csv_file=None, excel_file=None):
+        """계정 이력 전체를 기존 CSV/XLSX 형식으로 내보냅니다 (메모리에 전체를 올리지 않음)."""
+        count = 0
+        if csv_file:
+            count = self.write_csv(account, csv_file)
+        if excel_file:
+            count = self.write_xlsx(account, excel_file)
+        return count
+
+    # --- 페이지 단위 체크포인트 ---
+    def save_checkpoint(self, account, date, page, page_size, merchant_rows):
+        """수집을 마친 페이지 하나의 가맹점 데이터를 저장합니다 (재시도 시 이어서 수집)."""
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO crawl_pages (account, date, page, page_size, merchants) VALUES (?, ?, ?, ?, ?)",
+                (account, date, page, page_size, json.dumps(merchant_rows, ensure_ascii=False))
+            )
+
+    def load_checkpoint(self, account, date, page_size):
+        """같은 날, 같은 페이지 크기로 수집을 마친 페이지 -> 가맹점 데이터"""
+        with self.connect() as conn:
+            rows = conn.execute(
+                "SELECT page, merchants FROM crawl_pages WHERE account = ? AND date = ? AND page_size = ?",
+                (account, date, page_size)
+            ).fetchall()
+        return {page: json.loads(merchants) for page, merchants in rows}
+
+    def clear_checkpoint(self, account, date=None):
+        """체크포인트를 지웁니다. date 를 주지 않으면 계정의 모든 날짜를 지웁니다."""
+        with self.connect() as conn:
+            if date is None:
+                conn.execute("DELETE FROM crawl_pages WHERE account = ?", (account,))
+            else:
+                conn.execute("DELETE FROM crawl_pages WHERE account = ? AND date = ?", (account, date))
+
+    def mark_crawl(self, account, date, pages, missing_pages=()):
+        """그날 수집이 완전했는지(누락 페이지 없음) 기록합니다."""
+        with self.connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO crawl_status (account, date, complete, pages, missing_pages, updated_at)
+                VALUES (?, ?, ?, ?, ?, datetime('now', 'localtime'))
+                """,
+                (account, date, 0 if missing_pages else 1, pages, ",".join(str(p) for p in missing_pages))
+            )
+
+    def crawl_status(self, account, date):
+        """그날 수집 상태 {complete, pages, missing_pages, updated_at}. 기록이 없으면 None."""
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT complete, pages, missing_pages, updated_at FROM crawl_status WHERE account = ? AND date = ?",
+                (account, date)
+            ).fetchone()
+        if row is None:
+            return None
+        complete, pages, missing, updated_at = row
+        return {
+            "complete": bool(complete),
+            "pages": pages,
+            "missing_pages": [int(p) for p in missing.split(",") if p] if missing else [],
+            "updated_at": updated_at
+        }
+
+    def _get_meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def import_legacy(self, account, excel_file=None, csv_file=None):
+        """기존 엑셀(없으면 CSV) 이력을 한 번만 가져옵니다. 가져온 행 수를 반환합니다."""
+        key = f"imported:{account}"
+        with self.connect() as conn:
+            if self._get_meta(conn, key):
+                return 0
+        source = next((f for f in (excel_file, csv_file) if f and os.path.exists(f)), None)
+        imported = 0
+        if source:
+            try:
+                if source.endswith(".xlsx"):
+                    legacy_df = pd.read_excel(source, dtype={"가맹점명": str, "추출날짜": str})
+                else:
+                    legacy_df = pd.read_csv(source, encoding="utf-8-sig", dtype={"가맹점명": str, "추출날짜": str})
+                legacy_df = legacy_df.dropna(subset=["가맹점명", "추출날짜"])
+                if "페이지" not in legacy_df:
+                    legacy_df["페이지"] = None
+                rows = legacy_df[COLUMNS].astype(object).where(legacy_df[COLUMNS].notna(), None).to_dict("records")
+                for row in rows:
+                    row["CPC잔액"] = parse_balance(row["CPC잔액"]) if row["CPC잔액"] is not None else 0.0
+                    row["페이지"] = int(row["페이지"]) if row["페이지"] is not None else None
+                imported = self.upsert(account, rows)
+                print(f"[{account}] 기존 이력 {imported}행을 {source}에서 가져왔습니다.")
+            except Exception as e:
+                # 실패하면 표시하지 않고 다음 실행에서 다시 시도합니다.
+                print(f"[{account}] 기존 이력 가져오기 실패({source}): {e}")
+                return 0
+        with self.connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, source or ""))
+        return imported
+
+
+# 프로세스 전체에서 공유하는 저장소
+history_store = HistoryStore()
+
+
+# --- 명령줄 실행 ---
+# python history_store.py import <계정> <엑셀 또는 CSV 파일>
+# python history_store.py export <계정> <CSV 파일> [엑셀 파일]
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] not in ("import", "export"):
+        print("사용법: python history_store.py import <계정> <파일> | export <계정> <CSV 파일> [엑셀 파일]")
+        sys.exit(1)
+    command, account = sys.argv[1], sys.argv[2]
+    if command == "import":
+        path = sys.argv[3]
+        if path.endswith(".xlsx"):
+            count = history_store.import_legacy(account, excel_file=path)
+        else:
+            count = history_store.import_legacy(account, csv_file=path)
+        print(f"{count}행 가져옴")
+    else:
+        count = history_store.export(account, sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
+        print(f"{count}행 내보냄")
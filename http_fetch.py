@@ -0,0 +1,194 @@
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from browser_profile import count_http_bytes
+from extraction import MIN_COLUMNS, find_contracts_rows, rows_to_merchants
+from pagination import (
+    CONTRACTS_MAX_PAGE_SIZE, PAGE_RETRIES, PAGINATION_MAX_PAGES, DuplicatePageError, PageFingerprints,
+    page_url, retry_delay
+)
+
+# --- 설정 ---
+# 로그인 후 계약 페이지를 HTTP 로 직접 받아올지 여부 (실패 시 브라우저 경로로 대체)
+HTTP_FAST_PATH = os.getenv("HTTP_FAST_PATH", "1") == "1"
+# 동시에 요청할 페이지 수
+HTTP_FETCH_WORKERS = int(os.getenv("HTTP_FETCH_WORKERS", "4"))
+HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "20"))
+
+
+class FastPathUnavailable(Exception):
+    """HTTP 응답이 기대한 계약 테이블이 아니어서 브라우저 경로로 돌아가야 할 때"""
+
+
+def session_from_driver(driver, pool_size=None):
+    """브라우저의 로그인 쿠키와 User-Agent 를 복사한 연결 풀 HTTP 세션을 만듭니다."""
+    pool_size = pool_size or HTTP_FETCH_WORKERS
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+    for cookie in driver.get_cookies():
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain"),
+            path=cookie.get("path", "/")
+        )
+    # DriverSession 이 붙여 둔 계정별 전송량 집계에 HTTP 빠른 경로 응답도 더합니다.
+    usage = getattr(driver, "network_usage", None)
+    if usage is not None:
+        count_http_bytes(session, usage)
+    return session
+
+
+def fetch_page_rows(session, url, allow_empty=False):
+    """페이지 하나를 받아 계약 테이블의 데이터 행을 반환합니다.
+
+    allow_empty=True 이면 데이터 행이 없는 페이지(마지막 이후)를 빈 목록으로 반환합니다.
+    5xx 응답과 네트워크 오류는 PAGE_RETRIES 번까지 간격을 늘려 가며 다시 요청합니다.
+    """
+    return fetch_page(session, url, allow_empty)[0]
+
+
+def fetch_page(session, url, allow_empty=False):
+    """fetch_page_rows 와 같지만 (데이터 행, 응답 HTML) 을 반환합니다 (페이지 보관용)."""
+    for attempt in range(PAGE_RETRIES + 1):
+        try:
+            response = session.get(url, timeout=HTTP_TIMEOUT)
+        except requests.RequestException:
+            if attempt == PAGE_RETRIES:
+                raise
+        else:
+            if response.status_code < 500 or attempt == PAGE_RETRIES:
+                break
+        time.sleep(retry_delay(attempt))
+    if response.status_code != 200:
+        raise FastPathUnavailable(f"HTTP {response.status_code}: {url}")
+    if "login" in urlsplit(response.url).path:
+        raise FastPathUnavailable(f"로그인 페이지로 리디렉션됨: {url}")
+    rows = find_contracts_rows(response.text)
+    if rows is None:
+        if allow_empty:
+            return [], response.text
+        raise FastPathUnavailable(f"계약 테이블을 찾을 수 없음: {url}")
+    return rows, response.text
+
+
+def _negotiate_page_size(session, contracts_url, info):
+    """가능하면 한 페이지에 최대 행 수를 요청합니다.
+
+    사이트가 페이지 크기 파라미터를 따르면 (페이지 크기, 1페이지 행, 1페이지 HTML) 을, 아니면 None 들을 반환합니다.
+    """
+    if not CONTRACTS_MAX_PAGE_SIZE or not info.page_size or CONTRACTS_MAX_PAGE_SIZE <= info.page_size:
+        return None, None, None
+    try:
+        rows, html = fetch_page(session, page_url(contracts_url, 1, page_size=CONTRACTS_MAX_PAGE_SIZE))
+    except FastPathUnavailable:
+        return None, None, None
+    data_rows = [cells for cells in rows if len(cells) >= MIN_COLUMNS]
+    if len(data_rows) <= info.page_size:
+        return None, None, None
+    return CONTRACTS_MAX_PAGE_SIZE, rows, html
+
+
+def crawl_contracts_http(driver, contracts_url, info, current_date, username="", recorder=None):
+    """로그인된 브라우저 세션으로 모든 계약 페이지를 HTTP 로 병렬 수집합니다.
+
+    info(PaginationInfo)의 전체 페이지 수를 기준으로 하되, 사이트가 지원하면 페이지당 최대 행 수를
+    요청해 요청 수를 줄입니다. 전체 페이지 수가 확정되지 않았으면 빈 페이지나 이미 본 내용이
+    나올 때까지 다음 페이지 묶음을 계속 받습니다.
+    응답이 기대한 테이블이 아니거나 페이지 번호가 무시되는 것으로 보이면
+    FastPathUnavailable 을 발생시켜 호출자가 브라우저 경로를 쓰도록 합니다.
+    recorder(PageRecorder)를 넘기면 수집에 성공한 페이지의 HTML 을 보관합니다.
+    (가맹점 목록, 수집한 페이지 수) 를 반환합니다.
+    """
+    session = session_from_driver(driver)
+    page_rows = {}
+    # 보관할 때만 페이지 HTML 을 들고 있습니다.
+    page_html = {}
+    try:
+        page_size, first_rows, first_html = _negotiate_page_size(session, contracts_url, info)
+        total_pages, exact, page_links = info.total_pages, info.exact, info.page_links
+        if page_size:
+            page_links = {}
+            page_rows[1] = first_rows
+            if recorder is not None:
+                page_html[1] = first_html
+            data_rows = sum(1 for cells in first_rows if len(cells) >= MIN_COLUMNS)
+            if info.total_records is not None:
+                total_pages = max(1, math.ceil(info.total_records / page_size))
+            elif data_rows < page_size:
+                total_pages, exact = 1, True
+            else:
+                total_pages = max(1, math.ceil(info.total_pages * info.page_size / page_size))
+            print(f"  [{username}] 페이지당 {page_size}행 요청 지원, {total_pages}페이지로 수집")
+
+        with ThreadPoolExecutor(max_workers=max(1, min(HTTP_FETCH_WORKERS, total_pages))) as executor:
+            def fetch(pages, allow_empty=False):
+                futures = {
+                    page: executor.submit(
+                        fetch_page, session, page_url(contracts_url, page, page_links, page_size), allow_empty
+                    )
+                    for page in pages
+                }
+                fetched = {}
+                for page, future in futures.items():
+                    fetched[page], html = future.result()
+                    if recorder is not None:
+                        page_html[page] = html
+                return fetched
+
+            page_rows.update(fetch([page for page in range(1, total_pages + 1) if page not in page_rows]))
+            # 전체 페이지 수가 확정되지 않았으면 끝(빈 페이지/반복되는 페이지)이 나올 때까지 묶음으로 더 받습니다.
+            next_page = total_pages + 1
+            if not exact:
+                known = PageFingerprints()
+                for page in sorted(page_rows):
+                    known.check(page, page_rows[page])
+            while not exact and next_page <= PAGINATION_MAX_PAGES:
+                batch = fetch(range(next_page, next_page + HTTP_FETCH_WORKERS), allow_empty=True)
+                for page in sorted(batch):
+                    try:
+                        if not batch[page]:
+                            raise DuplicatePageError(f"{page}페이지가 비어 있습니다.")
+                        known.check(page, batch[page])
+                    except DuplicatePageError:
+                        exact = True
+                        break
+                    page_rows[page] = batch[page]
+                next_page += HTTP_FETCH_WORKERS
+    except requests.RequestException as e:
+        raise FastPathUnavailable(f"HTTP 요청 실패: {e}")
+    except DuplicatePageError as e:
+        raise FastPathUnavailable(str(e))
+    finally:
+        session.close()
+
+    # 서버가 페이지 파라미터를 무시하면 모든 페이지가 같은 내용이 됩니다.
+    fingerprints = PageFingerprints()
+    try:
+        for page in sorted(page_rows):
+            fingerprints.check(page, page_rows[page])
+    except DuplicatePageError as e:
+        raise FastPathUnavailable(str(e))
+
+    all_merchant_data = []
+    for page in sorted(page_rows):
+        merchants = rows_to_merchants(page_rows[page], page, current_date)
+        if not merchants:
+            raise FastPathUnavailable(f"{page}페이지에 가맹점 데이터가 없습니다.")
+        print(f"  [{username}] HTTP {page}페이지에서 {len(merchants)}개 가맹점 추출")
+        all_merchant_data.extend(merchants)
+    if info.total_records is not None and len(all_merchant_data) != info.total_records:
+        print(f"  [{username}] ⚠️ 전체 건수 {info.total_records}건과 수집한 {len(all_merchant_data)}건이 다릅니다.")
+    if recorder is not None:
+        for page in sorted(page_rows):
+            recorder.add(page, page_html[page])
+    return all_merchant_data, len(page_rows)
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+
+# --- 설정 ---
+# 동시에 실행할 작업 수 (작업 하나가 여러 계정을 워커 풀로 병렬 처리하므로 기본 1)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+# 조회용으로 보관할 끝난 작업 수
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "100"))
+
+
+class Job:
+    """계정 묶음 하나를 크롤링하는 작업"""
+
+    __slots__ = ("id", "trigger", "accounts", "run_keys", "status", "created", "started", "finished", "run_id", "error")
+
+    def __init__(self, job_id, trigger, accounts):
+        self.id = job_id
+        self.trigger = trigger
+        self.accounts = list(accounts)
+        # 계정 -> 논리적인 실행 키 (예약 실행은 예정 시각, 없으면 작업 ID). 샤딩 모드의 임대에 씁니다.
+        self.run_keys = {}
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.run_id = None
+        self.error = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class JobQueue:
+    """작업 ID 와 계정 단위 중복 제거가 있는 스레드 안전한 작업 큐
+
+    대기 중이거나 실행 중인 작업에 이미 들어 있는 계정은 다시 넣지 않고,
+    아직 시작하지 않은 같은 종류(trigger)의 작업이 있으면 새 계정을 그 작업에 합칩니다.
+    """
+
+    def __init__(self, workers=None, history_size=None):
+        self.workers = max(1, workers or JOB_WORKERS)
+        self.condition = threading.Condition()
+        self.pending = deque()
+        self.jobs = OrderedDict()
+        self.history_size = history_size or JOB_HISTORY_SIZE
+        # 계정 -> 그 계정을 맡은 대기/실행 중 작업 ID
+        self.active = {}
+        self.runner = None
+        self.threads = []
+        self._seq = 0
+
+    def submit(self, account_names, trigger="manual", run_keys=None):
+        """계정들을 큐에 넣고 (작업, 새로 넣었는지) 를 반환합니다.
+
+        모든 계정이 이미 다른 작업에 있으면 그 작업을 돌려줍니다.
+        run_keys 는 계정 -> 실행 키 (예약 실행의 예정 시각) 입니다.
+        """
+        with self.condition:
+            fresh = [name for name in account_names if name not in self.active]
+            if not fresh:
+                job_id = self.active.get(account_names[0]) if account_names else None
+                return self.jobs.get(job_id), False
+            job = next((job for job in self.pending if job.trigger == trigger), None)
+            if job is None:
+                self._seq += 1
+                job = Job(f"job-{time.strftime('%Y%m%d-%H%M%S')}-{self._seq}", trigger, fresh)
+                self.jobs[job.id] = job
+                self.pending.append(job)
+                self._trim()
+            else:
+                job.accounts.extend(fresh)
+            for name in fresh:
+                self.active[name] = job.id
+                job.run_keys[name] = (run_keys or {}).get(name) or job.id
+            self.condition.notify()
+            return job, True
+
+    def _trim(self):
+        while len(self.jobs) > self.history_size:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del self.jobs[oldest_id]
+
+    def start(self, runner):
+        """runner(job) 를 호출하는 작업 스레드를 시작합니다."""
+        self.runner = runner
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                job = self.pending.popleft()
+                job.status = "running"
+                job.started = time.time()
+            try:
+                self.runner(job)
+                status, error = "done", None
+            except Exception as e:
+                print(f"[{job.id}] 작업 실패: {e}\n{traceback.format_exc()}")
+                status, error = "failed", str(e)
+            with self.condition:
+                job.status = status
+                job.error = error
+                job.finished = time.time()
+                for name in job.accounts:
+                    if self.active.get(name) == job.id:
+                        del self.active[name]
+
+    def get(self, job_id):
+        with self.condition:
+            job = self.jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self, limit=None):
+        """작업 목록 (최신순)"""
+        with self.condition:
+            jobs = [job.to_dict() for job in reversed(self.jobs.values())]
+        return jobs[:limit] if limit else jobs
+
+    def busy(self):
+        with self.condition:
+            return bool(self.active)
+
+
+# 웹 엔드포인트와 스케줄러가 함께 쓰는 작업 큐
+job_queue = JobQueue()
@@ -0,0 +1,94 @@
+import os
+import socket
+import time
+
+# --- 설정 ---
+# lease 이면 여러 프로세스/레플리카가 공유 이력 저장소의 임대(lease) 테이블로 계정을 나눠 가집니다.
+SHARD_MODE = os.getenv("SHARD_MODE", "off")
+# 이 프로세스를 구분하는 이름 (기본: 호스트명-PID)
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+# 임대 유지 시간(초). 계정 실행 시간 상한보다 길어야 하며, 지나면 다른 프로세스가 가져갈 수 있습니다.
+LEASE_TTL_SECONDS = int(os.getenv("LEASE_TTL_SECONDS", str(int(os.getenv("CRAWLER_ACCOUNT_TIMEOUT", "900")) + 120)))
+
+# --- 계정 임대 ---
+# 계정마다 한 행 (account, run_key, owner, expires_at, finished_at, status).
+# run_key 는 논리적인 실행 하나 (예약 실행은 예정 시각, 수동 실행은 작업 ID) 로, 모든 레플리카가
+# 같은 예정 시각에 같은 run_key 로 임대를 시도하므로 먼저 가져간 한 곳만 크롤링하고,
+# 끝난 run_key 는 다른 곳에서 다시 실행하지 않습니다. 실행 중 프로세스가 죽으면 만료 후 다른 곳이 이어받습니다.
+
+LEASE_CLAIM = """
+INSERT INTO account_leases (account, run_key, owner, acquired_at, expires_at, finished_at, status)
+VALUES (:account, :run_key, :owner, :now, :expires, NULL, 'running')
+ON CONFLICT (account) DO UPDATE SET
+    run_key = excluded.run_key,
+    owner = excluded.owner,
+    acquired_at = excluded.acquired_at,
+    expires_at = excluded.expires_at,
+    finished_at = NULL,
+    status = 'running'
+WHERE
+    -- 다른 실행의 임대는 끝났거나 만료됐을 때만
+    (account_leases.run_key != excluded.run_key
+        AND (account_leases.finished_at IS NOT NULL OR account_leases.expires_at < :now))
+    -- 같은 실행은 아직 끝나지 않았고, 만료됐거나 내가 가진 경우만
+    OR (account_leases.run_key = excluded.run_key AND account_leases.finished_at IS NULL
+        AND (account_leases.expires_at < :now OR account_leases.owner = excluded.owner))
+"""
+
+
+class LeaseStore:
+    """공유 SQLite 저장소의 계정 임대"""
+
+    def __init__(self, store=None, owner=None, ttl=None):
+        self.store = store
+        self.owner = owner or WORKER_ID
+        self.ttl = ttl or LEASE_TTL_SECONDS
+
+    def _store(self):
+        if self.store is None:
+            from history_store import history_store
+            return history_store
+        return self.store
+
+    def claim(self, account, run_key):
+        """임대를 얻으면 True. 다른 곳이 실행 중이거나 같은 run_key 를 이미 끝냈으면 False."""
+        now = time.time()
+        with self._store().connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(LEASE_CLAIM, {
+                "account": account, "run_key": run_key, "owner": self.owner,
+                "now": now, "expires": now + self.ttl
+            })
+            row = conn.execute(
+                "SELECT owner, acquired_at FROM account_leases WHERE account = ?", (account,)
+            ).fetchone()
+        return row is not None and row[0] == self.owner and row[1] == now
+
+    def release(self, account, run_key, status):
+        """실행을 끝낸 것으로 표시합니다 (같은 run_key 는 다른 곳에서 다시 실행하지 않음)."""
+        with self._store().connect() as conn:
+            conn.execute(
+                """
+                UPDATE account_leases SET finished_at = ?, status = ?
+                WHERE account = ? AND run_key = ? AND owner = ?
+                """,
+                (time.time(), status, account, run_key, self.owner)
+            )
+
+    def snapshot(self):
+        """계정별 현재 임대 상태"""
+        with self._store().connect() as conn:
+            rows = conn.execute(
+                "SELECT account, run_key, owner, acquired_at, expires_at, finished_at, status FROM account_leases"
+            ).fetchall()
+        return {
+            account: {
+                "run_key": run_key, "owner": owner, "acquired_at": acquired_at,
+                "expires_at": expires_at, "finished_at": finished_at, "status": status
+            }
+            for account, run_key, owner, acquired_at, expires_at, finished_at, status in rows
+        }
+
+
+# 샤딩 모드에서 크롤러 작업이 쓰는 임대 저장소
+lease_store = LeaseStore()
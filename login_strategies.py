@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from metrics import observe
+
+# --- 설정 ---
+# 로그인 방식별 성공/실패/소요 시간 통계를 저장할 파일
+LOGIN_STATS_FILE = os.getenv("LOGIN_STATS_FILE", "login_stats.json")
+# 순서를 정할 때 참고하는 최근 시도 수 (오래된 성공이 고장 난 방식을 계속 앞에 두지 않도록)
+RECENT_WINDOW = 20
+
+
+# --- 로그인 방식 ---
+# 각 방식은 입력을 채우고 로그인 버튼을 누르며, 실패하면 예외를 발생시킵니다.
+def _fill_and_submit(driver, username_field, password_field, login_button, username, password):
+    # 스크롤하여 요소가 보이도록 함
+    driver.execute_script("arguments[0].scrollIntoView(true);", username_field)
+
+    username_field.clear()
+    username_field.send_keys(username)
+
+    password_field.clear()
+    password_field.send_keys(password)
+
+    # JavaScript로 클릭 시도
+    driver.execute_script("arguments[0].click();", login_button)
+
+
+def login_by_id(driver, username, password):
+    """방법 1: ID 기반 로그인"""
+    username_field = WebDriverWait(driver, 15).until(
+        EC.element_to_be_clickable((By.ID, "username"))
+    )
+    password_field = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.ID, "password"))
+    )
+    login_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.ID, "btn-login"))
+    )
+    _fill_and_submit(driver, username_field, password_field, login_button, username, password)
+
+
+def login_by_name(driver, username, password):
+    """방법 2: name 속성 기반 로그인"""
+    username_field = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, "input[name='username']"))
+    )
+    password_field = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, "input[name='password']"))
+    )
+    login_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']"))
+    )
+    _fill_and_submit(driver, username_field, password_field, login_button, username, password)
+
+
+def login_by_javascript(driver, username, password):
+    """방법 3: JavaScript 직접 실행 (값은 인자로 넘겨 따옴표 등이 섞여도 안전)"""
+    found = driver.execute_script("""
+        var usernameInput = document.querySelector("input[name='username']") || document.querySelector("#username");
+        var passwordInput = document.querySelector("input[name='password']") || document.querySelector("#password");
+        var loginBtn = document.querySelector("button[type='submit']") || document.querySelector("#btn-login");
+
+        if (usernameInput && passwordInput && loginBtn) {
+            usernameInput.value = arguments[0];
+            passwordInput.value = arguments[1];
+            loginBtn.click();
+            return true;
+        }
+        return {username: !!usernameInput, password: !!passwordInput, button: !!loginBtn};
+    """, username, password)
+    if found is not True:
+        raise Exception(f"필수 요소 없음 {found}")
+
+
+# 등록 순서가 기본 시도 순서입니다.
+STRATEGIES = [
+    ("id_selectors", login_by_id),
+    ("name_selectors", login_by_name),
+    ("javascript", login_by_javascript),
+]
+
+
+class StrategyStats:
+    """로그인 방식별 성공/실패 횟수와 성공 시 소요 시간을 기록하고 파일에 보관합니다."""
+
+    def __init__(self, path=None):
+        self.path = path or LOGIN_STATS_FILE
+        self.lock = threading.Lock()
+        self.stats = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def record(self, name, ok, elapsed):
+        with self.lock:
+            stat = self.stats.setdefault(name, {
+                "success": 0, "failure": 0, "success_seconds": 0.0, "failure_seconds": 0.0,
+                "last_success": None, "last_failure": None, "recent": []
+            })
+            now = time.strftime("%Y-%m-%d %H:%M:%S")
+            stat.setdefault("recent", []).append([ok, round(elapsed, 3)])
+            del stat["recent"][:-RECENT_WINDOW]
+            if ok:
+                stat["success"] += 1
+                stat["success_seconds"] += elapsed
+                stat["last_success"] = now
+            else:
+                stat["failure"] += 1
+                stat["failure_seconds"] += elapsed
+                stat["last_failure"] = now
+            try:
+                self._save()
+            except OSError as e:
+                print(f"로그인 통계 저장 실패: {e}")
+
+    def ordered(self, strategies=None):
+        """최근 시도 기준으로 잘 성공하고 빠른 방식부터 정렬합니다.
+
+        기록이 없는 방식은 그 다음, 최근 주로 실패한 방식은 마지막에 시도합니다.
+        """
+        strategies = strategies or STRATEGIES
+        with self.lock:
+            def key(item):
+                index, (name, _) = item
+                recent = self.stats.get(name, {}).get("recent")
+                if not recent:
+                    return (1, 0.0, index)
+                successes = [seconds for ok, seconds in recent if ok]
+                rate = len(successes) / len(recent)
+                if rate < 0.5:
+                    return (2, -rate, index)
+                return (0, sum(successes) / len(successes), index)
+            return [item for _, item in sorted(enumerate(strategies), key=key)]
+
+    def snapshot(self):
+        """방식별 시도 횟수, 성공률, 평균 소요 시간을 반환합니다."""
+        with self.lock:
+            report = {}
+            for name, _ in STRATEGIES:
+                stat = self.stats.get(name, {})
+                success, failure = stat.get("success", 0), stat.get("failure", 0)
+                recent = stat.get("recent", [])
+                report[name] = {
+                    "attempts": success + failure,
+                    "success": success,
+                    "failure": failure,
+                    "success_rate": round(success / (success + failure), 3) if success + failure else None,
+                    "avg_success_seconds": round(stat["success_seconds"] / success, 3) if success else None,
+                    "avg_failure_seconds": round(stat["failure_seconds"] / failure, 3) if failure else None,
+                    "recent_success_rate": round(sum(1 for ok, _ in recent if ok) / len(recent), 3) if recent else None,
+                    "last_success": stat.get("last_success"),
+                    "last_failure": stat.get("last_failure")
+                }
+            return report
+
+    def format_report(self):
+        """로그에 남길 한 줄씩의 요약. 계속 실패하는 방식은 표시합니다."""
+        lines = []
+        snapshot = self.snapshot()
+        for rank, (name, _) in enumerate(self.ordered(), 1):
+            stat = snapshot[name]
+            if not stat["attempts"]:
+                lines.append(f"{rank}. {name}: 기록 없음")
+                continue
+            avg = f"{stat['avg_success_seconds']}초" if stat["avg_success_seconds"] is not None else "-"
+            warning = " ⚠️ 최근 주로 실패" if stat["recent_success_rate"] is not None and stat["recent_success_rate"] < 0.5 else ""
+            lines.append(
+                f"{rank}. {name}: 성공 {stat['success']}/{stat['attempts']} "
+                f"(평균 {avg}, 실패 시 평균 {stat['avg_failure_seconds'] or '-'}초){warning}"
+            )
+        return "\n".join(lines)
+
+
+# 프로세스 전체에서 공유하는 통계
+login_stats = StrategyStats()
+
+
+def run_login_strategies(driver, username, password, stats=None, account=None, verify=None):
+    """통계 순서대로 로그인 방식을 시도하고, 성공한 방식의 이름을 반환합니다. 모두 실패하면 None.
+
+    verify(driver) 를 주면 폼 제출 뒤 실제로 로그인됐는지 확인하고 (실패 시 예외),
+    확인까지 통과한 방식만 성공으로, 확인 시간까지 포함한 소요 시간으로 기록합니다.
+    """
+    stats = stats or login_stats
+    account = account or username
+    for name, strategy in stats.ordered():
+        print(f"[{username}] 로그인 방식 '{name}' 시도...")
+        start = time.time()
+        try:
+            strategy(driver, username, password)
+        except Exception as e:
+            elapsed = time.time() - start
+            stats.record(name, False, elapsed)
+            observe("login_strategy", account, elapsed, "error", strategy=name)
+            print(f"[{username}] 로그인 방식 '{name}' 실패: {e}")
+            continue
+        if verify is not None:
+            try:
+                verify(driver)
+            except Exception as e:
+                # 폼은 제출했지만 로그인되지 않았습니다 (버튼만 눌리고 이동하지 않은 경우 등).
+                elapsed = time.time() - start
+                stats.record(name, False, elapsed)
+                observe("login_strategy", account, elapsed, "unverified", strategy=name)
+                print(f"[{username}] 로그인 방식 '{name}' 제출 후 로그인 확인 실패: {e or type(e).__name__}")
+                continue
+        elapsed = time.time() - start
+        stats.record(name, True, elapsed)
+        observe("login_strategy", account, elapsed, strategy=name)
+        print(f"[{username}] 로그인 방식 '{name}' 성공")
+        return name
+    return None
@@ -1,16 +1,29 @@
+import time
+# 프로세스 시작 시각 (시작 단계별 소요 시간 측정 기준)
+STARTUP_T0 = time.time()
 import os
 import sys
 import threading
-import time
 from datetime import datetime
-from flask import Flask, jsonify
-import schedule
+from flask import Flask, Response, jsonify, request, stream_with_context
 
 # Flask 앱 생성
 app = Flask(__name__)
 
-# cpcCrawl.py의 크롤링 함수들을 직접 import
-from cpcCrawl import run_crawler, send_slack_notification
+# 크롤러 모듈(selenium, pandas, slack_sdk)은 웹 서버가 먼저 뜰 수 있도록
+# 필요할 때 import 하고, 시작 직후 백그라운드에서 미리 로드합니다.
+
+# 시작 단계별 완료 시각 (프로세스 시작 후 초)
+startup_timing = {
+    "phases": {},
+    "first_health_seconds": None
+}
+
+def mark_startup(phase):
+    """시작 단계 하나가 끝난 시각을 기록합니다."""
+    startup_timing["phases"][phase] = round(time.time() - STARTUP_T0, 3)
+
+mark_startup("web_imports")
 
 # 환경 변수 직접 가져오기 (여러 이름 시도)
 def get_slack_token():
@@ -40,79 +53,90 @@ crawler_status = {
     "has_error": False
 }
 
-# 계정 정보 리스트
-accounts = [
-    {
-        "name": "kjg",
-        "username": "E20250124156285",
-        "password": "1234",
-        "slack_channel": "#kjg_cpcbalance",
-        "excel_file": "merchant_cpc_data_kjg.xlsx",
-        "csv_file": "merchant_cpc_data_kjg.csv"
-    },
-    {
-        "name": "htag",
-        "username": "E20240626154518",
-        "password": "1234",
-        "slack_channel": "#htag_cpcbalance",
-        "excel_file": "merchant_cpc_data_htag.xlsx",
-        "csv_file": "merchant_cpc_data_htag.csv"
-    },
-    {
-        "name": "gpr",
-        "username": "E20250124156283",
-        "password": "1234",
-        "slack_channel": "#gpr_cpcbalance",
-        "excel_file": "merchant_cpc_data_gpr.xlsx",
-        "csv_file": "merchant_cpc_data_gpr.csv"
-    },
-    {
-        "name": "smd",
-        "username": "E20220210100006",
-        "password": "1234",
-        "slack_channel": "#smd_cpcbalance",
-        "excel_file": "merchant_cpc_data_smd.xlsx",
-        "csv_file": "merchant_cpc_data_smd.csv"
-    },
-    {
-        "name": "zen",
-        "username": "E20250124156292",
-        "password": "1234",
-        "slack_channel": "#zen_cpcbalance",
-        "excel_file": "merchant_cpc_data_zen.xlsx",
-        "csv_file": "merchant_cpc_data_zen.csv"
-    }
-]
+# 현재 실행 중인 워커 풀 (계정별 진행 상황 조회용)
+current_pool = None
+
+# 계정 목록은 ACCOUNTS_FILE(기본 accounts.json)에서 읽고 파일이 바뀌면 다시 읽습니다 (accounts_config.py).
+def get_accounts():
+    from accounts_config import account_registry
+    return account_registry.accounts()
 
-def run_crawler_job():
-    """모든 계정에 대해 크롤러 작업 실행"""
-    if crawler_status["is_running"]:
-        print("크롤러가 이미 실행 중입니다.")
-        return
+def run_crawler_job(trigger="schedule", account_names=None, job=None):
+    """계정들(기본: 모든 계정)에 대해 크롤러 작업 실행. 작업 큐의 작업 스레드에서 호출됩니다."""
+    global current_pool
+    selected = [acc for acc in get_accounts() if account_names is None or acc["name"] in account_names]
+    from run_registry import run_registry
+    run_id = run_registry.start_run(trigger, [acc["name"] for acc in selected])
+    if job is not None:
+        job.run_id = run_id
+    crawler_status["run_id"] = run_id
+    crawler_status["job_id"] = job.id if job is not None else None
     crawler_status["is_running"] = True
     crawler_status["completed"] = False
     crawler_status["start_time"] = time.time()
     crawler_status["end_time"] = None
     crawler_status["message"] = "크롤러가 실행 중입니다..."
     crawler_status["has_error"] = False
+    crawler_status["accounts"] = {}
     try:
         print("크롤링 작업을 시작합니다...")
-        for acc in accounts:
-            print(f"\n==== [{acc['name']}] 계정 크롤링 시작 ====")
-            from cpcCrawl import run_crawler
-            run_crawler(
-                acc["username"],
-                acc["password"],
-                slack_token,
-                acc["slack_channel"],
-                acc["excel_file"],
-                acc["csv_file"]
-            )
+        from crawler_pool import CrawlerPool
+        from leases import SHARD_MODE, lease_store
+        run_keys = job.run_keys if job is not None else {}
+        sharding = {}
+        if SHARD_MODE == "lease":
+            # 여러 프로세스/레플리카가 같은 예약 실행을 받아도 계정마다 한 곳만 크롤링합니다.
+            sharding = {
+                "claim": lambda name: lease_store.claim(name, run_keys.get(name) or run_id),
+                "release": lambda name, status: lease_store.release(name, run_keys.get(name) or run_id, status)
+            }
+        pool = CrawlerPool(
+            on_status=lambda name, status: run_registry.update_account(run_id, name, status),
+            run_id=run_id,
+            **sharding
+        )
+        current_pool = pool
+        print(f"워커 {pool.workers}개로 {len(selected)}개 계정을 병렬 크롤링합니다.")
+        from metrics import inc, span
+        with span("job", "all", accounts=len(selected)):
+            results = pool.run(selected, slack_token)
+        for name, res in results.items():
+            inc("crawler_account_runs_total", account=name, status=res.get("status"))
+            if res.get("bytes_transferred"):
+                inc("crawler_network_bytes_total", res["bytes_transferred"], account=name)
+            if res.get("memory_restarts"):
+                inc("crawler_memory_restarts_total", res["memory_restarts"], account=name)
+        failed = [name for name, res in results.items() if res.get("status") not in ("success", "partial", "skipped")]
+        partial = [name for name, res in results.items() if res.get("status") == "partial"]
+        crawler_status["accounts"] = results
+        # 끝난 계정의 마지막 실행 시각 기록 (재시작 후 놓친 예약 실행 판단용)
+        from scheduler import last_run_store
+        last_run_store.record([name for name in results if name not in failed])
+        # 최신 잔액 캐시를 새 스냅샷으로 교체 (/balances)
+        from balance_cache import balance_cache
+        balance_cache.refresh([acc["name"] for acc in get_accounts()])
+        from waits import wait_stats
+        crawler_status["wait_stats"] = wait_stats()
+        print(f"대기 시간 통계: {crawler_status['wait_stats']}")
+        from login_strategies import login_stats
+        print(f"로그인 방식 통계:\n{login_stats.format_report()}")
+        from slack_queue import slack_queue
+        crawler_status["slack"] = slack_queue.snapshot()
         crawler_status["is_running"] = False
         crawler_status["completed"] = True
         crawler_status["end_time"] = time.time()
-        crawler_status["message"] = "모든 계정 크롤링이 성공적으로 완료되었습니다."
-        print("모든 계정 크롤링이 성공적으로 완료되었습니다.")
+        if failed:
+            crawler_status["has_error"] = True
+            crawler_status["message"] = f"일부 계정 크롤링 실패: {', '.join(failed)}"
+            if partial:
+                crawler_status["message"] += f" / 일부 페이지 누락: {', '.join(partial)}"
+        elif partial:
+            crawler_status["has_error"] = True
+            crawler_status["message"] = f"일부 페이지 누락: {', '.join(partial)}"
+        else:
+            crawler_status["message"] = "모든 계정 크롤링이 성공적으로 완료되었습니다."
+        print(crawler_status["message"])
+        run_registry.finish_run(run_id)
     except Exception as e:
         crawler_status["is_running"] = False
         crawler_status["completed"] = True
@@ -120,25 +144,50 @@ def run_crawler_job():
         crawler_status["message"] = f"예상치 못한 오류: {e}"
         crawler_status["has_error"] = True
         print(f"예상치 못한 오류: {e}")
+        run_registry.finish_run(run_id, status="error")
+        raise
+
+def run_job(job):
+    """작업 큐가 꺼낸 작업 하나를 실행합니다."""
+    run_crawler_job(job.trigger, job.accounts, job)
+
+def warm_up():
+    """무거운 크롤러 모듈과 ChromeDriver 경로를 백그라운드에서 미리 준비합니다."""
+    try:
+        import cpcCrawl  # noqa: F401  (selenium, pandas 등 로드)
+        mark_startup("warmup_crawler_imports")
+        from driver_pool import resolve_chromedriver_path
+        resolve_chromedriver_path()
+        mark_startup("warmup_chromedriver")
+    except Exception as e:
+        print(f"❌ 크롤러 사전 로드 실패: {e}")
+
+def send_startup_notifications(slack_token):
+    """모든 계정별 채널에 시작 알림을 보냅니다 (전송 큐를 통해 백그라운드로)."""
+    try:
+        from slack_queue import slack_queue
+        for acc in get_accounts():
+            slack_queue.enqueue(f"🚀 {acc['name'].upper()} CPC Slack Bot이 Railway에서 시작되었습니다!", slack_token, acc["slack_channel"], account=acc["name"])
+        mark_startup("startup_notifications_queued")
+        print("✅ 시작 알림을 Slack 전송 큐에 넣었습니다.")
+    except Exception as e:
+        print(f"❌ 시작 알림 전송 실패: {e}")
 
 # 스케줄러 설정
+account_scheduler = None
+
 def setup_scheduler():
-    """스케줄러를 설정합니다."""
-    # schedule 라이브러리를 사용한 더 안정적인 스케줄링
-    # 한국시간 오전 9시 = UTC 00:00 (한국은 UTC+9)
-    schedule.every().day.at("00:00").do(run_crawler_job)
-    
-    def run_scheduler():
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # 1분마다 스케줄 확인
-    
-    scheduler_thread = threading.Thread(target=run_scheduler)
-    scheduler_thread.daemon = True
-    scheduler_thread.start()
-    print("스케줄러가 시작되었습니다. 매일 한국시간 오전 9시(UTC 00:00)에 크롤링이 실행됩니다.")
+    """작업 큐와 계정별 스케줄러를 시작합니다."""
+    global account_scheduler
+    from job_queue import job_queue
+    from scheduler import AccountScheduler, CRAWL_SCHEDULE
+    job_queue.start(run_job)
+    # 계정마다 cron 일정(기본 CRAWL_SCHEDULE) + 고정 지연으로 큐에 넣고, 재시작 중 놓친 실행은 따라잡습니다.
+    account_scheduler = AccountScheduler(job_queue, get_accounts)
+    account_scheduler.start()
+    print(f"스케줄러가 시작되었습니다. 기본 일정: {CRAWL_SCHEDULE} (서버 시간, UTC 00:00 = 한국시간 오전 9시)")
     print(f"현재 시간: {datetime.now()}")
-    print("다음 예정된 실행:", schedule.next_run())
+    print("다음 예정된 실행:", account_scheduler.upcoming())
 
 # Flask 라우트 정의
 @app.route('/')
@@ -181,35 +230,252 @@ def index():
     </html>
     """
 
+def get_crawler_status():
+    """실행 중이면 계정별 진행 상황을 포함한 크롤러 상태를 반환합니다."""
+    if crawler_status["is_running"] and current_pool is not None:
+        return dict(crawler_status, accounts=current_pool.snapshot())
+    return crawler_status
+
 @app.route('/health')
 def health():
+    if startup_timing["first_health_seconds"] is None:
+        startup_timing["first_health_seconds"] = round(time.time() - STARTUP_T0, 3)
+        print(f"첫 /health 응답까지 {startup_timing['first_health_seconds']}초, 단계별: {startup_timing['phases']}")
     return jsonify({
         "status": "healthy", 
         "timestamp": datetime.now().isoformat(),
         "service": "KJG CPC Slack Bot",
-        "crawler_status": crawler_status
+        "crawler_status": get_crawler_status()
     })
 
 @app.route('/status')
 def status():
-    return jsonify(crawler_status)
+    return jsonify(get_crawler_status())
+
+@app.route('/metrics')
+def metrics_view():
+    """단계별 소요 시간 히스토그램과 카운터 (Prometheus 텍스트 형식)"""
+    from metrics import render_prometheus
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/startup')
+def startup():
+    """프로세스 시작부터 각 단계(웹 import, 스케줄러, 서버 시작, 사전 로드, 첫 /health)까지 걸린 시간"""
+    return jsonify(startup_timing)
+
+@app.route('/login-stats')
+def login_stats_view():
+    """로그인 방식별 성공률/소요 시간과 현재 시도 순서"""
+    from login_strategies import login_stats
+    return jsonify({
+        "order": [name for name, _ in login_stats.ordered()],
+        "strategies": login_stats.snapshot()
+    })
+
+@app.route('/runs')
+def runs_view():
+    """최근 실행 목록 (최신순). ?limit=N 으로 개수를 제한합니다."""
+    from run_registry import run_registry
+    limit = request.args.get("limit", type=int)
+    return jsonify({"runs": run_registry.list_runs(limit)})
+
+@app.route('/runs/<run_id>')
+def run_detail_view(run_id):
+    """실행 하나의 계정별 시작/종료 시각, 소요 시간, 페이지/가맹점/신규 가맹점 수, 오류"""
+    from run_registry import run_registry
+    run = run_registry.get(run_id)
+    if run is None:
+        return jsonify({"status": "error", "message": f"실행 기록이 없습니다: {run_id}"}), 404
+    return jsonify(run)
+
+@app.route('/artifacts')
+def artifacts_view():
+    """오류 화면 캡처 목록 (최신순). ?run_id=&account=&limit=N 으로 거릅니다."""
+    from artifacts import artifact_store
+    items = artifact_store.list(
+        request.args.get("run_id"), request.args.get("account"), request.args.get("limit", type=int)
+    )
+    return jsonify({"artifacts": items, "stats": artifact_store.stats()})
+
+@app.route('/artifacts/<path:name>')
+def artifact_file_view(name):
+    """캡처 파일 하나 (스크린샷 또는 압축된 DOM). DOM 은 스크립트가 실행되지 않도록 sandbox 로 보냅니다."""
+    from flask import send_file
+    from artifacts import artifact_store
+    path = artifact_store.path_for(name)
+    if path is None:
+        return jsonify({"status": "error", "message": f"캡처 파일이 없습니다: {name}"}), 404
+    if path.endswith(".html.gz"):
+        response = send_file(path, mimetype="text/html")
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Content-Security-Policy"] = "sandbox"
+        return response
+    return send_file(path)
+
+def balance_filters():
+    """?min_balance=&max_balance=&new=true|false 조건 (없거나 잘못된 값은 None)"""
+    new = request.args.get("new")
+    return {
+        "min_balance": request.args.get("min_balance", type=float),
+        "max_balance": request.args.get("max_balance", type=float),
+        "new": None if new is None else new.lower() in ("1", "true", "yes")
+    }
+
+def conditional_json(etag, build):
+    """If-None-Match 가 ETag 와 같으면 본문 없이 304, 아니면 build() 결과를 ETag 와 함께 반환합니다."""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.route('/balances')
+def balances_view():
+    """모든 계정의 최신 가맹점 잔액 (최근 실행이 끝날 때 갱신되는 메모리 캐시)"""
+    from balance_cache import balance_cache, filter_merchants, response_etag
+    snapshot = balance_cache.get([acc["name"] for acc in get_accounts()])
+    filters = balance_filters()
+    return conditional_json(response_etag(snapshot.etag, filters), lambda: {
+        "updated": snapshot.created,
+        "accounts": {
+            name: balances.to_dict(filter_merchants(balances.merchants, **filters))
+            for name, balances in snapshot.accounts.items()
+        }
+    })
+
+@app.route('/balances/<account>')
+def account_balances_view(account):
+    """계정 하나의 최신 가맹점 잔액"""
+    from balance_cache import balance_cache, filter_merchants, response_etag
+    snapshot = balance_cache.get([acc["name"] for acc in get_accounts()])
+    balances = snapshot.accounts.get(account)
+    if balances is None:
+        return jsonify({"status": "error", "message": f"알 수 없는 계정입니다: {account}"}), 404
+    filters = balance_filters()
+    return conditional_json(response_etag(balances.etag, filters), lambda: dict(
+        balances.to_dict(filter_merchants(balances.merchants, **filters)), updated=snapshot.created
+    ))
+
+def parse_date_arg(name):
+    """YYYY-MM-DD 형식의 쿼리 파라미터 (없으면 None, 형식이 틀리면 ValueError)"""
+    value = request.args.get(name)
+    if value:
+        datetime.strptime(value, "%Y-%m-%d")
+    return value or None
+
+def stream_file(path, chunk_size=64 * 1024):
+    """임시 파일을 조각 단위로 보내고 다 보내면 지웁니다."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+@app.route('/export')
+def export_view():
+    """계정 이력을 기간(?start=&end=)과 형식(?format=csv|xlsx)으로 내려받습니다.
+
+    CSV 는 저장소에서 묶음 단위로 읽어 바로 스트리밍하고, XLSX 는 write-only 모드로 임시 파일에 쓴 뒤 보냅니다.
+    """
+    account = request.args.get("account")
+    if account not in {acc["name"] for acc in get_accounts()}:
+        return jsonify({"status": "error", "message": f"알 수 없는 계정입니다: {account}"}), 404
+    export_format = request.args.get("format", "csv").lower()
+    if export_format not in ("csv", "xlsx"):
+        return jsonify({"status": "error", "message": "format 은 csv 또는 xlsx 입니다."}), 400
+    try:
+        start_date, end_date = parse_date_arg("start"), parse_date_arg("end")
+    except ValueError:
+        return jsonify({"status": "error", "message": "start/end 는 YYYY-MM-DD 형식입니다."}), 400
+    from history_store import history_store
+    filename = "_".join(part for part in ("merchant_cpc", account, start_date, end_date) if part)
+    if export_format == "csv":
+        return Response(
+            stream_with_context(history_store.csv_chunks(account, start_date, end_date)),
+            mimetype="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f"attachment; filename={filename}.csv"}
+        )
+    import tempfile
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        history_store.write_xlsx(account, path, start_date, end_date)
+    except Exception:
+        os.remove(path)
+        raise
+    return Response(
+        stream_file(path),
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}.xlsx",
+            "Content-Length": str(os.path.getsize(path))
+        }
+    )
 
 @app.route('/run-now')
 def run_now():
-    """수동으로 크롤링을 실행하는 엔드포인트"""
-    if crawler_status["is_running"]:
+    """수동 크롤링을 작업 큐에 넣고 작업 ID 를 반환합니다. ?account=이름 으로 한 계정만 실행합니다."""
+    from job_queue import job_queue
+    names = [acc["name"] for acc in get_accounts()]
+    account = request.args.get("account")
+    if account is not None:
+        if account not in names:
+            return jsonify({"status": "error", "message": f"알 수 없는 계정입니다: {account}"}), 404
+        names = [account]
+    job, created = job_queue.submit(names, "manual")
+    if job is None:
+        return jsonify({"status": "error", "message": "실행할 계정이 없습니다."}), 400
+    if not created:
         return jsonify({
-            "status": "error",
-            "message": "크롤러가 이미 실행 중입니다."
+            "status": "success",
+            "job_id": job.id,
+            "message": "이미 대기 중이거나 실행 중인 작업이 있습니다."
         })
-    
-    # 별도 스레드에서 실행
-    threading.Thread(target=run_crawler_job).start()
     return jsonify({
-        "status": "success", 
-        "message": "크롤링 작업이 시작되었습니다."
+        "status": "success",
+        "job_id": job.id,
+        "message": "크롤링 작업이 큐에 추가되었습니다."
+    })
+
+@app.route('/jobs')
+def jobs_view():
+    """작업 목록 (최신순, ?limit=N)과 계정별 다음 예약 실행 시각"""
+    from job_queue import job_queue
+    limit = request.args.get("limit", type=int)
+    return jsonify({
+        "jobs": job_queue.list_jobs(limit),
+        "upcoming": account_scheduler.upcoming() if account_scheduler else {}
+    })
+
+@app.route('/accounts')
+def accounts_view():
+    """현재 계정 목록 (비밀번호 제외)과 샤딩 모드의 계정별 임대 상태"""
+    from leases import SHARD_MODE, WORKER_ID, lease_store
+    return jsonify({
+        "accounts": [
+            {key: value for key, value in acc.items() if key != "password"}
+            for acc in get_accounts()
+        ],
+        "shard_mode": SHARD_MODE,
+        "worker_id": WORKER_ID,
+        "leases": lease_store.snapshot() if SHARD_MODE == "lease" else {}
     })
 
+@app.route('/jobs/<job_id>')
+def job_detail_view(job_id):
+    """작업 하나의 상태 (queued/running/done/failed)와 실행 ID"""
+    from job_queue import job_queue
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"작업이 없습니다: {job_id}"}), 404
+    return jsonify(job)
+
 if __name__ == '__main__':
     print("🚀 KJG CPC Slack Bot 시작 중...")
     
@@ -221,25 +487,30 @@ if __name__ == '__main__':
         sys.exit(1)
     
     print(f"✅ 토큰 확인 완료: {slack_token[:10]}...")
+    mark_startup("env_check")
     
     # 스케줄러 시작
     setup_scheduler()
+    mark_startup("scheduler")
     
-    # 시작 알림 전송 (모든 계정별 채널에)
-    try:
-        from cpcCrawl import send_slack_notification
-        for acc in accounts:
-            send_slack_notification(f"🚀 {acc['name'].upper()} CPC Slack Bot이 Railway에서 시작되었습니다!", slack_token, acc["slack_channel"])
-        print("✅ 시작 알림을 Slack으로 전송했습니다.")
-    except Exception as e:
-        print(f"❌ 시작 알림 전송 실패: {e}")
+    # 무거운 모듈 사전 로드와 시작 알림은 백그라운드에서 (헬스체크를 막지 않도록)
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    threading.Thread(target=send_startup_notifications, args=(slack_token,), name="startup-notify", daemon=True).start()
     
     print("🚀 KJG CPC Slack Bot이 정상적으로 시작되었습니다.")
     print("매일 한국시간 오전 9시에 자동으로 모든 계정의 CPC 잔액을 확인하여 Slack으로 전송합니다.")
     
     # 테스트용 즉시 실행 코드는 제거됨 (정기 스케줄링만 사용)
     
+    if sys.argv[1:2] == ["worker"]:
+        # 웹 서버 없이 스케줄러와 작업 큐만 실행합니다 (SHARD_MODE=lease 로 여러 워커 프로세스가 계정을 나눠 맡을 때).
+        from leases import SHARD_MODE, WORKER_ID
+        print(f"🛠️ 워커 모드로 실행합니다 (ID {WORKER_ID}, 샤딩 {SHARD_MODE}).")
+        while True:
+            time.sleep(3600)
+
     # Flask 서버 시작 (Railway 헬스체크용)
     port = int(os.environ.get('PORT', 5000))
     print(f"🌐 웹 서버가 포트 {port}에서 시작됩니다.")
+    mark_startup("server_start")
     app.run(debug=False, host='0.0.0.0', port=port) 
\ No newline at end of file
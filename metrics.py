@@ -0,0 +1,134 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- 설정 ---
+# 단계별 소요 시간 히스토그램 구간(초)
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_lock = threading.Lock()
+# (phase, account) -> {"buckets": [...], "sum": float, "count": int}
+_histograms = {}
+# (name, 라벨 튜플) -> float
+_counters = {}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """카운터를 증가시킵니다."""
+    with _lock:
+        key = (name, _labels_key(labels))
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(phase, account, seconds, status="ok", **fields):
+    """이미 측정한 단계 소요 시간을 기록하고 구조화된 JSON 로그로 남깁니다."""
+    with _lock:
+        hist = _histograms.setdefault((phase, account), {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist["buckets"][i] += 1
+        hist["sum"] += seconds
+        hist["count"] += 1
+        key = ("crawler_phase_total", _labels_key({"phase": phase, "account": account, "status": status}))
+        _counters[key] = _counters.get(key, 0) + 1
+    record = {
+        "event": "span",
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "phase": phase,
+        "account": account,
+        "seconds": round(seconds, 3),
+        "status": status
+    }
+    record.update(fields)
+    print(json.dumps(record, ensure_ascii=False))
+
+
+@contextmanager
+def span(phase, account, **fields):
+    """with 블록의 소요 시간을 단계(phase)/계정별로 기록합니다. 예외가 나면 status=error."""
+    start = time.time()
+    try:
+        yield
+    except BaseException:
+        observe(phase, account, time.time() - start, "error", **fields)
+        raise
+    observe(phase, account, time.time() - start, "ok", **fields)
+
+
+def phase_totals(account=None):
+    """단계별 (횟수, 합계 초). account 를 주면 그 계정만 합산합니다."""
+    totals = {}
+    with _lock:
+        for (phase, acct), hist in _histograms.items():
+            if account is not None and acct != account:
+                continue
+            count, seconds = totals.get(phase, (0, 0.0))
+            totals[phase] = (count + hist["count"], seconds + hist["sum"])
+    return totals
+
+
+def reset():
+    """모든 지표를 지웁니다 (벤치마크 구간 사이에 사용)."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def render_prometheus():
+    """Prometheus 텍스트 형식(0.0.4)으로 모든 지표를 출력합니다."""
+    lines = [
+        "# HELP crawler_phase_seconds Crawler phase duration in seconds",
+        "# TYPE crawler_phase_seconds histogram"
+    ]
+    with _lock:
+        histograms = {key: dict(value, buckets=list(value["buckets"])) for key, value in _histograms.items()}
+        counters = dict(_counters)
+    for (phase, account), hist in sorted(histograms.items()):
+        base = (("account", account), ("phase", phase))
+        for bound, count in zip(BUCKETS, hist["buckets"]):
+            lines.append(f"crawler_phase_seconds_bucket{_format_labels(base + (('le', bound),))} {count}")
+        lines.append(f"crawler_phase_seconds_bucket{_format_labels(base + (('le', '+Inf'),))} {hist['count']}")
+        lines.append(f"crawler_phase_seconds_sum{_format_labels(base)} {hist['sum']:.6f}")
+        lines.append(f"crawler_phase_seconds_count{_format_labels(base)} {hist['count']}")
+    names = sorted({name for name, _ in counters})
+    for name in names:
+        lines.append(f"# TYPE {name} counter")
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    # 이미 로드된 모듈의 지표만 포함합니다 (지표 조회 때문에 무거운 모듈을 import 하지 않도록).
+    slack_queue_module = sys.modules.get("slack_queue")
+    if slack_queue_module is not None:
+        for name, value in sorted(slack_queue_module.slack_queue.snapshot().items()):
+            if isinstance(value, (int, float)):
+                # 평균 전송 시간은 줄어들 수 있으므로 counter 가 아닌 gauge 입니다.
+                kind = "gauge" if name in ("queue_depth", "avg_delivery_seconds") else "counter"
+                lines.append(f"# TYPE slack_{name} {kind}")
+                lines.append(f"slack_{name} {value}")
+    waits_module = sys.modules.get("waits")
+    if waits_module is not None:
+        stats = waits_module.wait_stats()
+        if stats:
+            lines.append("# TYPE crawler_wait_seconds_avg gauge")
+            for name, stat in sorted(stats.items()):
+                lines.append(f'crawler_wait_seconds_avg{{condition="{name}"}} {stat["avg"]}')
+            lines.append("# TYPE crawler_wait_timeouts_total counter")
+            for name, stat in sorted(stats.items()):
+                lines.append(f'crawler_wait_timeouts_total{{condition="{name}"}} {stat["timeouts"]}')
+    return "\n".join(lines) + "\n"
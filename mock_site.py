@@ -0,0 +1,254 @@
+import hashlib
+import html
+import random
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# --- 가짜 FuiouPay 사이트 ---
+# 실제 사이트 대신 로그인 페이지(#username/#password/#btn-login)와
+# 페이지네이션(.pagination)이 있는 계약 테이블을 제공하는 로컬 서버입니다.
+# 크롤러는 FUIOUPAY_BASE_URL 을 이 서버 주소로 설정해 사용합니다.
+
+DEFAULT_CONFIG = {
+    # 계정당 가맹점 수
+    "merchants": 50,
+    # 한 페이지 행 수 (pageSize 파라미터로 max_page_size 까지 늘릴 수 있음)
+    "per_page": 20,
+    "max_page_size": 100,
+    # 페이지네이션에 보이는 페이지 링크 수 (0 이면 모두 표시)
+    "page_window": 0,
+    # 서버 응답 지연(초)
+    "response_delay": 0.0,
+    # 테이블을 JavaScript 로 늦게 그리는 시간(초)
+    "render_delay": 0.0,
+    # 계약 페이지 요청이 500 으로 실패할 확률과 항상 실패하는 페이지 번호
+    "fail_rate": 0.0,
+    "fail_pages": (),
+    # 로그인 실패 확률
+    "login_fail_rate": 0.0,
+    # 잔액이 0 인 가맹점 비율
+    "zero_ratio": 0.6,
+    "seed": 0
+}
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Login</title></head>
+<body>
+<form method="post" action="/login">
+  <input type="hidden" name="returnUrl" value="{return_url}">
+  <input id="username" name="username" type="text">
+  <input id="password" name="password" type="password">
+  <button id="btn-login" type="submit">로그인</button>
+</form>
+</body></html>"""
+
+CONTRACTS_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Contracts</title></head>
+<body>
+<div class="summary">총 <span class="total-count">{total}</span>건</div>
+<div id="table-area">{table}</div>
+<ul class="pagination">{pagination}</ul>
+{script}
+</body></html>"""
+
+# render_delay 가 있으면 테이블을 template 에 넣어 두고 늦게 그립니다.
+RENDER_SCRIPT = """<script>
+setTimeout(function () {{
+  var area = document.getElementById('table-area');
+  area.innerHTML = document.getElementById('table-template').innerHTML;
+}}, {delay_ms});
+</script>"""
+
+HEADER = ["번호", "계약번호", "가맹점명", "시작일", "종료일", "CPC잔액"]
+
+
+def merchants_for(username, config):
+    """계정별로 항상 같은 가맹점 목록 [(이름, 잔액)] 을 만듭니다."""
+    seed = int(hashlib.sha1(f"{config['seed']}:{username}".encode("utf-8")).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    merchants = []
+    for i in range(config["merchants"]):
+        balance = 0.0 if rng.random() < config["zero_ratio"] else round(rng.uniform(100, 5000), 2)
+        merchants.append((f"가맹점-{username[-4:]}-{i:05d}", balance))
+    return merchants
+
+
+def render_table(rows, start):
+    lines = ["<table class=\"table\">", "<tr>" + "".join(f"<th>{h}</th>" for h in HEADER) + "</tr>"]
+    for offset, (name, balance) in enumerate(rows):
+        number = start + offset + 1
+        cells = [
+            str(number), f"C{number:08d}", html.escape(name),
+            "2025-01-01", "2025-12-31", f"{balance:,.2f} RMB"
+        ]
+        lines.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+    lines.append("</table>")
+    return "\n".join(lines)
+
+
+def render_pagination(page, total_pages, page_size, config):
+    size_param = f"&pageSize={page_size}" if page_size != config["per_page"] else ""
+    window = config["page_window"] or total_pages
+    first = max(1, min(page - window // 2, total_pages - window + 1))
+    items = []
+    if page > 1:
+        items.append(f'<li class="prev"><a href="?page={page - 1}{size_param}">&lt;</a></li>')
+    for n in range(first, min(total_pages, first + window - 1) + 1):
+        active = ' class="active"' if n == page else ""
+        items.append(f'<li{active}><a href="?page={n}{size_param}">{n}</a></li>')
+    if page < total_pages:
+        items.append(f'<li class="next"><a href="?page={page + 1}{size_param}">&gt;</a></li>')
+    return "".join(items)
+
+
+class MockSite:
+    """설정을 바꿔 가며 쓸 수 있는 가짜 FuiouPay 서버"""
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.config = dict(DEFAULT_CONFIG)
+        self.configure(**config)
+        self.lock = threading.Lock()
+        # 세션 쿠키 -> 사용자명
+        self.sessions = {}
+        self.requests = {"login": 0, "contracts": 0, "failures": 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, **config):
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"알 수 없는 설정: {', '.join(sorted(unknown))}")
+        self.config.update(config)
+        self.config["fail_pages"] = set(self.config["fail_pages"])
+        self.rng = random.Random(self.config["seed"])
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="mock-site", daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self, name):
+        with self.lock:
+            self.requests[name] += 1
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body="", headers=None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _redirect(self, location, headers=None):
+                self._send(302, "", dict(headers or {}, Location=location))
+
+            def _user(self):
+                for part in self.headers.get("Cookie", "").split(";"):
+                    name, _, value = part.strip().partition("=")
+                    if name == "MOCKSESSION":
+                        with site.lock:
+                            return site.sessions.get(value)
+                return None
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = dict(parse_qsl(url.query))
+                config = site.config
+                if config["response_delay"]:
+                    time.sleep(config["response_delay"])
+                if url.path == "/login":
+                    return self._send(200, LOGIN_PAGE.format(return_url=html.escape(query.get("returnUrl", "/index"))))
+                user = self._user()
+                if user is None:
+                    return self._redirect("/login?returnUrl=" + url.path)
+                if url.path == "/index":
+                    return self._send(200, f"<html><body><h1>{html.escape(user)}</h1></body></html>")
+                if url.path == "/agent/dianping/contracts":
+                    return self._contracts(user, query, config)
+                self._send(404, "not found")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = dict(parse_qsl(self.rfile.read(length).decode("utf-8")))
+                if urlsplit(self.path).path != "/login":
+                    return self._send(404, "not found")
+                site._count("login")
+                username = form.get("username", "")
+                if not username or not form.get("password") or site.rng.random() < site.config["login_fail_rate"]:
+                    return self._redirect("/login?error=1")
+                token = secrets.token_hex(16)
+                with site.lock:
+                    site.sessions[token] = username
+                self._redirect(form.get("returnUrl") or "/index", {"Set-Cookie": f"MOCKSESSION={token}; Path=/; HttpOnly"})
+
+            def _contracts(self, user, query, config):
+                site._count("contracts")
+                merchants = merchants_for(user, config)
+                try:
+                    page = max(1, int(query.get("page", 1)))
+                    page_size = min(config["max_page_size"], max(1, int(query.get("pageSize", config["per_page"]))))
+                except ValueError:
+                    return self._send(400, "bad request")
+                total_pages = max(1, -(-len(merchants) // page_size))
+                page = min(page, total_pages)
+                if page in config["fail_pages"] or site.rng.random() < config["fail_rate"]:
+                    site._count("failures")
+                    return self._send(500, "<html><body>Internal Server Error</body></html>")
+                start = (page - 1) * page_size
+                table = render_table(merchants[start:start + page_size], start)
+                script = ""
+                if config["render_delay"]:
+                    script = f'<template id="table-template">{table}</template>' + RENDER_SCRIPT.format(
+                        delay_ms=int(config["render_delay"] * 1000)
+                    )
+                    table = ""
+                self._send(200, CONTRACTS_PAGE.format(
+                    total=len(merchants),
+                    table=table,
+                    pagination=render_pagination(page, total_pages, page_size, config),
+                    script=script
+                ))
+
+        return Handler
+
+
+# --- 명령줄 실행 ---
+# python mock_site.py [포트] [설정=값 ...]   예) python mock_site.py 8000 merchants=500 render_delay=0.2
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    overrides = {}
+    for arg in sys.argv[2:]:
+        name, _, value = arg.partition("=")
+        default = DEFAULT_CONFIG.get(name)
+        if isinstance(default, tuple):
+            overrides[name] = tuple(int(v) for v in value.split(",") if v)
+        elif default is not None:
+            overrides[name] = type(default)(value)
+        else:
+            overrides[name] = value
+    site = MockSite(port=port, **overrides)
+    print(f"가짜 FuiouPay 사이트: {site.base_url} (FUIOUPAY_BASE_URL 로 설정하세요)")
+    site.server.serve_forever()
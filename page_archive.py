@@ -0,0 +1,246 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from extraction import contracts_table_html, find_contracts_rows, rows_to_merchants
+
+# --- 설정 ---
+# 1 이면 수집한 계약 페이지의 테이블 HTML 을 보관합니다 (파싱 수정 후 replay 로 이력 재구성).
+RECORD_PAGES = os.getenv("RECORD_PAGES", "0") == "1"
+# 보관 디렉터리. objects/ 에 내용 해시로 압축한 HTML, manifests/<계정>/<날짜>.json 에 페이지 -> 해시
+PAGE_ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", "page_archive")
+# replay 에 쓸 프로세스 수 (기본: CPU 수)
+REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", str(os.cpu_count() or 1)))
+# 프로세스 하나에 한 번에 넘기는 보관 HTML 수
+REPLAY_CHUNK_PAGES = int(os.getenv("REPLAY_CHUNK_PAGES", "64"))
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def object_path(archive_dir, digest):
+    return os.path.join(archive_dir, "objects", digest[:2], f"{digest}.html.gz")
+
+
+def manifest_path(archive_dir, account, date):
+    return os.path.join(archive_dir, "manifests", account, f"{date}.json")
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def store_object(archive_dir, html):
+    """HTML 을 내용 해시(sha256) 이름으로 압축 저장하고 해시를 반환합니다. 같은 내용은 한 번만 저장됩니다."""
+    data = html.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(archive_dir, digest)
+    if not os.path.exists(path):
+        # mtime=0 으로 같은 내용이면 같은 압축 파일이 되게 합니다.
+        _write_atomic(path, gzip.compress(data, compresslevel=6, mtime=0))
+    return digest
+
+
+def load_object(archive_dir, digest):
+    with open(object_path(archive_dir, digest), "rb") as f:
+        return gzip.decompress(f.read()).decode("utf-8")
+
+
+class PageRecorder:
+    """계정 하나의 하루치 계약 페이지를 보관합니다.
+
+    페이지를 받을 때마다 테이블 HTML 을 압축해 저장하고(내용이 같으면 건너뜀),
+    save() 에서 그날의 페이지 -> 해시 목록(manifest)을 씁니다.
+    """
+
+    def __init__(self, account, date, source, archive_dir=None):
+        self.account = account
+        self.date = date
+        self.source = source
+        self.archive_dir = archive_dir or PAGE_ARCHIVE_DIR
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.stored_bytes = 0
+
+    def add(self, page, html):
+        """페이지 HTML(전체 문서 또는 테이블)을 보관합니다. 실패해도 수집은 계속합니다."""
+        try:
+            table_html = contracts_table_html(html) or html
+            digest = store_object(self.archive_dir, table_html)
+        except Exception as e:
+            print(f"  [{self.account}] {page}페이지 HTML 보관 실패: {e}")
+            return
+        with self.lock:
+            self.pages[page] = digest
+            self.stored_bytes += len(table_html)
+
+    def save(self, total_pages=None):
+        """manifest 를 씁니다. 같은 날 이전 기록의 페이지는 이번에 다시 받지 않은 것만 남깁니다."""
+        if not self.pages:
+            return None
+        path = manifest_path(self.archive_dir, self.account, self.date)
+        pages = read_manifest(path).get("pages", {}) if os.path.exists(path) else {}
+        with self.lock:
+            pages.update({str(page): digest for page, digest in self.pages.items()})
+        if total_pages:
+            # 페이지 수가 줄었으면 이전 기록의 뒤쪽 페이지를 버립니다.
+            pages = {page: digest for page, digest in pages.items() if int(page) <= total_pages}
+        manifest = {
+            "account": self.account,
+            "date": self.date,
+            "source": self.source,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pages": dict(sorted(pages.items(), key=lambda item: int(item[0])))
+        }
+        try:
+            _write_atomic(path, json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+        except OSError as e:
+            print(f"[{self.account}] 페이지 보관 목록 저장 실패: {e}")
+            return None
+        print(f"[{self.account}] {len(self.pages)}개 페이지 HTML 을 보관했습니다 ({self.stored_bytes / 1024:.0f}KB, {self.archive_dir})")
+        return path
+
+
+def read_manifest(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_manifests(archive_dir=None, accounts=None, start_date=None, end_date=None):
+    """보관된 (계정, 날짜, manifest 경로) 목록 (계정, 날짜 순)"""
+    archive_dir = archive_dir or PAGE_ARCHIVE_DIR
+    root = os.path.join(archive_dir, "manifests")
+    if not os.path.isdir(root):
+        return []
+    found = []
+    for account in sorted(os.listdir(root)):
+        if accounts and account not in accounts:
+            continue
+        for name in sorted(os.listdir(os.path.join(root, account))):
+            date = name[:-len(".json")]
+            if not name.endswith(".json") or not DATE_PATTERN.fullmatch(date):
+                continue
+            if (start_date and date < start_date) or (end_date and date > end_date):
+                continue
+            found.append((account, date, os.path.join(root, account, name)))
+    return found
+
+
+# --- replay ---
+def parse_objects(archive_dir, digests):
+    """보관된 HTML 들을 수집 때와 같은 추출 코드로 파싱합니다 (프로세스 풀에서 실행).
+
+    해시 -> [(가맹점, 잔액)] (테이블이 없으면 None) 을 반환합니다. 페이지 번호와 날짜는 호출한 쪽에서 붙입니다.
+    """
+    parsed = {}
+    for digest in digests:
+        try:
+            rows = find_contracts_rows(load_object(archive_dir, digest))
+        except (OSError, ValueError) as e:
+            print(f"  {digest[:12]} 읽기 실패: {e}")
+            rows = None
+        parsed[digest] = None if rows is None else [
+            (row["가맹점명"], row["CPC잔액"]) for row in rows_to_merchants(rows, 0, "")
+        ]
+    return parsed
+
+
+def replay(accounts=None, start_date=None, end_date=None, archive_dir=None, store=None, workers=None):
+    """보관된 페이지를 여러 프로세스로 다시 파싱해 그날 이력을 통째로 바꿉니다 (브라우저/네트워크 없음).
+
+    내용이 같은 페이지(같은 해시)는 날짜가 달라도 한 번만 파싱합니다.
+    파싱에 실패한 페이지가 있는 날짜는 기존 이력을 그대로 둡니다.
+    바뀐 계정은 가맹점 인덱스와 잔액 통계를 다시 계산합니다. 처리 결과 dict 를 반환합니다.
+    """
+    from analytics import rebuild_stats
+    from history_store import history_store
+
+    archive_dir = archive_dir or PAGE_ARCHIVE_DIR
+    store = store or history_store
+    workers = max(1, workers or REPLAY_WORKERS)
+    start = time.time()
+
+    # (계정, 날짜) -> [(페이지, 해시)]
+    manifests = {}
+    for account, date, path in list_manifests(archive_dir, accounts, start_date, end_date):
+        manifests[(account, date)] = [
+            (int(page), digest) for page, digest in read_manifest(path).get("pages", {}).items()
+        ]
+    total_pages = sum(len(pages) for pages in manifests.values())
+    if not total_pages:
+        print(f"보관된 페이지가 없습니다 ({archive_dir}).")
+        return {"dates": 0, "pages": 0, "objects": 0, "merchants": 0, "skipped_dates": [], "seconds": 0.0}
+
+    digests = sorted({digest for pages in manifests.values() for _, digest in pages})
+    chunks = [digests[offset:offset + REPLAY_CHUNK_PAGES] for offset in range(0, len(digests), REPLAY_CHUNK_PAGES)]
+    parsed = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(chunks) > 1 else None
+    try:
+        results = executor.map(parse_objects, [archive_dir] * len(chunks), chunks) if executor else (
+            parse_objects(archive_dir, chunk) for chunk in chunks
+        )
+        for result in results:
+            parsed.update(result)
+    finally:
+        if executor:
+            executor.shutdown()
+    parse_seconds = time.time() - start
+
+    rebuilt, skipped = {}, []
+    for (account, date), pages in manifests.items():
+        failed = sorted(page for page, digest in pages if parsed.get(digest) is None)
+        if failed:
+            print(f"[{account}] {date}: {failed}페이지를 파싱하지 못해 기존 이력을 유지합니다.")
+            skipped.append(f"{account}:{date}")
+            continue
+        rebuilt.setdefault(account, {})[date] = [
+            (merchant, balance, page)
+            for page, digest in sorted(pages)
+            for merchant, balance in parsed[digest]
+        ]
+    written = 0
+    for account, account_days in rebuilt.items():
+        written += store.replace_dates(account, account_days)
+        rebuild_stats(account, store)
+        print(f"[{account}] {len(account_days)}일치 이력을 다시 만들었습니다.")
+
+    seconds = time.time() - start
+    print(
+        f"{total_pages}개 페이지(고유 {len(digests)}개) 파싱 {parse_seconds:.2f}초 "
+        f"({total_pages / max(parse_seconds, 1e-9):,.0f}페이지/초, 프로세스 {workers}개), "
+        f"전체 {seconds:.2f}초, {written}행 저장"
+    )
+    return {
+        "dates": sum(len(account_days) for account_days in rebuilt.values()),
+        "pages": total_pages,
+        "objects": len(digests),
+        "merchants": written,
+        "skipped_dates": skipped,
+        "seconds": round(seconds, 3)
+    }
+
+
+if __name__ == "__main__":
+    # python page_archive.py list [계정 ...]
+    # python page_archive.py replay [시작일 [종료일]] [계정 ...]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("list", "replay"):
+        print("사용법: python page_archive.py list [계정 ...]")
+        print("       python page_archive.py replay [시작일 [종료일]] [계정 ...]")
+        sys.exit(1)
+    args = sys.argv[2:]
+    dates = [arg for arg in args if DATE_PATTERN.fullmatch(arg)]
+    names = [arg for arg in args if arg not in dates] or None
+    if sys.argv[1] == "list":
+        for account, date, path in list_manifests(accounts=names):
+            print(f"{account}\t{date}\t{len(read_manifest(path).get('pages', {}))}페이지")
+    else:
+        replay(names, dates[0] if dates else None, dates[1] if len(dates) > 1 else None)
@@ -0,0 +1,267 @@
+import hashlib
+import math
+import os
+import re
+from urllib.parse import urlencode, urljoin, urlsplit, parse_qsl, urlunsplit
+
+from selenium.webdriver.common.by import By
+
+from extraction import MIN_COLUMNS
+
+# --- 설정 ---
+# 페이지 번호 / 페이지 크기 쿼리 파라미터 이름
+CONTRACTS_PAGE_PARAM = os.getenv("CONTRACTS_PAGE_PARAM", "page")
+CONTRACTS_PAGE_SIZE_PARAM = os.getenv("CONTRACTS_PAGE_SIZE_PARAM", "pageSize")
+# 한 페이지에 요청할 최대 행 수 (사이트가 지원하면 요청 수가 줄어듭니다). 0 이면 요청하지 않습니다.
+CONTRACTS_MAX_PAGE_SIZE = int(os.getenv("CONTRACTS_MAX_PAGE_SIZE", "100"))
+# 전체 페이지 수를 알 수 없을 때 따라갈 최대 페이지 수 (무한 반복 방지)
+PAGINATION_MAX_PAGES = int(os.getenv("PAGINATION_MAX_PAGES", "2000"))
+# 페이지 하나를 불러오지 못했을 때 다시 시도할 횟수와 첫 대기 시간(초, 시도마다 두 배)
+PAGE_RETRIES = int(os.getenv("PAGE_RETRIES", "2"))
+PAGE_RETRY_BACKOFF = float(os.getenv("PAGE_RETRY_BACKOFF", "1"))
+
+# 전체 건수 표시 ("총 1,234건", "Total: 1234", "共 1234 条")
+TOTAL_PATTERNS = [
+    re.compile(r"총\s*([\d,]+)\s*(?:건|개)"),
+    re.compile(r"(?:total|records)\s*[:：]?\s*([\d,]+)", re.IGNORECASE),
+    re.compile(r"共\s*([\d,]+)\s*条")
+]
+NEXT_TEXTS = {">", "›", "다음", "next", "下一页"}
+LAST_TEXTS = {"»", ">>", "마지막", "last", "末页", "尾页"}
+
+# 페이지네이션 링크, 전체 건수 문구, 데이터 행 수를 한 번의 호출로 읽습니다.
+PAGINATION_SCRIPT = """
+var minColumns = arguments[0];
+var out = {links: [], text: '', rows: 0};
+var table = document.querySelector('table');
+if (table) {
+    var trs = table.querySelectorAll('tr');
+    for (var i = 0; i < trs.length; i++) {
+        if (trs[i].querySelectorAll('td').length >= minColumns) out.rows++;
+    }
+}
+var pagination = document.querySelector('.pagination');
+if (pagination) {
+    var anchors = pagination.querySelectorAll('a');
+    for (var j = 0; j < anchors.length; j++) {
+        var a = anchors[j];
+        var parent = a.parentElement;
+        out.links.push({
+            text: a.textContent.trim(),
+            href: a.getAttribute('href'),
+            rel: a.getAttribute('rel') || '',
+            cls: (a.className || '') + ' ' + (parent ? parent.className || '' : '')
+        });
+    }
+}
+// 전체 건수 문구는 테이블 밖의 글자에서만 찾습니다 (헤더 "Total" 다음 셀 "1" 이 건수로 읽히지 않도록).
+var parts = [];
+if (document.body) {
+    var walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+        acceptNode: function (node) {
+            if (node.nodeType === 3) return NodeFilter.FILTER_ACCEPT;
+            return /^(TABLE|SCRIPT|STYLE|NOSCRIPT)$/.test(node.tagName) ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_SKIP;
+        }
+    });
+    while (walker.nextNode()) {
+        var value = walker.currentNode.nodeValue.trim();
+        if (value) parts.push(value);
+    }
+}
+var summary = parts.join(' ');
+out.text = summary.length > 20000 ? summary.slice(0, 10000) + ' ' + summary.slice(-10000) : summary;
+return out;
+"""
+
+
+class DuplicatePageError(Exception):
+    """이동한 페이지의 내용이 이미 수집한 페이지와 같을 때 (페이지 이동이 실제로 되지 않음)"""
+
+
+class PaginationInfo:
+    """계약 페이지 1페이지에서 읽은 페이지 구성"""
+
+    def __init__(self, total_pages=1, total_records=None, page_size=0, page_links=None,
+                 exact=True, has_next=False, url_navigation=False):
+        self.total_pages = total_pages
+        self.total_records = total_records
+        self.page_size = page_size
+        # 페이지 번호 -> 링크 href (화면에 보이는 링크만)
+        self.page_links = page_links or {}
+        # 전체 페이지 수를 건수나 마지막 링크로 확인했는지 (아니면 "다음" 링크를 따라가며 확인)
+        self.exact = exact
+        self.has_next = has_next
+        # 링크가 실제 URL 이라 주소로 바로 이동할 수 있는지
+        self.url_navigation = url_navigation
+
+    def describe(self):
+        kind = "확정" if self.exact else "최소, 다음 링크로 추가 확인"
+        records = f", 전체 {self.total_records}건" if self.total_records is not None else ""
+        return f"{self.total_pages}페이지({kind}), 페이지당 {self.page_size}행{records}"
+
+
+def parse_total_records(text):
+    """화면 문구에서 전체 건수를 찾습니다. 없으면 None."""
+    for pattern in TOTAL_PATTERNS:
+        match = pattern.search(text or "")
+        if match:
+            return int(match.group(1).replace(",", ""))
+    return None
+
+
+def is_url_href(href):
+    return bool(href) and not href.startswith(("javascript:", "#"))
+
+
+def page_number_from_href(href):
+    """링크 주소의 페이지 번호 파라미터. 없으면 None."""
+    if not is_url_href(href):
+        return None
+    value = dict(parse_qsl(urlsplit(href).query)).get(CONTRACTS_PAGE_PARAM)
+    return int(value) if value and value.isdigit() else None
+
+
+def _link_kind(link):
+    text = link["text"].strip().lower()
+    cls = link.get("cls", "").lower().split()
+    if text.isdigit():
+        return "page"
+    if "disabled" in cls:
+        return None
+    if "next" in link.get("rel", "").lower() or "next" in cls or text in NEXT_TEXTS:
+        return "next"
+    if "last" in cls or text in LAST_TEXTS:
+        return "last"
+    return None
+
+
+def pagination_from_data(data):
+    """PAGINATION_SCRIPT 결과로 전체 페이지 수를 정합니다.
+
+    1. 전체 건수 / 페이지당 행 수 (보이는 링크보다 적은 페이지를 가리키면 무시)
+    2. "마지막" 링크의 페이지 번호
+    3. 보이는 숫자 링크 중 최대값 (다음 링크가 있으면 확정하지 않음)
+    """
+    page_links, last_page, has_next = {}, None, False
+    for link in data.get("links", []):
+        kind = _link_kind(link)
+        if kind == "page":
+            page_links[int(link["text"])] = link.get("href")
+        elif kind == "next":
+            has_next = True
+        elif kind == "last":
+            last_page = page_number_from_href(link.get("href"))
+    page_size = data.get("rows", 0)
+    total_records = parse_total_records(data.get("text"))
+    visible_max = max(page_links) if page_links else 1
+    url_navigation = any(page_number_from_href(href) is not None for href in page_links.values())
+    info = PaginationInfo(
+        page_links=page_links, page_size=page_size, total_records=total_records,
+        has_next=has_next, url_navigation=url_navigation
+    )
+    counted = max(1, math.ceil(total_records / page_size)) if total_records is not None and page_size else None
+    if counted is not None and counted < visible_max:
+        # 건수로 계산한 페이지 수가 보이는 링크보다 적으면 건수를 잘못 읽은 것으로 보고 링크로 판단합니다.
+        print(f"전체 건수({total_records}건)가 보이는 페이지 링크({visible_max}페이지)와 맞지 않아 무시합니다.")
+        counted = None
+        info.total_records = None
+    if counted is not None:
+        info.total_pages = counted
+    elif last_page:
+        info.total_pages = max(last_page, visible_max)
+    else:
+        info.total_pages = visible_max
+        # 다음 링크가 있으면 보이지 않는 페이지가 더 있을 수 있습니다.
+        info.exact = not has_next
+    return info
+
+
+def read_pagination(driver):
+    """현재(1페이지) 화면에서 페이지 구성을 읽습니다."""
+    return pagination_from_data(driver.execute_script(PAGINATION_SCRIPT, MIN_COLUMNS) or {})
+
+
+def has_next_page(driver):
+    """현재 화면에 활성화된 "다음" 링크가 있는지"""
+    data = driver.execute_script(PAGINATION_SCRIPT, MIN_COLUMNS) or {}
+    return any(_link_kind(link) == "next" for link in data.get("links", []))
+
+
+def page_url(contracts_url, page, page_links=None, page_size=None):
+    """페이지 번호의 URL. 페이지네이션 링크의 href 가 있으면 그것을 우선 사용합니다."""
+    href = (page_links or {}).get(page)
+    url = urljoin(contracts_url, href) if is_url_href(href) else contracts_url
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    if not is_url_href(href):
+        query[CONTRACTS_PAGE_PARAM] = str(page)
+    if page_size:
+        query[CONTRACTS_PAGE_SIZE_PARAM] = str(page_size)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def page_link_xpath(page):
+    """페이지네이션 안에서 텍스트가 정확히 page 인 링크 ("1" 이 "10" 과 맞지 않도록)"""
+    return (
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' pagination ')]"
+        f"//a[normalize-space(.)='{int(page)}']"
+    )
+
+
+def go_to_page(driver, page, info, contracts_url):
+    """브라우저를 page 로 이동시키고 사용한 방법을 반환합니다.
+
+    링크가 실제 URL 이면 주소로 바로 이동하고, 아니면 정확히 일치하는 번호 링크를,
+    번호 링크가 화면 밖이면 "다음" 링크를 누릅니다.
+    """
+    if info.url_navigation:
+        driver.get(page_url(contracts_url, page, info.page_links))
+        return "url"
+    links = driver.find_elements(By.XPATH, page_link_xpath(page))
+    if links:
+        driver.execute_script("arguments[0].click();", links[0])
+        return "link"
+    next_links = [
+        element for element in driver.find_elements(By.CSS_SELECTOR, ".pagination a")
+        if _link_kind({
+            "text": element.text,
+            "rel": element.get_attribute("rel") or "",
+            "cls": f"{element.get_attribute('class') or ''} "
+                   f"{element.find_element(By.XPATH, '..').get_attribute('class') or ''}"
+        }) == "next"
+    ]
+    if not next_links:
+        raise Exception(f"{page}페이지 링크와 다음 링크를 찾을 수 없습니다.")
+    driver.execute_script("arguments[0].click();", next_links[0])
+    return "next"
+
+
+def retry_delay(attempt):
+    """attempt 번째(0부터) 재시도 전 대기 시간"""
+    return min(PAGE_RETRY_BACKOFF * (2 ** attempt), 30)
+
+
+def rows_fingerprint(rows):
+    return hashlib.sha1(repr(rows).encode("utf-8")).hexdigest()
+
+
+class PageFingerprints:
+    """페이지별 내용 지문. 다른 페이지와 같은 내용이 다시 나오면 이동이 실패한 것으로 봅니다."""
+
+    def __init__(self):
+        self.pages = {}
+        # 지문 -> 페이지 (페이지마다 한 번만 찾아봅니다)
+        self.by_fingerprint = {}
+
+    def check(self, page, rows):
+        fingerprint = rows_fingerprint(rows)
+        other = self.by_fingerprint.get(fingerprint)
+        if other is not None and other != page:
+            raise DuplicatePageError(f"{page}페이지 내용이 {other}페이지와 같습니다.")
+        # 같은 페이지를 다시 읽어 내용이 바뀌었으면 이전 지문은 지웁니다.
+        previous = self.pages.get(page)
+        if previous is not None and previous != fingerprint:
+            self.by_fingerprint.pop(previous, None)
+        self.pages[page] = fingerprint
+        self.by_fingerprint[fingerprint] = page
+        return fingerprint
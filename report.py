@@ -0,0 +1,171 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics import depleting
+
+# --- 슬랙 요약 메시지 ---
+# 하루치 이력(DataFrame: 가맹점명 category, CPC잔액 float64)으로 보고서를 만듭니다.
+# 행마다 Python 루프를 돌지 않고 열 단위 연산으로 각 목록을 만든 뒤 한 번에 이어 붙입니다.
+
+NEW_MARK = " 🆕"
+
+
+def _new_marks(names, new_merchants):
+    return np.where(names.isin(list(new_merchants)), NEW_MARK, "")
+
+
+def _formatted(values, fmt):
+    """숫자 열을 fmt 로 바꾼 문자열 열 (NaN 은 빈 문자열)"""
+    return values.map(lambda value: fmt.format(value) if pd.notna(value) else "")
+
+
+def stats_notes(names, stats):
+    """가맹점별 " (전일 -120 · 7일 평균 300/일 · 약 4일 남음)" 문구 (통계가 없으면 빈 문자열)"""
+    if stats is None or stats.empty:
+        return ""
+    aligned = stats.reindex(names.to_numpy())
+    aligned.index = names.index
+    note = _formatted(aligned["delta"], "전일 {:+,.0f}").str.cat(
+        [
+            _formatted(aligned["burn_7"].where(aligned["burn_7"] > 0), "7일 평균 {:,.0f}/일"),
+            _formatted(aligned["burn_30"].where(aligned["burn_30"] > 0), "30일 평균 {:,.0f}/일"),
+            _formatted(aligned["days_left"], "약 {:,.0f}일 남음")
+        ],
+        sep="|"
+    ).str.replace(r"\|+", " · ", regex=True).str.strip(" ·")
+    return np.where(note != "", " (" + note + ")", "")
+
+
+def balance_lines(with_balance, new_merchants, stats=None):
+    """잔액 보유 가맹점 줄 목록 (잔액 내림차순, 정수 RMB 로 표시)"""
+    ordered = with_balance.sort_values("CPC잔액", ascending=False, kind="stable")
+    names = ordered["가맹점명"].astype(str)
+    amounts = np.trunc(ordered["CPC잔액"].to_numpy()).astype("int64")
+    text = " - " + names + ": " + pd.Series(amounts, index=names.index).map("{:,}".format) + " RMB"
+    return (text + stats_notes(names, stats) + _new_marks(names, new_merchants)).tolist()
+
+
+def depletion_lines(alerts):
+    """곧 소진될 가맹점 줄 목록 (analytics.depleting 결과, 남은 일수 오름차순)"""
+    names = pd.Series(alerts.index.astype(str), index=alerts.index)
+    return (
+        " - " + names + ": " + _formatted(alerts["balance"], "{:,.0f}") + " RMB, 하루 "
+        + _formatted(alerts["burn_7"].where(alerts["burn_7"] > 0, alerts["burn_30"]), "{:,.0f}")
+        + " 소진, 약 " + _formatted(alerts["days_left"], "{:.1f}") + "일 남음"
+    ).tolist()
+
+
+def zero_balance_lines(zero_balance, new_merchants):
+    """잔액 소진 가맹점 줄 목록 (저장소 순서 = 가맹점명 오름차순)"""
+    names = zero_balance["가맹점명"].astype(str)
+    return (" - " + names + _new_marks(names, new_merchants)).tolist()
+
+
+def build_summary(today_data, current_date, new_merchants=(), disappeared_merchants=None, missing_pages=(),
+                  stats=None, alert_days=0):
+    """하루치 데이터로 슬랙 요약 메시지를 만듭니다.
+
+    stats 는 analytics.update_stats 결과(index: 가맹점명)로, 있으면 가맹점마다 잔액 변화와 소진율을 붙이고
+    alert_days 일 안에 소진될 것으로 보이는 가맹점을 따로 모아 보여줍니다.
+    """
+    new_merchants = set(new_merchants)
+    disappeared_merchants = disappeared_merchants or {}
+    balances = today_data["CPC잔액"]
+    with_balance = today_data[balances > 0]
+    zero_balance = today_data[balances == 0]
+    alerts = depleting(stats, alert_days) if stats is not None else None
+
+    if missing_pages:
+        title = f"⚠️ *({current_date}) CPC 잔액 현황 (일부 페이지 누락)*"
+    else:
+        title = f"✅ *({current_date}) CPC 잔액 현황*"
+    parts = [
+        title,
+        "",
+        f"• 총 {len(today_data)}개 가맹점 데이터 추출",
+        f"• CPC 잔액 보유 가맹점: *{len(with_balance)}개*"
+    ]
+    if missing_pages:
+        parts.append(
+            f"• 수집하지 못한 페이지: *{', '.join(str(p) for p in missing_pages)}* "
+            f"(해당 페이지의 가맹점은 이 보고에서 빠졌습니다)"
+        )
+    if new_merchants:
+        parts.append(f"• 신규 가맹점: *{len(new_merchants)}개*")
+    if disappeared_merchants:
+        parts.append(f"• 사라진 가맹점: *{len(disappeared_merchants)}개*")
+    if alerts is not None and not alerts.empty:
+        parts.append(f"• {alert_days:g}일 안에 소진 예상: *{len(alerts)}개*")
+
+    if alerts is not None and not alerts.empty:
+        parts += ["", f"*⏳ {alert_days:g}일 안에 소진 예상 가맹점:*"]
+        parts += depletion_lines(alerts)
+    parts += ["", "*CPC 잔액 보유 가맹점 목록:*"]
+    parts += balance_lines(with_balance, new_merchants, stats) if not with_balance.empty else [" - 없음"]
+    parts += ["", "*CPC 잔액 소진완료 가맹점 목록:*"]
+    parts += zero_balance_lines(zero_balance, new_merchants) if not zero_balance.empty else [" - 없음"]
+    if new_merchants:
+        parts += ["", "*신규 가맹점 목록:*"]
+        parts += [f" - {merchant}" for merchant in sorted(new_merchants)]
+    if disappeared_merchants:
+        parts += ["", "*목록에서 사라진 가맹점:*"]
+        parts += [f" - {merchant} (최초 확인 {first_seen})" for merchant, first_seen in sorted(disappeared_merchants.items())]
+    return "\n".join(parts) + "\n"
+
+
+# --- 마이크로 벤치마크 ---
+def synthetic_history(rows, seed=0):
+    """rows 개 가맹점의 하루치 합성 이력 (60% 는 잔액 0)"""
+    from history_store import typed_frame
+    rng = np.random.default_rng(seed)
+    balances = np.where(rng.random(rows) < 0.6, 0.0, np.round(rng.uniform(100, 5000, rows), 2))
+    names = [f"가맹점{i:06d}" for i in range(rows)]
+    return typed_frame(list(zip(names, balances, np.ones(rows, dtype=int), ["2025-01-01"] * rows)))
+
+
+def _iterrows_summary(today_data, new_merchants):
+    """비교용: 문자열 열에 pd.to_numeric/iterrows/+= 를 쓰던 이전 방식"""
+    today_data = today_data.assign(CPC잔액=today_data["CPC잔액"].map("{:.2f}".format))
+    with_balance = today_data[pd.to_numeric(today_data["CPC잔액"]) > 0]
+    zero_balance = today_data[pd.to_numeric(today_data["CPC잔액"]) == 0]
+    message = ""
+    for _, row in with_balance.sort_values(by="CPC잔액", key=pd.to_numeric, ascending=False).iterrows():
+        new_mark = NEW_MARK if row["가맹점명"] in new_merchants else ""
+        message += f" - {row['가맹점명']}: {int(float(row['CPC잔액'])):,} RMB{new_mark}\n"
+    for _, row in zero_balance.iterrows():
+        new_mark = NEW_MARK if row["가맹점명"] in new_merchants else ""
+        message += f" - {row['가맹점명']}{new_mark}\n"
+    return message
+
+
+def benchmark(rows=100_000, repeat=3):
+    """합성 이력으로 요약 생성 시간을 재고, 이전(iterrows) 방식과 비교합니다."""
+    today_data = synthetic_history(rows)
+    new_merchants = set(today_data["가맹점명"].astype(str).sample(frac=0.01, random_state=0))
+    results = {}
+    for name, fn in (
+        ("vectorized", lambda: build_summary(today_data, "2025-01-01", new_merchants)),
+        ("iterrows", lambda: _iterrows_summary(today_data, new_merchants))
+    ):
+        best = None
+        for _ in range(repeat if name == "vectorized" else 1):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = round(best, 3)
+    results["speedup"] = round(results["iterrows"] / results["vectorized"], 1) if results["vectorized"] else None
+    return results
+
+
+# python report.py bench [행 수]
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "bench":
+        print("사용법: python report.py bench [행 수]")
+        sys.exit(1)
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    result = benchmark(rows)
+    print(f"{rows:,}행 요약 생성: 열 연산 {result['vectorized']}초, iterrows {result['iterrows']}초 ({result['speedup']}배)")
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# --- 설정 ---
+# 메모리에 보관할 최근 실행 수
+RUN_HISTORY_SIZE = int(os.getenv("RUN_HISTORY_SIZE", "50"))
+# 지정하면 끝난 실행을 JSON Lines 로 추가 저장하고, 시작 시 최근 실행을 다시 읽습니다.
+RUN_HISTORY_FILE = os.getenv("RUN_HISTORY_FILE", "")
+# 오류 메시지는 이 길이까지만 보관합니다.
+MAX_ERROR_LENGTH = 500
+
+
+class AccountRun:
+    """실행 하나에서 계정 하나의 결과"""
+
+    __slots__ = ("account", "status", "start_time", "end_time", "duration",
+                 "pages", "merchants", "new_merchants", "missing_pages", "error",
+                 "bytes_transferred", "blocked_requests", "peak_rss_mb", "memory_restarts", "artifacts")
+
+    def __init__(self, account, status="queued"):
+        self.account = account
+        self.status = status
+        self.start_time = None
+        self.end_time = None
+        self.duration = None
+        self.pages = None
+        self.merchants = None
+        self.new_merchants = None
+        self.missing_pages = None
+        self.error = None
+        self.bytes_transferred = None
+        self.blocked_requests = None
+        self.peak_rss_mb = None
+        self.memory_restarts = None
+        self.artifacts = None
+
+    def update(self, fields):
+        for name in self.__slots__:
+            if name in fields:
+                value = fields[name]
+                if name == "error" and value:
+                    value = str(value)[:MAX_ERROR_LENGTH]
+                setattr(self, name, value)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Run:
+    """크롤링 실행 하나 (여러 계정)"""
+
+    __slots__ = ("id", "trigger", "status", "start_time", "end_time", "accounts")
+
+    def __init__(self, run_id, trigger, account_names):
+        self.id = run_id
+        self.trigger = trigger
+        self.status = "running"
+        self.start_time = time.time()
+        self.end_time = None
+        self.accounts = {name: AccountRun(name) for name in account_names}
+
+    def summary(self):
+        counts = {}
+        for acc in self.accounts.values():
+            counts[acc.status] = counts.get(acc.status, 0) + 1
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "status": self.status,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": round(self.end_time - self.start_time, 2) if self.end_time else None,
+            "account_status": counts
+        }
+
+    def to_dict(self):
+        data = self.summary()
+        data["accounts"] = {name: acc.to_dict() for name, acc in self.accounts.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        run = cls(data["id"], data.get("trigger"), [])
+        run.status = data.get("status")
+        run.start_time = data.get("start_time")
+        run.end_time = data.get("end_time")
+        for name, fields in data.get("accounts", {}).items():
+            acc = AccountRun(name)
+            acc.update(fields)
+            run.accounts[name] = acc
+        return run
+
+
+class RunRegistry:
+    """최근 N개 실행을 보관하는 스레드 안전한 링 버퍼"""
+
+    def __init__(self, size=None, path=None):
+        self.lock = threading.Lock()
+        self.runs = deque(maxlen=size or RUN_HISTORY_SIZE)
+        self.path = RUN_HISTORY_FILE if path is None else path
+        self._seq = 0
+        # 기록 파일 쓰기/정리용 잠금과 현재 줄 수 (2 × 보관 수를 넘으면 최근 실행만 남기고 다시 씁니다)
+        self.file_lock = threading.Lock()
+        self._file_lines = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                # maxlen 을 넘는 오래된 실행은 deque 가 알아서 버립니다.
+                for line in f:
+                    if line.strip():
+                        self.runs.append(Run.from_dict(json.loads(line)))
+                        self._file_lines += 1
+        except (OSError, ValueError) as e:
+            print(f"실행 기록 읽기 실패({self.path}): {e}")
+
+    def _persist(self, run):
+        if not self.path:
+            return
+        with self.file_lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(run.to_dict(), ensure_ascii=False) + "\n")
+                self._file_lines += 1
+                if self._file_lines > 2 * self.runs.maxlen:
+                    self._compact()
+            except OSError as e:
+                print(f"실행 기록 저장 실패({self.path}): {e}")
+
+    def _compact(self):
+        """기록 파일을 최근 RUN_HISTORY_SIZE 개 실행만 남긴 새 파일로 원자적으로 바꿉니다."""
+        with open(self.path, encoding="utf-8") as f:
+            lines = deque((line for line in f if line.strip()), maxlen=self.runs.maxlen)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.path)
+        self._file_lines = len(lines)
+
+    def start_run(self, trigger, account_names):
+        """새 실행을 등록하고 실행 ID 를 반환합니다."""
+        with self.lock:
+            self._seq += 1
+            run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._seq}"
+            self.runs.append(Run(run_id, trigger, account_names))
+            return run_id
+
+    def _find(self, run_id):
+        for run in self.runs:
+            if run.id == run_id:
+                return run
+        return None
+
+    def update_account(self, run_id, account, fields):
+        """계정 상태를 갱신합니다 (워커 풀의 상태 변경 콜백에서 호출)."""
+        with self.lock:
+            run = self._find(run_id)
+            if run is None:
+                return
+            run.accounts.setdefault(account, AccountRun(account)).update(fields)
+
+    def finish_run(self, run_id, status=None):
+        """실행을 종료 처리합니다. status 를 주지 않으면 계정 결과로 정합니다."""
+        with self.lock:
+            run = self._find(run_id)
+            if run is None:
+                return
+            run.end_time = time.time()
+            if status is None:
+                statuses = [acc.status for acc in run.accounts.values()]
+                # skipped: 샤딩 모드에서 다른 프로세스가 맡은 계정
+                failed = [st for st in statuses if st not in ("success", "partial", "skipped")]
+                if len(failed) == len(statuses) and statuses:
+                    status = "failed"
+                elif failed or "partial" in statuses:
+                    status = "partial"
+                else:
+                    status = "success"
+            run.status = status
+            data = run.to_dict()
+        if self.path:
+            self._persist(Run.from_dict(data))
+
+    def list_runs(self, limit=None):
+        """최근 실행 요약 (최신순)"""
+        with self.lock:
+            runs = list(self.runs)[::-1]
+            if limit:
+                runs = runs[:limit]
+            return [run.summary() for run in runs]
+
+    def get(self, run_id):
+        with self.lock:
+            run = self._find(run_id)
+            return run.to_dict() if run else None
+
+
+# 프로세스 전체에서 공유하는 실행 기록
+run_registry = RunRegistry()
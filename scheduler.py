@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# --- 설정 ---
+# 계정에 schedule 이 없을 때 쓰는 cron 식 (분 시 일 월 요일, 서버 시간 기준).
+# 기본값은 기존과 같은 매일 00:00 (Railway 는 UTC 이므로 한국시간 오전 9시)
+CRAWL_SCHEDULE = os.getenv("CRAWL_SCHEDULE", "0 0 * * *")
+# 계정마다 예정 시각에서 0~이 값(초) 사이로 고르게 늦춰 한꺼번에 로그인하지 않도록 합니다.
+SCHEDULE_STAGGER_SECONDS = int(os.getenv("SCHEDULE_STAGGER_SECONDS", "300"))
+# 재시작 후 이 시간(시) 안에 놓친 예정 실행은 바로 따라잡습니다 (0 이면 따라잡지 않음).
+CATCHUP_MAX_HOURS = float(os.getenv("CATCHUP_MAX_HOURS", "24"))
+# 실행 기록이 없는 계정도 따라잡을지 (기본: 지금 시각으로 기록만 하고 다음 예정 시각부터 실행)
+CATCHUP_NEW_ACCOUNTS = os.getenv("CATCHUP_NEW_ACCOUNTS", "0") == "1"
+# 계정별 마지막 실행 시각 파일
+SCHEDULE_STATE_FILE = os.getenv("SCHEDULE_STATE_FILE", "schedule_state.json")
+# 예정 시각 확인 주기(초)
+SCHEDULER_TICK_SECONDS = int(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+
+# 다음/이전 실행 시각을 찾을 때 살펴볼 최대 일수
+SEARCH_DAYS = 366 * 5
+
+
+def _parse_field(text, low, high):
+    """cron 필드 하나 ("*", "*/15", "1-5", "0,30", "8-18/2") 를 값 집합으로 바꿉니다."""
+    values = set()
+    for part in text.split(","):
+        base, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = (int(v) for v in base.split("-", 1))
+        else:
+            start = end = int(base)
+            if step > 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"cron 값 범위 오류: {part} ({low}-{high})")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """분 시 일 월 요일 5개 필드의 cron 식 (요일 0/7 = 일요일)"""
+
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 식은 5개 필드여야 합니다: {expr}")
+        self.expr = expr
+        self.minutes = sorted(_parse_field(fields[0], 0, 59))
+        self.hours = sorted(_parse_field(fields[1], 0, 23))
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7)}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = (day.weekday() + 1) % 7 in self.weekdays
+        # 일과 요일이 모두 지정되면 둘 중 하나만 맞아도 됩니다 (cron 규칙).
+        if not self.any_day and not self.any_weekday:
+            return dom or dow
+        return dom and dow
+
+    def next_after(self, moment):
+        """moment 이후(초과) 첫 실행 시각"""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for offset in range(SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"실행 시각을 찾을 수 없습니다: {self.expr}")
+
+    def previous_before(self, moment):
+        """moment 이전(이하) 마지막 실행 시각"""
+        end = moment.replace(second=0, microsecond=0)
+        day = end.date()
+        for offset in range(SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in reversed(self.hours):
+                    for minute in reversed(self.minutes):
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate <= end:
+                            return candidate
+            day -= timedelta(days=1)
+        raise ValueError(f"실행 시각을 찾을 수 없습니다: {self.expr}")
+
+
+def stagger_offset(account_name, spread=None):
+    """계정명으로 정해지는 고정 지연(초). 재시작해도 같은 계정은 같은 시각에 실행됩니다."""
+    spread = SCHEDULE_STAGGER_SECONDS if spread is None else spread
+    if spread <= 0:
+        return 0
+    digest = hashlib.sha1(account_name.encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) % (spread + 1)
+
+
+class LastRunStore:
+    """계정별 마지막 실행 완료 시각 (재시작 후 놓친 예약 실행을 찾는 기준)"""
+
+    def __init__(self, path=None):
+        self.path = path or SCHEDULE_STATE_FILE
+        self.lock = threading.Lock()
+        self.last_runs = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get("last_run", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"last_run": self.last_runs}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, account_name):
+        value = self.last_runs.get(account_name)
+        return datetime.fromisoformat(value) if value else None
+
+    def seed(self, account_names, moment=None):
+        """기록이 없는 계정만 moment(기본: 지금) 로 기록하고, 새로 기록한 계정 목록을 반환합니다."""
+        moment = (moment or datetime.now()).isoformat(timespec="seconds")
+        with self.lock:
+            added = [name for name in account_names if name not in self.last_runs]
+            if not added:
+                return []
+            for name in added:
+                self.last_runs[name] = moment
+            try:
+                self._save()
+            except OSError as e:
+                print(f"실행 시각 저장 실패({self.path}): {e}")
+            return added
+
+    def record(self, account_names, moment=None):
+        moment = (moment or datetime.now()).isoformat(timespec="seconds")
+        with self.lock:
+            for name in account_names:
+                self.last_runs[name] = moment
+            try:
+                self._save()
+            except OSError as e:
+                print(f"실행 시각 저장 실패({self.path}): {e}")
+
+
+class AccountScheduler:
+    """계정별 cron 일정에 따라 작업 큐에 계정을 넣습니다.
+
+    계정마다 예정 시각 + 고정 지연(stagger) 에 실행하고, 시작할 때 마지막 실행 이후
+    놓친 예정 시각이 있으면 곧바로 따라잡기 작업을 넣습니다.
+    """
+
+    def __init__(self, queue, get_accounts, state=None, tick=None):
+        self.queue = queue
+        # 현재 계정 목록을 돌려주는 함수 (계정 설정이 바뀌어도 다음 확인 때 반영)
+        self.get_accounts = get_accounts
+        self.state = state or last_run_store
+        self.tick = tick or SCHEDULER_TICK_SECONDS
+        self.lock = threading.Lock()
+        # 계정 -> (cron 식, 다음 실행 시각)
+        self.next_due = {}
+
+    def _schedule_for(self, acc):
+        return CronSchedule(acc.get("schedule") or CRAWL_SCHEDULE)
+
+    def _next_due(self, acc, after):
+        """after 이후 첫 (예정 시각 + 지연)"""
+        offset = timedelta(seconds=stagger_offset(acc["name"]))
+        return self._schedule_for(acc).next_after(after - offset) + offset
+
+    def catch_up(self, now=None):
+        """마지막 실행 이후 예정 시각을 놓친 계정을 큐에 넣고 계정 목록을 반환합니다."""
+        now = now or datetime.now()
+        if not CATCHUP_MAX_HOURS:
+            return []
+        missed, run_keys = [], {}
+        accounts = self.get_accounts()
+        if not CATCHUP_NEW_ACCOUNTS:
+            # 실행 기록이 없는 계정(첫 배포, 파일이 사라진 재배포, 새로 추가한 계정)은 따라잡지 않고
+            # 지금 시각으로 기록해, 시작할 때마다 모든 계정을 다시 크롤링/보고하지 않게 합니다.
+            self.state.seed([acc["name"] for acc in accounts], now)
+        for acc in accounts:
+            last_run = self.state.get(acc["name"])
+            if last_run is None:
+                # CATCHUP_NEW_ACCOUNTS=1: 한 번도 실행하지 않은 계정도 놓친 것으로 봅니다.
+                last_run = datetime.min
+            offset = timedelta(seconds=stagger_offset(acc["name"]))
+            due = self._schedule_for(acc).previous_before(now - offset) + offset
+            if last_run < due and now - due <= timedelta(hours=CATCHUP_MAX_HOURS):
+                missed.append(acc["name"])
+                run_keys[acc["name"]] = due.isoformat(timespec="seconds")
+        if missed:
+            print(f"재시작 중 놓친 예약 실행을 따라잡습니다: {', '.join(missed)}")
+            # 놓친 예정 시각을 실행 키로 써서, 다른 레플리카가 이미 끝낸 실행은 다시 하지 않습니다.
+            self.queue.submit(missed, "catchup", run_keys)
+        return missed
+
+    def check(self, now=None):
+        """예정 시각이 지난 계정을 큐에 넣고 계정 목록을 반환합니다."""
+        now = now or datetime.now()
+        due, run_keys = [], {}
+        with self.lock:
+            accounts = self.get_accounts()
+            names = {acc["name"] for acc in accounts}
+            for name in list(self.next_due):
+                if name not in names:
+                    del self.next_due[name]
+            for acc in accounts:
+                expr = acc.get("schedule") or CRAWL_SCHEDULE
+                current = self.next_due.get(acc["name"])
+                if current is None or current[0] != expr:
+                    current = (expr, self._next_due(acc, now))
+                if now >= current[1]:
+                    due.append(acc["name"])
+                    run_keys[acc["name"]] = current[1].isoformat(timespec="seconds")
+                    current = (expr, self._next_due(acc, now))
+                self.next_due[acc["name"]] = current
+        if due:
+            self.queue.submit(due, "schedule", run_keys)
+        return due
+
+    def upcoming(self):
+        """계정별 다음 실행 예정 시각"""
+        with self.lock:
+            return {name: due.isoformat(timespec="seconds") for name, (expr, due) in self.next_due.items()}
+
+    def start(self):
+        self.catch_up()
+        self.check()
+
+        def loop():
+            while True:
+                time.sleep(self.tick)
+                try:
+                    self.check()
+                except Exception as e:
+                    print(f"스케줄 확인 오류: {e}")
+
+        threading.Thread(target=loop, name="scheduler", daemon=True).start()
+
+
+# 크롤러 작업과 스케줄러가 함께 쓰는 마지막 실행 시각 저장소
+last_run_store = LastRunStore()
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+
+from waits import wait_for_page_ready, wait_for_table
+
+# --- 설정 ---
+# 계정별 로그인 쿠키를 저장할 디렉터리
+SESSION_CACHE_DIR = os.getenv("SESSION_CACHE_DIR", "session_cache")
+# 쿠키 자체 만료와 별개로 저장된 세션을 신뢰할 최대 시간(시간)
+SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", "12"))
+# 0 이면 세션 캐시를 쓰지 않고 매번 로그인합니다.
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "1") == "1"
+
+
+def _cache_path(account):
+    return os.path.join(SESSION_CACHE_DIR, f"{account}.json")
+
+
+def save_session(account, cookies):
+    """로그인 직후의 쿠키를 만료 시각과 함께 저장합니다."""
+    if not SESSION_CACHE_ENABLED:
+        return
+    now = time.time()
+    expires_at = now + SESSION_TTL_HOURS * 3600
+    # 만료 시각이 있는 쿠키 중 가장 이른 만료를 넘지 않도록 합니다.
+    cookie_expiries = [c["expiry"] for c in cookies if c.get("expiry")]
+    if cookie_expiries:
+        expires_at = min(expires_at, min(cookie_expiries))
+    os.makedirs(SESSION_CACHE_DIR, exist_ok=True)
+    path = _cache_path(account)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # 쿠키는 로그인 자격과 같으므로 소유자만 읽을 수 있게 저장합니다.
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"saved_at": now, "expires_at": expires_at, "cookies": cookies}, f)
+    os.replace(tmp_path, path)
+    print(f"[{account}] 로그인 세션 저장 (만료: {time.strftime('%Y-%m-%d %H:%M', time.localtime(expires_at))})")
+
+
+def load_session(account):
+    """만료되지 않은 저장 쿠키를 반환합니다. 없거나 만료되었으면 None."""
+    if not SESSION_CACHE_ENABLED:
+        return None
+    try:
+        with open(_cache_path(account), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("expires_at", 0) <= time.time():
+        invalidate_session(account)
+        return None
+    return data.get("cookies") or None
+
+
+def invalidate_session(account):
+    """저장된 세션을 삭제합니다."""
+    try:
+        os.remove(_cache_path(account))
+    except OSError:
+        pass
+
+
+def restore_session(driver, account, login_url, contracts_url):
+    """저장된 쿠키로 계약 페이지에 바로 접속합니다.
+
+    계약 페이지가 열리면 True, 로그인 페이지로 돌아가면 캐시를 지우고 False 를 반환합니다.
+    """
+    cookies = load_session(account)
+    if not cookies:
+        return False
+    print(f"[{account}] 저장된 로그인 세션 복원 시도...")
+    try:
+        # 쿠키를 넣으려면 먼저 같은 도메인의 페이지에 있어야 합니다.
+        driver.get(login_url)
+        for cookie in cookies:
+            cookie = {k: v for k, v in cookie.items() if k in ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")}
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                print(f"[{account}] 쿠키 복원 실패({cookie.get('name')}): {e}")
+        driver.get(contracts_url)
+        wait_for_page_ready(driver)
+    except Exception as e:
+        print(f"[{account}] 세션 복원 중 오류: {e}")
+        invalidate_session(account)
+        return False
+    if "login" in driver.current_url or "contracts" not in driver.current_url:
+        print(f"[{account}] 저장된 세션이 만료되어 다시 로그인합니다.")
+        invalidate_session(account)
+        return False
+    wait_for_table(driver)
+    return True
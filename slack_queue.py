@@ -0,0 +1,205 @@
+import os
+import queue
+import threading
+import time
+
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+from metrics import observe
+
+# --- 설정 ---
+# Slack API 주소 (로컬 가짜 Slack 서버로 바꿔 테스트할 수 있습니다)
+SLACK_API_URL = os.getenv("SLACK_API_URL", WebClient.BASE_URL)
+# 메시지를 전송하는 백그라운드 워커 수
+SLACK_WORKERS = int(os.getenv("SLACK_WORKERS", "2"))
+# 메시지 하나의 최대 글자 수. 넘으면 줄 단위로 나눠 여러 메시지로 보냅니다.
+SLACK_MAX_TEXT = int(os.getenv("SLACK_MAX_TEXT", "3500"))
+# 일시적인 오류(429, 5xx, 네트워크)에 대한 최대 재시도 횟수
+SLACK_MAX_RETRIES = int(os.getenv("SLACK_MAX_RETRIES", "5"))
+SLACK_TIMEOUT = int(os.getenv("SLACK_TIMEOUT", "30"))
+
+# 다시 보내도 소용없는 오류
+PERMANENT_ERRORS = {
+    "invalid_auth", "not_authed", "account_inactive", "token_revoked",
+    "channel_not_found", "not_in_channel", "is_archived", "msg_too_long", "no_text"
+}
+
+
+def split_message(message, limit=None):
+    """메시지를 limit 글자 이하의 조각으로 나눕니다. 가능하면 줄 경계에서 자릅니다."""
+    limit = limit or SLACK_MAX_TEXT
+    if len(message) <= limit:
+        return [message]
+    chunks, current = [], ""
+    for line in message.splitlines(keepends=True):
+        while len(line) > limit:
+            # 한 줄이 한도보다 길면 강제로 자릅니다.
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current:
+        chunks.append(current)
+    return [chunk.rstrip("\n") for chunk in chunks if chunk.strip()]
+
+
+class SlackDeliveryQueue:
+    """Slack 메시지를 백그라운드에서 전송하는 큐.
+
+    토큰별로 WebClient 를 하나만 만들어 재사용하고, 429 응답의 Retry-After 를 지키며
+    일시적 오류는 지수 백오프로 재시도합니다. 크롤러는 전송을 기다리지 않습니다.
+    """
+
+    def __init__(self, workers=None, base_url=None):
+        self.workers = workers or SLACK_WORKERS
+        self.base_url = base_url or SLACK_API_URL
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.clients = {}
+        # 토큰별로 Retry-After 가 끝나는 시각
+        self.blocked_until = {}
+        self.threads = []
+        self.metrics = {
+            "enqueued": 0,
+            "messages_sent": 0,
+            "messages_failed": 0,
+            "chunks_sent": 0,
+            "split_messages": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "delivery_seconds_total": 0.0
+        }
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.metrics[name] += amount
+
+    def client(self, token):
+        """토큰별로 공유하는 WebClient"""
+        with self.lock:
+            if token not in self.clients:
+                self.clients[token] = WebClient(token=token, base_url=self.base_url, timeout=SLACK_TIMEOUT)
+            return self.clients[token]
+
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"slack-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def enqueue(self, message, token, channel, account=None):
+        """메시지를 전송 대기열에 넣고 바로 반환합니다. account 는 전송 시간 지표의 계정 라벨입니다."""
+        self.start()
+        chunks = split_message(message)
+        if len(chunks) > 1:
+            self._count("split_messages")
+        self._count("enqueued")
+        self.queue.put((chunks, token, channel, account, time.time()))
+
+    def flush(self, timeout=None):
+        """대기열이 빌 때까지 기다립니다. 모두 처리되면 True."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def snapshot(self):
+        """전송 지표와 현재 대기열 길이"""
+        with self.lock:
+            metrics = dict(self.metrics)
+        metrics["queue_depth"] = self.queue.qsize()
+        sent = metrics["messages_sent"]
+        metrics["avg_delivery_seconds"] = round(metrics["delivery_seconds_total"] / sent, 3) if sent else None
+        return metrics
+
+    def _wait_for_rate_limit(self, token):
+        with self.lock:
+            wait = self.blocked_until.get(token, 0) - time.time()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _retry_after(self, response):
+        """429 응답의 Retry-After(초). 헤더가 없으면 1초"""
+        for name, value in (response.headers or {}).items():
+            if name.lower() == "retry-after":
+                value = value[0] if isinstance(value, (list, tuple)) else value
+                try:
+                    return max(1, int(value))
+                except (TypeError, ValueError):
+                    break
+        return 1
+
+    def _post(self, client, token, channel, text):
+        """조각 하나를 전송합니다. 일시적 오류는 재시도하고, 최종 실패 시 마지막 예외를 발생시킵니다."""
+        for attempt in range(SLACK_MAX_RETRIES + 1):
+            self._wait_for_rate_limit(token)
+            try:
+                client.chat_postMessage(channel=channel, text=text)
+                return
+            except SlackApiError as e:
+                last_error = e
+                status = e.response.status_code
+                error = e.response.get("error")
+                if status == 429 or error == "ratelimited":
+                    # 다음 시도 전에 _wait_for_rate_limit 에서 Retry-After 만큼 기다립니다.
+                    retry_after = self._retry_after(e.response)
+                    self._count("rate_limited")
+                    with self.lock:
+                        self.blocked_until[token] = max(self.blocked_until.get(token, 0), time.time() + retry_after)
+                    print(f"슬랙 전송 제한(429), {retry_after}초 후 재시도: {channel}")
+                    delay = 0
+                elif error in PERMANENT_ERRORS or (status and 400 <= status < 500):
+                    raise
+                else:
+                    delay = min(2 ** attempt, 60)
+            except Exception as e:
+                # 네트워크 오류 등
+                last_error = e
+                delay = min(2 ** attempt, 60)
+            if attempt == SLACK_MAX_RETRIES:
+                raise last_error
+            self._count("retries")
+            if delay:
+                print(f"슬랙 전송 오류, {delay}초 후 재시도({channel}): {last_error}")
+                time.sleep(delay)
+
+    def _worker(self):
+        while True:
+            chunks, token, channel, account, enqueued_at = self.queue.get()
+            # 계정 없이 보낸 메시지(시작 알림 등)는 "-" 로 묶습니다. 채널은 별도 필드로 남깁니다.
+            account = account or "-"
+            start = time.time()
+            try:
+                client = self.client(token)
+                for chunk in chunks:
+                    self._post(client, token, channel, chunk)
+                    self._count("chunks_sent")
+                self._count("messages_sent")
+                self._count("delivery_seconds_total", time.time() - enqueued_at)
+                observe("slack_post", account, time.time() - start, channel=channel, chunks=len(chunks))
+                print(f"슬랙 메시지 전송 성공: {channel}")
+            except SlackApiError as e:
+                self._count("messages_failed")
+                observe("slack_post", account, time.time() - start, "error", channel=channel)
+                print(f"슬랙 메시지 전송 실패({channel}): {e.response.get('error')}")
+            except Exception as e:
+                self._count("messages_failed")
+                observe("slack_post", account, time.time() - start, "error", channel=channel)
+                print(f"슬랙 메시지 전송 실패({channel}): {e}")
+            finally:
+                self.queue.task_done()
+
+
+# 프로세스 전체에서 공유하는 전송 큐
+slack_queue = SlackDeliveryQueue()
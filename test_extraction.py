@@ -0,0 +1,24 @@
+"""계약 테이블 HTML 잘라내기(contracts_table_html) 를 확인합니다.
+
+python -m pytest -q test_extraction.py
+"""
+import pytest
+
+from extraction import contracts_table_html
+
+TABLE = (
+    "<table class=\"table\">\n"
+    "<tr><th>번호</th><th>계약번호</th><th>가맹점명</th><th>시작일</th><th>종료일</th><th>CPC잔액</th></tr>\n"
+    "<tr><td>1</td><td>C0001</td><td>가맹점 A</td><td>2025-01-01</td><td>2025-12-31</td><td>6</td></tr>\n"
+    "</table>"
+)
+
+
+@pytest.mark.parametrize("separator", ["\r", "\r\n", "\x0b", "\x0c", "\x1c", "\x85", "\u2028"])
+def test_other_line_breaks_before_table_do_not_shift_slice(separator):
+    html = f"<html><body>\n<p>a{separator}b</p>\n<p>x{separator}y</p>\n{TABLE}\n<p>토큰 123</p></body></html>"
+    assert contracts_table_html(html) == TABLE
+
+
+def test_missing_table_returns_none():
+    assert contracts_table_html("<html><body><p>점검 중</p></body></html>") is None
@@ -0,0 +1,129 @@
+"""HTTP 빠른 경로(crawl_contracts_http)를 로컬 대역 서버로 확인합니다.
+
+python -m pytest -q test_http_fetch.py
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from http_fetch import FastPathUnavailable, crawl_contracts_http
+from pagination import PaginationInfo
+
+SESSION_COOKIE = "sid=ok"
+
+# 페이지 번호 -> [(가맹점명, 잔액 문자열)]
+PAGES = {
+    1: [("가맹점 A", "1,000.00 RMB"), ("가맹점 B", "0.00 RMB")],
+    2: [("가맹점 C", "250.50 RMB"), ("가맹점  D", "12,345.67 RMB")],
+    3: [("가맹점 E", "")],
+}
+
+
+def render(rows):
+    header = "<tr>" + "".join(f"<th>{name}</th>" for name in ("번호", "계약번호", "가맹점명", "시작일", "종료일", "CPC잔액")) + "</tr>"
+    body = "".join(
+        f"<tr><td>{i}</td><td>C{i:04d}</td><td>{name}</td><td>2025-01-01</td><td>2025-12-31</td><td>{balance}</td></tr>"
+        for i, (name, balance) in enumerate(rows, 1)
+    )
+    return f"<html><body><table class=\"table\">{header}{body}</table></body></html>"
+
+
+class StandIn(BaseHTTPRequestHandler):
+    # normal, ignore_page(페이지 번호 무시), no_table(2페이지에 테이블 없음), status(403)
+    mode = "normal"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == "/login":
+            return self._send(200, "<html><form id='login'></form></html>")
+        if SESSION_COOKIE not in (self.headers.get("Cookie") or ""):
+            self.send_response(302)
+            self.send_header("Location", "/login")
+            self.end_headers()
+            return
+        if self.mode == "status":
+            return self._send(403, "forbidden")
+        page = int(parse_qs(parts.query).get("page", ["1"])[0])
+        if self.mode == "ignore_page":
+            page = 1
+        if self.mode == "no_table" and page == 2:
+            return self._send(200, "<html><body><p>점검 중</p></body></html>")
+        self._send(200, render(PAGES.get(page, [])))
+
+    def _send(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeDriver:
+    """session_from_driver 가 쓰는 부분만 흉내 낸 드라이버"""
+
+    def __init__(self, logged_in=True):
+        self.logged_in = logged_in
+
+    def execute_script(self, script):
+        return "Mozilla/5.0 test"
+
+    def get_cookies(self):
+        return [{"name": "sid", "value": "ok", "domain": "127.0.0.1", "path": "/"}] if self.logged_in else []
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    StandIn.mode = "normal"
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/contracts"
+    httpd.shutdown()
+    httpd.server_close()
+    StandIn.mode = "normal"
+
+
+def info(pages=3):
+    return PaginationInfo(total_pages=pages, exact=True)
+
+
+def test_parses_merchant_and_balance_columns_across_pages(server):
+    merchants, pages = crawl_contracts_http(FakeDriver(), server, info(), "2025-03-01")
+    assert pages == 3
+    assert [(m["가맹점명"], m["CPC잔액"], m["페이지"]) for m in merchants] == [
+        ("가맹점 A", 1000.0, 1),
+        ("가맹점 B", 0.0, 1),
+        ("가맹점 C", 250.5, 2),
+        ("가맹점 D", 12345.67, 2),
+        ("가맹점 E", 0.0, 3),
+    ]
+    assert {m["추출날짜"] for m in merchants} == {"2025-03-01"}
+
+
+def test_login_redirect_falls_back(server):
+    with pytest.raises(FastPathUnavailable, match="로그인"):
+        crawl_contracts_http(FakeDriver(logged_in=False), server, info(), "2025-03-01")
+
+
+def test_non_200_falls_back(server):
+    StandIn.mode = "status"
+    with pytest.raises(FastPathUnavailable, match="403"):
+        crawl_contracts_http(FakeDriver(), server, info(), "2025-03-01")
+
+
+def test_missing_table_falls_back(server):
+    StandIn.mode = "no_table"
+    with pytest.raises(FastPathUnavailable, match="계약 테이블"):
+        crawl_contracts_http(FakeDriver(), server, info(), "2025-03-01")
+
+
+def test_duplicate_pages_fall_back(server):
+    StandIn.mode = "ignore_page"
+    with pytest.raises(FastPathUnavailable, match="같습니다"):
+        crawl_contracts_http(FakeDriver(), server, info(), "2025-03-01")
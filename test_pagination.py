@@ -0,0 +1,26 @@
+"""페이지 구성 판단(pagination_from_data) 을 확인합니다.
+
+python -m pytest -q test_pagination.py
+"""
+from pagination import pagination_from_data
+
+
+def links(*texts):
+    return [{"text": text, "href": "javascript:void(0)", "rel": "", "cls": ""} for text in texts]
+
+
+def test_total_records_decide_page_count():
+    info = pagination_from_data({"links": links("1", "2", "3", ">"), "text": "총 1,234 건", "rows": 10})
+    assert (info.total_pages, info.total_records, info.exact) == (124, 1234, True)
+
+
+def test_count_smaller_than_visible_links_is_ignored():
+    # 테이블 헤더 "Total" 다음 셀 "1" 같은 잘못 읽은 건수
+    info = pagination_from_data({"links": links("1", "2", "3", "4", "5", ">"), "text": "Total 1", "rows": 10})
+    assert info.total_records is None
+    assert (info.total_pages, info.exact) == (5, False)
+
+
+def test_visible_links_without_next_are_exact():
+    info = pagination_from_data({"links": links("1", "2"), "text": "", "rows": 10})
+    assert (info.total_pages, info.exact) == (2, True)
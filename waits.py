@@ -0,0 +1,136 @@
+import threading
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_profile import READY_STATES
+
+# --- 대기 조건 ---
+# 고정 sleep 대신 실제 화면 상태가 바뀔 때까지만 기다리고, 걸린 시간을 기록합니다.
+POLL_INTERVAL = 0.1
+
+# 조건 이름 -> {count, timeouts, total, max, last}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name, elapsed, ok):
+    with _stats_lock:
+        stat = _stats.setdefault(name, {"count": 0, "timeouts": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+        stat["count"] += 1
+        if not ok:
+            stat["timeouts"] += 1
+        stat["total"] += elapsed
+        stat["max"] = max(stat["max"], elapsed)
+        stat["last"] = elapsed
+
+
+def wait_stats():
+    """조건별 대기 시간 통계(횟수, 시간 초과, 평균/최대/마지막 초)를 반환합니다."""
+    with _stats_lock:
+        return {
+            name: {
+                "count": stat["count"],
+                "timeouts": stat["timeouts"],
+                "avg": round(stat["total"] / stat["count"], 3),
+                "max": round(stat["max"], 3),
+                "last": round(stat["last"], 3)
+            }
+            for name, stat in _stats.items()
+        }
+
+
+def timed_wait(driver, name, condition, timeout, required=True):
+    """condition 이 참이 될 때까지 기다리고 소요 시간을 기록합니다.
+
+    required=False 이면 시간 초과 시 예외 대신 None 을 반환합니다.
+    """
+    start = time.time()
+    try:
+        value = WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(condition)
+    except TimeoutException:
+        _record(name, time.time() - start, False)
+        if required:
+            raise
+        return None
+    _record(name, time.time() - start, True)
+    return value
+
+
+# --- 조건 함수 ---
+def document_ready(driver):
+    # eager 로드 전략이면 DOM 이 만들어진 interactive 단계부터 준비된 것으로 봅니다.
+    return driver.execute_script("return document.readyState") in READY_STATES
+
+
+def left_login_page(driver):
+    return "login" not in driver.current_url
+
+
+def login_form_present(driver):
+    return driver.execute_script(
+        "return !!(document.querySelector('#username') || document.querySelector(\"input[name='username']\"));"
+    )
+
+
+def table_text(driver):
+    """현재 페이지 첫 테이블의 텍스트 (다시 그려졌는지 비교용)"""
+    return driver.execute_script("var t = document.querySelector('table'); return t ? t.innerText : null;")
+
+
+def table_present(driver):
+    return driver.execute_script("return document.querySelector('table tr') !== null;")
+
+
+def table_rerendered(old_table, old_text):
+    """이전 테이블 요소가 교체되었거나 내용이 바뀌었으면 참"""
+    def _check(driver):
+        if old_table is not None:
+            try:
+                old_table.is_enabled()
+            except StaleElementReferenceException:
+                return table_present(driver)
+        text = table_text(driver)
+        return text is not None and text != old_text
+    return _check
+
+
+def active_page(driver):
+    """페이지네이션에서 현재 활성화된 페이지 번호 텍스트"""
+    return driver.execute_script("""
+        var active = document.querySelector('.pagination .active a, .pagination .active, .pagination [aria-current]');
+        return active ? active.textContent.trim() : null;
+    """)
+
+
+def active_page_is(page):
+    """활성 페이지 항목이 page 로 바뀌었으면 참"""
+    return lambda driver: active_page(driver) == str(page)
+
+
+# --- 자주 쓰는 대기 ---
+def wait_for_page_ready(driver, timeout=20):
+    return timed_wait(driver, "page_ready", document_ready, timeout)
+
+
+def wait_for_login_form(driver, timeout=10):
+    return timed_wait(driver, "login_form", login_form_present, timeout, required=False)
+
+
+def wait_for_login_redirect(driver, timeout=10):
+    return timed_wait(driver, "left_login", left_login_page, timeout)
+
+
+def wait_for_table(driver, timeout=10):
+    return timed_wait(driver, "table_present", table_present, timeout, required=False)
+
+
+def wait_for_page_change(driver, old_table, old_text, page, timeout=10):
+    """페이지 이동 후 테이블이 다시 그려지고 활성 페이지가 page 가 될 때까지 기다립니다.
+
+    활성 페이지 표시가 없는 페이지네이션은 테이블 변경만으로 판단합니다.
+    """
+    timed_wait(driver, "table_rerendered", table_rerendered(old_table, old_text), timeout)
+    if active_page(driver) is not None:
+        timed_wait(driver, "active_page", active_page_is(page), timeout, required=False)